@@ -5,6 +5,7 @@ import logging
 from dotenv import load_dotenv
 from database.models import init_db
 from routes import register_routes
+from services.scheduler_service import get_scheduler_service
 
 load_dotenv()
 
@@ -20,6 +21,26 @@ def create_app():
     # Регистрация всех маршрутов
     register_routes(app)
 
+    # Один планировщик на процесс; его цикл синхронизируется с общей БД задач
+    scheduler_service = get_scheduler_service()
+    app.extensions['scheduler_service'] = scheduler_service
+    if os.getenv('SCHEDULER_ENABLED', 'true').lower() == 'true':
+        scheduler_service.resume()
+
+    @app.cli.command('rebuild-stats')
+    def rebuild_stats_command():
+        """Пересчет агрегатов статистики по таблице vacancies"""
+        from database.models import Session
+        from database.stats import rebuild_stats
+
+        session = Session()
+        try:
+            total = rebuild_stats(session)
+            session.commit()
+            print(f"✅ Агрегаты статистики пересчитаны: {total} вакансий")
+        finally:
+            session.close()
+
     return app
 
 if __name__ == '__main__':
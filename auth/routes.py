@@ -4,12 +4,82 @@ import hashlib
 import json
 import os
 import shutil
+import threading
 
 auth_bp = Blueprint('auth', __name__, url_prefix='/auth')
 
 # Файл для хранения пользователей
 USERS_FILE = 'users.json'
 
+# Кеш процесса: разобранный users.json и подпись файла (mtime, размер, inode).
+# Проверка авторизации делает один os.stat вместо чтения и разбора JSON.
+_users_cache = {'signature': None, 'users': None}
+_users_cache_lock = threading.Lock()
+
+
+def _users_file_signature():
+    """Подпись файла пользователей или None, если файла нет"""
+    try:
+        stat = os.stat(USERS_FILE)
+    except OSError:
+        return None
+    return USERS_FILE, stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+
+def _read_users_file():
+    """Чтение users.json с конвертацией строк дат в datetime"""
+    with open(USERS_FILE, 'r', encoding='utf-8') as f:
+        users = json.load(f)
+
+    # Конвертируем строки дат обратно в datetime
+    for username, user_data in users.items():
+        if user_data.get('expires'):
+            try:
+                if isinstance(user_data['expires'], str):
+                    user_data['expires'] = datetime.fromisoformat(user_data['expires'])
+            except (ValueError, TypeError):
+                user_data['expires'] = None
+        else:
+            user_data['expires'] = None
+
+    return users
+
+
+def _cached_users():
+    """Пользователи из кеша; файл перечитывается только если изменилась его подпись"""
+    signature = _users_file_signature()
+    if signature is None:
+        return None
+
+    cached = _users_cache
+    if cached['signature'] == signature:
+        return cached['users']
+
+    with _users_cache_lock:
+        if _users_cache['signature'] != signature:
+            users = _read_users_file()
+            _users_cache.update(signature=signature, users=users)
+        return _users_cache['users']
+
+
+def invalidate_users_cache():
+    """Сброс кеша пользователей (после записи users.json)"""
+    with _users_cache_lock:
+        _users_cache.update(signature=None, users=None)
+
+
+def get_user(username):
+    """Данные одного пользователя из кеша (только для чтения) или None"""
+    try:
+        users = _cached_users()
+    except Exception as e:
+        print(f"Ошибка загрузки пользователей: {e}")
+        return None
+
+    if users is None:
+        return load_users().get(username)
+    return users.get(username)
+
 
 def load_users():
     """Загрузка пользователей из файла"""
@@ -33,21 +103,11 @@ def load_users():
 
     try:
         if os.path.exists(USERS_FILE):
-            with open(USERS_FILE, 'r', encoding='utf-8') as f:
-                users = json.load(f)
-
-                # Конвертируем строки дат обратно в datetime
-                for username, user_data in users.items():
-                    if user_data.get('expires'):
-                        try:
-                            if isinstance(user_data['expires'], str):
-                                user_data['expires'] = datetime.fromisoformat(user_data['expires'])
-                        except (ValueError, TypeError):
-                            user_data['expires'] = None
-                    else:
-                        user_data['expires'] = None
-
-                return users
+            users = _cached_users()
+            if users is not None:
+                # Копия: вызывающий код меняет словарь и сохраняет его через save_users
+                return {username: dict(user_data) for username, user_data in users.items()}
+            return _read_users_file()
         else:
             save_users(default_users)
             return default_users
@@ -87,6 +147,7 @@ def save_users(users):
         with open(USERS_FILE, 'w', encoding='utf-8') as f:
             json.dump(users_to_save, f, indent=2, ensure_ascii=False)
 
+        invalidate_users_cache()
         return True
     except Exception as e:
         print(f"Ошибка сохранения пользователей: {e}")
@@ -104,13 +165,12 @@ def check_auth():
         return False
 
     username = session['user']
-    users = load_users()
+    user = get_user(username)
 
-    if username not in users:
+    if user is None:
         session.clear()
         return False
 
-    user = users[username]
     if user.get('expires'):
         expires_dt = user['expires']
         if isinstance(expires_dt, str):
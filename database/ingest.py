@@ -0,0 +1,58 @@
+from datetime import datetime
+from typing import Dict, List
+from database.models import Vacancy, dialect_insert
+from database.stats import apply_vacancy_delta
+from database.versions import bump_data_version
+
+# Строк в одном INSERT (держимся ниже лимита параметров SQLite)
+CHUNK_SIZE = 100
+
+
+def _vacancy_row(vacancy_data: Dict, source: str, created_at: datetime) -> Dict:
+    """Строка таблицы vacancies из распарсенной вакансии"""
+    return {
+        'title': vacancy_data['title'],
+        'link': vacancy_data['link'],
+        'company': vacancy_data.get('company', ''),
+        'salary': vacancy_data.get('salary', 'Не указана'),
+        'location': vacancy_data.get('location'),
+        'description': vacancy_data.get('description'),
+        'requirements': vacancy_data.get('requirements'),
+        'source': source,
+        'created_at': created_at
+    }
+
+
+def ingest_vacancies(session, vacancies: List[Dict], source: str) -> Dict:
+    """Пакетная вставка вакансий через INSERT ... ON CONFLICT DO NOTHING.
+
+    Коммит остается за вызывающим кодом, поэтому несколько пакетов
+    можно записать одной транзакцией.
+    """
+    created_at = datetime.utcnow()
+    rows = [_vacancy_row(v, source, created_at) for v in vacancies]
+
+    insert = dialect_insert(session)
+    inserted = set()
+    for start in range(0, len(rows), CHUNK_SIZE):
+        stmt = insert(Vacancy).values(rows[start:start + CHUNK_SIZE])
+        stmt = stmt.on_conflict_do_nothing(index_elements=['link']).returning(Vacancy.link)
+        inserted.update(session.execute(stmt).scalars())
+
+    # Одна и та же ссылка в пакете считается новой только один раз
+    new_vacancies = []
+    for row in rows:
+        if row['link'] in inserted:
+            inserted.discard(row['link'])
+            new_vacancies.append(row)
+
+    # Агрегаты статистики и версия данных обновляются в той же транзакции
+    apply_vacancy_delta(session, new_vacancies)
+    if new_vacancies:
+        bump_data_version(session)
+
+    return {
+        'new': len(new_vacancies),
+        'duplicates': len(rows) - len(new_vacancies),
+        'new_vacancies': new_vacancies
+    }
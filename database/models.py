@@ -1,6 +1,9 @@
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime
+from sqlalchemy import create_engine, inspect, text, Column, Integer, String, Text, DateTime, Index
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import declarative_base, sessionmaker
 from datetime import datetime
+import json
 import os
 
 Base = declarative_base()
@@ -20,6 +23,16 @@ class Vacancy(Base):
     source = Column(String(64), nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        # Фильтр по источнику + сортировка по дате, GROUP BY source
+        Index('ix_vacancies_source_created_at', 'source', 'created_at'),
+        # GROUP BY company / location в статистике
+        Index('ix_vacancies_company', 'company'),
+        Index('ix_vacancies_location', 'location'),
+        # Курсорная пагинация по (created_at, id)
+        Index('ix_vacancies_created_at_id', 'created_at', 'id'),
+    )
+
     def __repr__(self):
         return f'<Vacancy {self.title} at {self.company}>'
 
@@ -39,6 +52,235 @@ class Vacancy(Base):
         }
 
 
+# Полнотекстовый индекс SQLite FTS5 поверх vacancies (external content)
+FTS_TABLE = 'vacancies_fts'
+FTS_COLUMNS = ('title', 'company', 'description', 'requirements')
+
+FTS_TRIGGERS = {
+    'vacancies_fts_ai': """
+        CREATE TRIGGER vacancies_fts_ai AFTER INSERT ON vacancies BEGIN
+            INSERT INTO vacancies_fts(rowid, title, company, description, requirements)
+            VALUES (new.id, new.title, new.company, new.description, new.requirements);
+        END""",
+    'vacancies_fts_ad': """
+        CREATE TRIGGER vacancies_fts_ad AFTER DELETE ON vacancies BEGIN
+            INSERT INTO vacancies_fts(vacancies_fts, rowid, title, company, description, requirements)
+            VALUES ('delete', old.id, old.title, old.company, old.description, old.requirements);
+        END""",
+    'vacancies_fts_au': """
+        CREATE TRIGGER vacancies_fts_au AFTER UPDATE ON vacancies BEGIN
+            INSERT INTO vacancies_fts(vacancies_fts, rowid, title, company, description, requirements)
+            VALUES ('delete', old.id, old.title, old.company, old.description, old.requirements);
+            INSERT INTO vacancies_fts(rowid, title, company, description, requirements)
+            VALUES (new.id, new.title, new.company, new.description, new.requirements);
+        END"""
+}
+
+
+def ensure_fulltext_index(engine):
+    """Создание FTS5-индекса и триггеров синхронизации (только SQLite)"""
+    if engine.dialect.name != 'sqlite':
+        return False
+
+    with engine.begin() as conn:
+        existing = {row[0] for row in conn.execute(text(
+            "SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger')"
+        ))}
+
+        created = FTS_TABLE not in existing
+        if created:
+            try:
+                conn.execute(text(
+                    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+                    f"{', '.join(FTS_COLUMNS)}, content='vacancies', content_rowid='id', "
+                    f"tokenize='unicode61 remove_diacritics 2')"
+                ))
+            except OperationalError as e:
+                print(f"⚠️ FTS5 недоступен, полнотекстовый поиск отключен: {e}")
+                return False
+
+        for name, ddl in FTS_TRIGGERS.items():
+            if name not in existing:
+                conn.execute(text(ddl))
+
+        if created:
+            # Индексируем уже накопленные вакансии
+            conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+            print(f"🛠️ Создан полнотекстовый индекс {FTS_TABLE}")
+
+    return True
+
+
+def upgrade_schema(engine):
+    """Идемпотентное обновление схемы существующей БД.
+
+    create_all не трогает уже существующие таблицы, поэтому недостающие
+    колонки, индексы и полнотекстовый индекс создаются отдельно.
+    """
+    inspector = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+
+        columns = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in columns:
+                column_type = column.type.compile(dialect=engine.dialect)
+                with engine.begin() as conn:
+                    conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+                print(f"🛠️ Добавлена колонка {table.name}.{column.name}")
+
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(bind=engine)
+                print(f"🛠️ Создан индекс {index.name}")
+
+    if inspector.has_table(Vacancy.__tablename__):
+        ensure_fulltext_index(engine)
+
+
+class VacancyStat(Base):
+    """Агрегаты статистики: количество вакансий по измерению и значению"""
+    __tablename__ = 'vacancy_stats'
+
+    dimension = Column(String(16), primary_key=True)  # total / source / company / location
+    value = Column(String(256), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        # Топ-N по измерению без сортировки всей таблицы
+        Index('ix_vacancy_stats_dimension_count', 'dimension', 'count'),
+    )
+
+    def __repr__(self):
+        return f'<VacancyStat {self.dimension}={self.value}: {self.count}>'
+
+
+class DataVersion(Base):
+    """Монотонная версия набора данных (для ETag / Last-Modified)"""
+    __tablename__ = 'data_versions'
+
+    name = Column(String(32), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<DataVersion {self.name}={self.version}>'
+
+
+class CrawlWatermark(Base):
+    """Водяной знак инкрементального обхода: ссылки, уже виденные по (источник, запрос, город)"""
+    __tablename__ = 'crawl_watermarks'
+
+    source = Column(String(64), primary_key=True)
+    query = Column(String(256), primary_key=True)
+    city = Column(String(128), primary_key=True)
+    links = Column(Text, nullable=False, default='[]')  # JSON: последние ссылки, новые первыми
+    crawled_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<CrawlWatermark {self.source}:{self.query}:{self.city}>'
+
+
+class SchedulerJob(Base):
+    """Задача планировщика; полное описание задачи хранится в data (JSON)"""
+    __tablename__ = 'scheduler_jobs'
+
+    id = Column(String(64), primary_key=True)
+    status = Column(String(16), nullable=False, default='active')
+    next_run = Column(DateTime)
+    data = Column(Text, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        # Выборка ближайших активных задач
+        Index('ix_scheduler_jobs_status_next_run', 'status', 'next_run'),
+    )
+
+    def __repr__(self):
+        return f'<SchedulerJob {self.id} next={self.next_run}>'
+
+
+class SchedulerLease(Base):
+    """Аренда задачи: только владелец аренды выполняет задачу до expires_at"""
+    __tablename__ = 'scheduler_leases'
+
+    job_id = Column(String(64), primary_key=True)
+    owner = Column(String(128), nullable=False)
+    run_id = Column(String(64))
+    expires_at = Column(DateTime, nullable=False)
+
+    def __repr__(self):
+        return f'<SchedulerLease {self.job_id} owner={self.owner}>'
+
+
+class SchedulerRun(Base):
+    """Запуск задачи планировщика"""
+    __tablename__ = 'scheduler_runs'
+
+    run_id = Column(String(64), primary_key=True)
+    job_id = Column(String(64), nullable=False)
+    owner = Column(String(128))
+    status = Column(String(16), nullable=False, default='queued')
+    queued_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+    found = Column(Integer, default=0)
+    error = Column(Text)
+    # Метрики запуска
+    duration_ms = Column(Integer)
+    pages = Column(Integer, default=0)
+    http_requests = Column(Integer, default=0)
+    new = Column(Integer, default=0)
+    duplicates = Column(Integer, default=0)
+    errors = Column(Integer, default=0)
+    source_latency = Column(Text)  # JSON: источник -> мс
+
+    __table_args__ = (
+        Index('ix_scheduler_runs_job_id_queued_at', 'job_id', 'queued_at'),
+    )
+
+    def __repr__(self):
+        return f'<SchedulerRun {self.run_id} {self.status}>'
+
+    def to_dict(self):
+        """Конвертация объекта в словарь"""
+        return {
+            'run_id': self.run_id,
+            'job_id': self.job_id,
+            'owner': self.owner,
+            'status': self.status,
+            'queued_at': self.queued_at.isoformat() if self.queued_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'found': self.found or 0,
+            'error': self.error,
+            'duration_ms': self.duration_ms,
+            'pages': self.pages or 0,
+            'http_requests': self.http_requests or 0,
+            'new': self.new or 0,
+            'duplicates': self.duplicates or 0,
+            'errors': self.errors or 0,
+            'source_latency': json.loads(self.source_latency) if self.source_latency else {}
+        }
+
+
+class SchedulerState(Base):
+    """Общие флаги планировщика (running, импорт JSON)"""
+    __tablename__ = 'scheduler_state'
+
+    key = Column(String(64), primary_key=True)
+    value = Column(Text)
+
+
+def dialect_insert(session):
+    """INSERT выбранного диалекта с поддержкой ON CONFLICT"""
+    if session.get_bind().dialect.name == 'postgresql':
+        return postgresql.insert
+    return sqlite.insert
+
+
 def init_db():
     """Инициализация базы данных"""
     db_path = os.getenv('DATABASE_URL', 'sqlite:///vacancies.db')
@@ -47,6 +289,13 @@ def init_db():
     # Создаем все таблицы
     Base.metadata.create_all(engine)
 
+    # Доводим существующую БД до актуальной схемы
+    upgrade_schema(engine)
+
+    # Заполняем агрегаты статистики, если таблица только что появилась
+    from database.stats import ensure_stats
+    ensure_stats(sessionmaker(bind=engine))
+
     return sessionmaker(bind=engine)
 
 
@@ -0,0 +1,414 @@
+import json
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from sqlalchemy import delete, select
+from database.models import (
+    SchedulerJob, SchedulerLease, SchedulerRun, SchedulerState, dialect_insert
+)
+
+SCHEDULER_TABLES = [
+    SchedulerJob.__table__,
+    SchedulerLease.__table__,
+    SchedulerRun.__table__,
+    SchedulerState.__table__
+]
+
+
+def _parse_time(value) -> Optional[datetime]:
+    """next_run задачи (ISO-строка) -> datetime"""
+    try:
+        return datetime.fromisoformat(value) if value else None
+    except (TypeError, ValueError):
+        return None
+
+
+class SchedulerStore:
+    """Хранилище планировщика в общей БД.
+
+    Задачи, флаг running и запуски лежат в таблицах, поэтому все воркеры
+    видят одно состояние. Выполнение due-задачи защищено арендой (lease):
+    строку аренды захватывает один воркер, а просроченную аренду упавшего
+    воркера может перехватить любой другой.
+    """
+
+    def __init__(self, session_factory=None, owner: str = None):
+        self.session_factory = session_factory
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._ensure_tables()
+
+    def _session(self):
+        if self.session_factory:
+            return self.session_factory()
+        from database.models import Session
+        return Session()
+
+    def _ensure_tables(self):
+        """Таблицы планировщика создаются (и дополняются колонками) при первом обращении"""
+        session = self._session()
+        try:
+            from database.models import Base, upgrade_schema
+            Base.metadata.create_all(session.get_bind(), tables=SCHEDULER_TABLES)
+            upgrade_schema(session.get_bind())
+        finally:
+            session.close()
+
+    # --- задачи ---
+
+    def load_jobs(self) -> Dict[str, Dict]:
+        """Все задачи планировщика"""
+        session = self._session()
+        try:
+            rows = session.execute(select(SchedulerJob.id, SchedulerJob.data)).all()
+            return {job_id: json.loads(data) for job_id, data in rows}
+        finally:
+            session.close()
+
+    def load_job(self, job_id: str) -> Optional[Dict]:
+        """Задача по id или None"""
+        session = self._session()
+        try:
+            data = session.execute(
+                select(SchedulerJob.data).where(SchedulerJob.id == job_id)
+            ).scalar()
+            return json.loads(data) if data else None
+        finally:
+            session.close()
+
+    def _upsert_job(self, session, job: Dict, overwrite: bool = True):
+        insert = dialect_insert(session)
+        stmt = insert(SchedulerJob).values(
+            id=job['id'],
+            status=job.get('status', 'active'),
+            next_run=_parse_time(job.get('next_run')),
+            data=json.dumps(job, ensure_ascii=False),
+            updated_at=datetime.utcnow()
+        )
+        if overwrite:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['id'],
+                set_={
+                    'status': stmt.excluded.status,
+                    'next_run': stmt.excluded.next_run,
+                    'data': stmt.excluded.data,
+                    'updated_at': stmt.excluded.updated_at
+                }
+            )
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=['id'])
+        session.execute(stmt)
+
+    def save_job(self, job: Dict):
+        """Создать или обновить задачу"""
+        session = self._session()
+        try:
+            self._upsert_job(session, job)
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def delete_job(self, job_id: str):
+        """Удалить задачу вместе с ее арендой и историей запусков"""
+        self._delete(SchedulerJob.id == job_id, SchedulerLease.job_id == job_id, SchedulerRun.job_id == job_id)
+
+    def delete_all_jobs(self):
+        """Удалить все задачи, аренды и историю запусков"""
+        self._delete(None, None, None)
+
+    def _delete(self, job_filter, lease_filter, run_filter):
+        session = self._session()
+        try:
+            jobs = delete(SchedulerJob)
+            leases = delete(SchedulerLease)
+            runs = delete(SchedulerRun)
+            if job_filter is not None:
+                jobs = jobs.where(job_filter)
+                leases = leases.where(lease_filter)
+                runs = runs.where(run_filter)
+            session.execute(jobs)
+            session.execute(leases)
+            session.execute(runs)
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    # --- общие флаги ---
+
+    def get_flag(self, key: str, default: str = None) -> Optional[str]:
+        session = self._session()
+        try:
+            value = session.execute(
+                select(SchedulerState.value).where(SchedulerState.key == key)
+            ).scalar()
+            return default if value is None else value
+        finally:
+            session.close()
+
+    def set_flag(self, key: str, value: str):
+        session = self._session()
+        try:
+            insert = dialect_insert(session)
+            stmt = insert(SchedulerState).values(key=key, value=value)
+            stmt = stmt.on_conflict_do_update(index_elements=['key'], set_={'value': stmt.excluded.value})
+            session.execute(stmt)
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def is_running(self) -> bool:
+        return self.get_flag('running', 'false') == 'true'
+
+    def set_running(self, running: bool):
+        self.set_flag('running', 'true' if running else 'false')
+
+    def import_json(self, path: str) -> int:
+        """Однократный перенос задач из scheduler_data.json.
+
+        Маркер импорта вставляется в той же транзакции через ON CONFLICT
+        DO NOTHING, поэтому при одновременном старте импортирует один воркер.
+        """
+        session = self._session()
+        try:
+            insert = dialect_insert(session)
+            stmt = insert(SchedulerState).values(key='json_imported', value=datetime.utcnow().isoformat())
+            stmt = stmt.on_conflict_do_nothing(index_elements=['key']).returning(SchedulerState.key)
+            if session.execute(stmt).scalar() is None:
+                session.rollback()
+                return 0
+
+            imported = 0
+            if os.path.exists(path):
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                for job in data.get('jobs', {}).values():
+                    if job.get('id'):
+                        self._upsert_job(session, job, overwrite=False)
+                        imported += 1
+
+                running = 'true' if data.get('running') else 'false'
+                stmt = insert(SchedulerState).values(key='running', value=running)
+                session.execute(stmt.on_conflict_do_nothing(index_elements=['key']))
+
+            session.commit()
+            if imported:
+                print(f"📋 Перенесено {imported} задач планировщика из {path} в БД")
+            return imported
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    # --- аренды ---
+
+    def claim(self, job_id: str, run_id: str, ttl_seconds: float, due_only: bool = False,
+              due_within: float = 0) -> bool:
+        """Захватить аренду задачи.
+
+        Вставка проходит, если аренды нет, обновление — только если текущая
+        аренда просрочена. При due_only задача должна быть еще не выполнена
+        другим воркером (next_run не позже now + due_within), иначе аренда возвращается.
+        """
+        now = datetime.utcnow()
+        session = self._session()
+        try:
+            insert = dialect_insert(session)
+            stmt = insert(SchedulerLease).values(
+                job_id=job_id,
+                owner=self.owner,
+                run_id=run_id,
+                expires_at=now + timedelta(seconds=ttl_seconds)
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['job_id'],
+                set_={
+                    'owner': stmt.excluded.owner,
+                    'run_id': stmt.excluded.run_id,
+                    'expires_at': stmt.excluded.expires_at
+                },
+                where=SchedulerLease.expires_at < now
+            ).returning(SchedulerLease.run_id)
+
+            if session.execute(stmt).scalar() != run_id:
+                session.rollback()
+                return False
+
+            if due_only:
+                next_run = session.execute(
+                    select(SchedulerJob.next_run).where(
+                        SchedulerJob.id == job_id,
+                        SchedulerJob.status == 'active'
+                    )
+                ).scalar()
+                if next_run is None or next_run > datetime.now() + timedelta(seconds=due_within):
+                    session.rollback()
+                    return False
+
+            session.commit()
+            return True
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def renew(self, job_id: str, run_id: str, ttl_seconds: float) -> bool:
+        """Продлить свою аренду до now + ttl_seconds.
+
+        Если аренда уже истекла и ее никто не перехватил, она захватывается
+        заново; False — задачу за это время взял другой запуск.
+        """
+        session = self._session()
+        try:
+            renewed = session.query(SchedulerLease).filter(
+                SchedulerLease.job_id == job_id,
+                SchedulerLease.run_id == run_id
+            ).update(
+                {'expires_at': datetime.utcnow() + timedelta(seconds=ttl_seconds)},
+                synchronize_session=False
+            )
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+        return bool(renewed) or self.claim(job_id, run_id, ttl_seconds)
+
+    def release(self, job_id: str, run_id: str):
+        """Вернуть аренду (только свою)"""
+        session = self._session()
+        try:
+            session.execute(
+                delete(SchedulerLease).where(
+                    SchedulerLease.job_id == job_id,
+                    SchedulerLease.run_id == run_id
+                )
+            )
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def active_run_id(self, job_id: str) -> Optional[str]:
+        """run_id действующей аренды задачи"""
+        session = self._session()
+        try:
+            return session.execute(
+                select(SchedulerLease.run_id).where(
+                    SchedulerLease.job_id == job_id,
+                    SchedulerLease.expires_at >= datetime.utcnow()
+                )
+            ).scalar()
+        finally:
+            session.close()
+
+    def active_job_ids(self) -> Dict[str, str]:
+        """job_id -> run_id по всем действующим арендам"""
+        session = self._session()
+        try:
+            rows = session.execute(
+                select(SchedulerLease.job_id, SchedulerLease.run_id).where(
+                    SchedulerLease.expires_at >= datetime.utcnow()
+                )
+            ).all()
+            return {job_id: run_id for job_id, run_id in rows}
+        finally:
+            session.close()
+
+    # --- запуски ---
+
+    def create_run(self, run_id: str, job_id: str):
+        session = self._session()
+        try:
+            session.add(SchedulerRun(
+                run_id=run_id,
+                job_id=job_id,
+                owner=self.owner,
+                status='queued',
+                queued_at=datetime.utcnow()
+            ))
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def update_run(self, run_id: str, **fields):
+        if isinstance(fields.get('source_latency'), dict):
+            fields['source_latency'] = json.dumps(fields['source_latency'])
+
+        session = self._session()
+        try:
+            session.query(SchedulerRun).filter(SchedulerRun.run_id == run_id).update(
+                fields, synchronize_session=False
+            )
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def get_run(self, run_id: str) -> Optional[Dict]:
+        session = self._session()
+        try:
+            run = session.get(SchedulerRun, run_id)
+            return run.to_dict() if run else None
+        finally:
+            session.close()
+
+    def list_runs(self, job_id: str, limit: int = 50) -> List[Dict]:
+        """Последние запуски задачи, новые первыми"""
+        session = self._session()
+        try:
+            runs = session.execute(
+                select(SchedulerRun)
+                .where(SchedulerRun.job_id == job_id)
+                .order_by(SchedulerRun.queued_at.desc())
+                .limit(limit)
+            ).scalars().all()
+            return [run.to_dict() for run in runs]
+        finally:
+            session.close()
+
+    def prune_runs(self, job_id: str, keep: int, max_age_days: int):
+        """Хранение истории: не больше keep запусков на задачу и не старше max_age_days"""
+        session = self._session()
+        try:
+            cutoff = datetime.utcnow() - timedelta(days=max_age_days)
+            session.execute(delete(SchedulerRun).where(SchedulerRun.queued_at < cutoff))
+
+            boundary = session.execute(
+                select(SchedulerRun.queued_at)
+                .where(SchedulerRun.job_id == job_id)
+                .order_by(SchedulerRun.queued_at.desc())
+                .offset(keep - 1)
+                .limit(1)
+            ).scalar()
+            if boundary is not None:
+                session.execute(delete(SchedulerRun).where(
+                    SchedulerRun.job_id == job_id,
+                    SchedulerRun.queued_at < boundary
+                ))
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
@@ -0,0 +1,101 @@
+from collections import Counter
+from typing import Dict, List
+from sqlalchemy import func
+from database.models import Vacancy, VacancyStat, dialect_insert
+
+# Измерения, по которым ведутся агрегаты (total — общее количество)
+DIMENSIONS = ('source', 'company', 'location')
+
+
+def _count_vacancies(vacancies: List[Dict]) -> Counter:
+    """Подсчет вкладов вакансий в агрегаты"""
+    counts = Counter()
+    for vacancy in vacancies:
+        counts[('total', '')] += 1
+        for dimension in DIMENSIONS:
+            value = vacancy.get(dimension)
+            if value:
+                counts[(dimension, value)] += 1
+    return counts
+
+
+def apply_vacancy_delta(session, vacancies: List[Dict]):
+    """Инкрементальное обновление агрегатов новыми вакансиями, без commit"""
+    counts = _count_vacancies(vacancies)
+    if not counts:
+        return
+
+    insert = dialect_insert(session)
+    rows = [
+        {'dimension': dimension, 'value': value, 'count': count}
+        for (dimension, value), count in counts.items()
+    ]
+    stmt = insert(VacancyStat).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['dimension', 'value'],
+        set_={'count': VacancyStat.count + stmt.excluded.count}
+    )
+    session.execute(stmt)
+
+
+def reset_stats(session):
+    """Обнуление агрегатов (при очистке таблицы vacancies), без commit"""
+    session.query(VacancyStat).delete(synchronize_session=False)
+
+
+def rebuild_stats(session) -> int:
+    """Полный пересчет агрегатов по таблице vacancies, без commit"""
+    reset_stats(session)
+
+    total = session.query(func.count(Vacancy.id)).scalar() or 0
+    session.add(VacancyStat(dimension='total', value='', count=total))
+
+    for dimension in DIMENSIONS:
+        column = getattr(Vacancy, dimension)
+        grouped = session.query(column, func.count(Vacancy.id)).filter(
+            column.isnot(None),
+            column != ''
+        ).group_by(column).all()
+        session.add_all(
+            VacancyStat(dimension=dimension, value=value, count=count)
+            for value, count in grouped
+        )
+
+    session.flush()
+    return total
+
+
+def ensure_stats(session_factory):
+    """Первичное заполнение агрегатов для БД, созданной до их появления"""
+    session = session_factory()
+    try:
+        if session.get(VacancyStat, ('total', '')) is None:
+            total = rebuild_stats(session)
+            session.commit()
+            print(f"🛠️ Агрегаты статистики построены ({total} вакансий)")
+    except Exception as e:
+        session.rollback()
+        print(f"❌ Ошибка построения агрегатов статистики: {e}")
+    finally:
+        session.close()
+
+
+def read_stats(session, top: int = 10) -> Dict:
+    """Статистика из агрегатов: чтение не зависит от размера таблицы vacancies"""
+    total = session.get(VacancyStat, ('total', ''))
+
+    def top_values(dimension):
+        return session.query(VacancyStat.value, VacancyStat.count).filter(
+            VacancyStat.dimension == dimension
+        ).order_by(VacancyStat.count.desc()).limit(top).all()
+
+    by_source = session.query(VacancyStat.value, VacancyStat.count).filter(
+        VacancyStat.dimension == 'source'
+    ).all()
+
+    return {
+        'total_vacancies': total.count if total else 0,
+        'by_source': {value: count for value, count in by_source},
+        'top_companies': [{'name': value, 'count': count} for value, count in top_values('company')],
+        'top_locations': [{'name': value, 'count': count} for value, count in top_values('location')]
+    }
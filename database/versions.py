@@ -0,0 +1,31 @@
+from datetime import datetime
+from typing import Optional, Tuple
+from sqlalchemy import select
+from database.models import DataVersion, dialect_insert
+
+# Версия таблицы vacancies: растет при каждой записи новых вакансий и очистке
+VACANCIES = 'vacancies'
+
+
+def bump_data_version(session, name: str = VACANCIES):
+    """Увеличение версии данных в текущей транзакции, без commit"""
+    insert = dialect_insert(session)
+    stmt = insert(DataVersion).values(name=name, version=1, updated_at=datetime.utcnow())
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['name'],
+        set_={
+            'version': DataVersion.version + 1,
+            'updated_at': stmt.excluded.updated_at
+        }
+    )
+    session.execute(stmt)
+
+
+def get_data_version(session, name: str = VACANCIES) -> Tuple[int, Optional[datetime]]:
+    """Текущая версия данных и время последнего изменения (UTC)"""
+    row = session.execute(
+        select(DataVersion.version, DataVersion.updated_at).where(DataVersion.name == name)
+    ).first()
+    if row is None:
+        return 0, None
+    return row.version, row.updated_at
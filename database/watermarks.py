@@ -0,0 +1,58 @@
+import json
+from datetime import datetime
+from typing import List, Set
+from sqlalchemy import delete, select
+from database.models import CrawlWatermark, dialect_insert
+
+
+def _normalize(value: str) -> str:
+    """Регистр и лишние пробелы в запросе и городе не важны"""
+    return ' '.join((value or '').lower().split())
+
+
+def load_watermark(session, source: str, query: str, city: str = '') -> Set[str]:
+    """Ссылки, уже виденные прошлыми обходами (пустое множество, если обходов не было)"""
+    links = session.execute(
+        select(CrawlWatermark.links).where(
+            CrawlWatermark.source == source,
+            CrawlWatermark.query == _normalize(query),
+            CrawlWatermark.city == _normalize(city)
+        )
+    ).scalar()
+    return set(json.loads(links)) if links else set()
+
+
+def save_watermark(session, source: str, query: str, city: str, links: List[str], max_links: int = 500):
+    """Дополнение водяного знака ссылками текущего обхода, без commit.
+
+    Свежие ссылки идут первыми, хранится не больше max_links последних.
+    """
+    key = (source, _normalize(query), _normalize(city))
+    previous = session.execute(
+        select(CrawlWatermark.links).where(
+            CrawlWatermark.source == key[0],
+            CrawlWatermark.query == key[1],
+            CrawlWatermark.city == key[2]
+        )
+    ).scalar()
+
+    merged = list(dict.fromkeys(list(links) + (json.loads(previous) if previous else [])))[:max_links]
+
+    insert = dialect_insert(session)
+    stmt = insert(CrawlWatermark).values(
+        source=key[0],
+        query=key[1],
+        city=key[2],
+        links=json.dumps(merged, ensure_ascii=False),
+        crawled_at=datetime.utcnow()
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['source', 'query', 'city'],
+        set_={'links': stmt.excluded.links, 'crawled_at': stmt.excluded.crawled_at}
+    )
+    session.execute(stmt)
+
+
+def reset_watermarks(session):
+    """Удаление всех водяных знаков (после очистки вакансий обход снова полный), без commit"""
+    session.execute(delete(CrawlWatermark))
@@ -0,0 +1,195 @@
+import atexit
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List
+from database.ingest import ingest_vacancies
+
+
+class VacancyWriter:
+    """Единственный писатель в таблицу vacancies.
+
+    Парсеры кладут страницы вакансий в ограниченную очередь, фоновый поток
+    объединяет их в пакеты по размеру или по времени и пишет каждый пакет
+    одной транзакцией. Заполненная очередь блокирует парсеры (backpressure).
+    """
+
+    def __init__(self, session_factory=None, batch_size: int = 500, flush_interval: float = 0.5,
+                 max_pending: int = 100, put_timeout: float = 30):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stopped = False
+
+    def start(self):
+        """Запуск фонового потока записи"""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stopped = False
+            self._thread = threading.Thread(target=self._run, name='vacancy-writer', daemon=True)
+            self._thread.start()
+
+    def submit(self, vacancies: List[Dict], source: str) -> Future:
+        """Поставить страницу вакансий в очередь записи.
+
+        Возвращает Future с результатом ingest_vacancies. Если очередь
+        переполнена дольше put_timeout, выбрасывает queue.Full.
+        """
+        if self._stopped:
+            raise RuntimeError('Писатель вакансий остановлен')
+        self.start()
+
+        future = Future()
+        self._queue.put(('write', (vacancies, source), future), timeout=self.put_timeout)
+        return future
+
+    def flush(self, timeout: float = None) -> bool:
+        """Дождаться записи всего, что уже поставлено в очередь"""
+        if not self._thread or not self._thread.is_alive():
+            return True
+        future = Future()
+        self._queue.put(('flush', None, future), timeout=timeout)
+        return future.result(timeout=timeout)
+
+    def shutdown(self, timeout: float = 10):
+        """Записать остаток очереди и остановить поток"""
+        with self._lock:
+            if self._stopped:
+                return
+            self._stopped = True
+            thread = self._thread
+
+        if thread and thread.is_alive():
+            future = Future()
+            self._queue.put(('stop', None, future))
+            thread.join(timeout)
+
+    def pending(self) -> int:
+        """Количество страниц, ожидающих записи"""
+        return self._queue.qsize()
+
+    def _run(self):
+        """Основной цикл: собрать пакет, записать, подтвердить ожидающим"""
+        stop = False
+        while not stop:
+            kind, payload, future = self._queue.get()
+            batch, markers = [], []
+            rows = 0
+            deadline = time.monotonic() + self.flush_interval
+
+            while True:
+                if kind == 'write':
+                    batch.append((payload, future))
+                    rows += len(payload[0])
+                else:
+                    markers.append(future)
+                    stop = stop or kind == 'stop'
+                    break
+
+                remaining = deadline - time.monotonic()
+                if rows >= self.batch_size or remaining <= 0:
+                    break
+                try:
+                    kind, payload, future = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+
+            if batch:
+                self._write(batch)
+            for marker in markers:
+                marker.set_result(True)
+
+    def _session(self):
+        if self.session_factory:
+            return self.session_factory()
+        from database.models import Session
+        return Session()
+
+    def _write(self, batch):
+        """Запись пакета одной транзакцией, при ошибке — по одной странице.
+
+        Любая ошибка (в том числе при открытии сессии) завершает Future
+        страницы исключением: поток писателя не должен падать, иначе
+        ожидающие запись зависнут.
+        """
+        session = None
+        try:
+            session = self._session()
+            results = [ingest_vacancies(session, vacancies, source) for (vacancies, source), _ in batch]
+            session.commit()
+        except Exception as e:
+            if session is not None:
+                session.rollback()
+            print(f"❌ Ошибка пакетной записи вакансий: {e}")
+            results = None
+        finally:
+            if session is not None:
+                session.close()
+
+        if results is not None:
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+            self._notify(batch, results)
+            return
+
+        # Изолируем сбойную страницу, чтобы не потерять остальные
+        for (vacancies, source), future in batch:
+            session = None
+            try:
+                session = self._session()
+                result = ingest_vacancies(session, vacancies, source)
+                session.commit()
+            except Exception as e:
+                if session is not None:
+                    session.rollback()
+                future.set_exception(e)
+                continue
+            finally:
+                if session is not None:
+                    session.close()
+
+            future.set_result(result)
+            self._notify([((vacancies, source), future)], [result])
+
+    def _notify(self, batch, results):
+        """Событие для SSE-подписчиков о записанном пакете"""
+        new = sum(result['new'] for result in results)
+        if not new:
+            return
+
+        by_source = {}
+        for ((_, source), _), result in zip(batch, results):
+            by_source[source] = by_source.get(source, 0) + result['new']
+
+        from services.event_bus import publish
+        publish('vacancies_ingested', {
+            'new': new,
+            'duplicates': sum(result['duplicates'] for result in results),
+            'sources': by_source
+        })
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer() -> VacancyWriter:
+    """Общий для процесса писатель вакансий"""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = VacancyWriter(
+                    batch_size=int(os.getenv('WRITER_BATCH_SIZE', 500)),
+                    flush_interval=float(os.getenv('WRITER_FLUSH_INTERVAL', 0.5)),
+                    max_pending=int(os.getenv('WRITER_MAX_PENDING', 100))
+                )
+                atexit.register(_writer.shutdown)
+    return _writer
@@ -1,5 +1,5 @@
 from .base_parser import BaseParser
-from typing import List, Dict
+from typing import List, Dict, Optional
 
 
 class AvitoParser(BaseParser):
@@ -8,7 +8,8 @@ class AvitoParser(BaseParser):
     def __init__(self):
         super().__init__('avito')
 
-    def search(self, query: str, limit: int = 20, city: str = '') -> List[Dict]:
+    def search(self, query: str, limit: int = 20, city: str = '',
+               deadline: Optional[float] = None) -> List[Dict]:
         """Avito не работает через requests из-за блокировок"""
         print(f"🚫 Avito: Парсинг отключен")
         print(f"   Причина: Avito блокирует автоматические запросы (QRATOR)")
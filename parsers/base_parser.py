@@ -1,5 +1,12 @@
+import os
+import threading
+import time
 from abc import ABC, abstractmethod
-from typing import List, Dict
+from typing import Dict, Iterator, List, Optional, Set
+from .http_client import get_http_client
+
+# Инкрементальный обход останавливается после стольких уже известных ссылок подряд
+KNOWN_RUN_LIMIT = int(os.getenv('CRAWL_STOP_AFTER_SEEN', 10))
 
 
 class BaseParser(ABC):
@@ -7,47 +14,120 @@ class BaseParser(ABC):
 
     def __init__(self, source_name: str):
         self.source_name = source_name
+        self.http = get_http_client()
+        # fetch_stats обновляется и из потоков загрузки страниц
+        self._stats_lock = threading.Lock()
+        self.reset_ingest_stats()
 
     @abstractmethod
-    def search(self, query: str, limit: int = 20, city: str = '') -> List[Dict]:
-        """Поиск вакансий по запросу"""
+    def search(self, query: str, limit: int = 20, city: str = '',
+               deadline: Optional[float] = None) -> List[Dict]:
+        """Поиск вакансий по запросу (deadline — см. iter_pages)"""
         pass
 
-    def save_vacancy(self, vacancy_data: Dict) -> bool:
-        """Сохранение вакансии в базу данных"""
-        try:
-            from database.models import Vacancy, Session
+    def iter_pages(self, query: str, limit: int = 20, city: str = '',
+                   known_links: Optional[Set[str]] = None,
+                   deadline: Optional[float] = None) -> Iterator[List[Dict]]:
+        """Постраничный поиск: вакансии отдаются по мере загрузки страниц.
 
-            session = Session()
-            try:
-                # Проверяем, существует ли уже такая вакансия
-                existing = session.query(Vacancy).filter_by(
-                    link=vacancy_data['link']
-                ).first()
-
-                if existing:
-                    return False  # Вакансия уже существует
-
-                vacancy = Vacancy(
-                    title=vacancy_data['title'],
-                    link=vacancy_data['link'],
-                    company=vacancy_data.get('company', ''),
-                    salary=vacancy_data.get('salary', 'Не указана'),
-                    source=self.source_name
-                )
-
-                session.add(vacancy)
-                session.commit()
-                return True
+        known_links включает инкрементальный обход: выдача сортируется по дате,
+        и листание прекращается, как только reached_known() встретит серию
+        уже известных ссылок. deadline (по time.monotonic()) — момент, после
+        которого парсер сам прекращает листание, а таймаут HTTP-запросов
+        урезается до оставшегося времени (см. request_timeout).
+        Ошибка первой страницы пробрасывается вызывающему; если листание
+        оборвал дедлайн или не загрузилась одна из следующих страниц, после
+        обхода complete становится False (такой результат нельзя кешировать).
+        По умолчанию — одна страница с результатом search().
+        """
+        vacancies = self.search(query, limit=limit, city=city, deadline=deadline)
+        if vacancies:
+            yield vacancies
 
-            except Exception as e:
-                session.rollback()
-                print(f"Ошибка сохранения вакансии: {e}")
-                return False
-            finally:
-                session.close()
+    def collect_pages(self, pages: Iterator[List[Dict]]) -> List[Dict]:
+        """Все страницы генератора iter_pages одним списком"""
+        vacancies = []
+        for page in pages:
+            vacancies.extend(page)
+        return vacancies
+
+    def reached_known(self, vacancies: List[Dict], known_links: Optional[Set[str]]) -> bool:
+        """Встретилась ли серия из KNOWN_RUN_LIMIT уже известных ссылок подряд (с учетом прошлых страниц)"""
+        if not known_links:
+            return False
+
+        for vacancy in vacancies:
+            if vacancy.get('link') in known_links:
+                self._known_run += 1
+                if self._known_run >= KNOWN_RUN_LIMIT:
+                    return True
+            else:
+                self._known_run = 0
+        return False
+
+    @staticmethod
+    def deadline_passed(deadline: Optional[float]) -> bool:
+        """Истек ли дедлайн опроса (None — дедлайна нет)"""
+        return deadline is not None and time.monotonic() >= deadline
+
+    def request_timeout(self, deadline: Optional[float], default: float = 10) -> float:
+        """Таймаут HTTP-запроса, не выходящий за дедлайн опроса"""
+        if deadline is None:
+            return default
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError(f'{self.source_name}: истекло время опроса источника')
+        return min(default, remaining)
+
+    def http_get(self, url: str, **kwargs):
+        """GET-запрос через общий пул соединений"""
+        self._count_fetch('http_requests')
+        return self.http.get(url, **kwargs)
+
+    def _count_fetch(self, key: str):
+        """Увеличение счетчика загрузки (+= над словарем из нескольких потоков не атомарен)"""
+        with self._stats_lock:
+            self.fetch_stats[key] += 1
 
+    def reset_ingest_stats(self):
+        """Сброс счетчиков сохранения и загрузки перед новым поиском"""
+        self.ingest_stats = {'new': 0, 'duplicates': 0, 'errors': 0}
+        self.fetch_stats = {'pages': 0, 'http_requests': 0}
+        self.complete = True
+        self._pending_writes = []
+        self._known_run = 0
+
+    def queue_vacancies(self, vacancies: List[Dict]):
+        """Передача страницы вакансий единому писателю БД без ожидания записи"""
+        if not vacancies:
+            return
+
+        self._count_fetch('pages')
+
+        try:
+            from database.writer import get_writer
         except ImportError:
-            # Если модели БД недоступны (например, в тестах), просто возвращаем True
-            print(f"База данных недоступна, пропускаем сохранение: {vacancy_data['title']}")
-            return True
\ No newline at end of file
+            # Если модели БД недоступны (например, в тестах), пропускаем сохранение
+            print(f"База данных недоступна, пропускаем сохранение {len(vacancies)} вакансий")
+            self.ingest_stats['new'] += len(vacancies)
+            return
+
+        try:
+            future = get_writer().submit(vacancies, self.source_name)
+            self._pending_writes.append((future, len(vacancies)))
+        except Exception as e:
+            print(f"Ошибка постановки вакансий в очередь записи: {e}")
+            self.ingest_stats['errors'] += len(vacancies)
+
+    def collect_ingest_stats(self, timeout: float = 60) -> Dict:
+        """Ожидание записи поставленных страниц и подсчет новых/дубликатов"""
+        pending, self._pending_writes = self._pending_writes, []
+        for future, count in pending:
+            try:
+                result = future.result(timeout=timeout)
+                self.ingest_stats['new'] += result['new']
+                self.ingest_stats['duplicates'] += result['duplicates']
+            except Exception as e:
+                print(f"Ошибка сохранения вакансий: {e}")
+                self.ingest_stats['errors'] += count
+        return dict(self.ingest_stats)
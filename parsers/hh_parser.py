@@ -1,8 +1,18 @@
-import requests
+import math
+import os
+import re
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from bs4 import BeautifulSoup
 from .base_parser import BaseParser
-from typing import List, Dict
-import time
+from typing import Dict, Iterator, List, Optional, Set
+
+# Пул для параллельной загрузки страниц выдачи HH.ru (частоту ограничивает общий rate limiter)
+PAGE_WORKERS = int(os.getenv('HH_PAGE_WORKERS', 3))
+_page_executor = ThreadPoolExecutor(max_workers=PAGE_WORKERS, thread_name_prefix='hh-page')
+
+# "Найдено 1 234 вакансии" в заголовке выдачи (разряды разделены обычными или узкими пробелами)
+TOTAL_RE = re.compile(r'[Нн]айден\w*\s+(\d[\d\s\u00a0\u202f]*)')
 
 
 class HHParser(BaseParser):
@@ -11,58 +21,174 @@ class HHParser(BaseParser):
     def __init__(self):
         super().__init__('hh')
         self.base_url = 'https://hh.ru'
+        self.max_per_page = 50
+        self.max_results = 2000
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
 
-    def search(self, query: str, limit: int = 20, city: str = '') -> List[Dict]:
+    def search(self, query: str, limit: int = 20, city: str = '',
+               deadline: Optional[float] = None) -> List[Dict]:
         """Поиск вакансий на HH.ru с фильтром по городу"""
+        return self.collect_pages(self.iter_pages(query, limit=limit, city=city, deadline=deadline))
+
+    def iter_pages(self, query: str, limit: int = 20, city: str = '',
+                   known_links: Optional[Set[str]] = None,
+                   deadline: Optional[float] = None) -> Iterator[List[Dict]]:
+        """Поиск на HH.ru постранично.
+
+        Первая страница дает общее число найденных вакансий, по нему планируются
+        остальные страницы. Они скачиваются параллельно (в рамках общего лимита
+        частоты запросов к hh.ru), а разбор каждой идет, пока следующие еще грузятся.
+        known_links — инкрементальный обход, deadline — дедлайн опроса (см. BaseParser.iter_pages).
+        """
         print(f"🔍 Поиск на HH.ru: {query}" + (f" в городе {city}" if city else ""))
-        vacancies = []
+        found = 0
+        self.reset_ingest_stats()
+
+        per_page = min(limit, self.max_per_page)
+        if city:
+            params = {'text': f"{query} {city}", 'per_page': per_page}
+            print(f"📍 Поиск с городом: '{query} {city}'")
+        else:
+            params = {'text': query, 'per_page': per_page}
+            print(f"🌍 Поиск без города: '{query}'")
+
+        if known_links is not None:
+            # Инкрементальный обход: новые вакансии первыми
+            params['order_by'] = 'publication_time'
 
         try:
-            # Формируем URL для поиска
-            search_url = f'{self.base_url}/search/vacancy'
-            params = {
-                'text': query,
-                'per_page': min(limit, 50)
-            }
-
-            if city:
-                params['text'] = f"{query} {city}"
-                print(f"📍 Поиск с городом: '{query} {city}'")
-            else:
-                params['text'] = query
-                print(f"🌍 Поиск без города: '{query}'")
-
-            response = requests.get(search_url, headers=self.headers, params=params, timeout=10)
-            response.raise_for_status()
-
-            soup = BeautifulSoup(response.text, 'html.parser')
-
-            # Ищем контейнеры с вакансиями
-            vacancy_items = soup.find_all('div', {'data-qa': 'vacancy-serp__vacancy'})
-
-            for item in vacancy_items[:limit]:
-                try:
-                    vacancy_data = self._parse_vacancy_item(item)
-                    if vacancy_data:
-                        vacancies.append(vacancy_data)
-                        self.save_vacancy(vacancy_data)
-
-                except Exception as e:
-                    print(f"Ошибка парсинга вакансии HH: {e}")
-                    continue
-
-                # Небольшая задержка между запросами
-                time.sleep(0.3)
+            soup = BeautifulSoup(self._fetch_page(params, 0, deadline), 'html.parser')
+            cards = self._find_cards(soup)
+            vacancies = self._parse_page(cards, limit)
+
+            # Передаем страницу писателю, не дожидаясь коммита
+            self.queue_vacancies(vacancies)
+            found += len(vacancies)
+            if vacancies:
+                yield vacancies
+
+            # Листание планируется по числу карточек первой страницы, а не разобранных
+            # вакансий: битая карточка не делает страницу последней, а hh.ru может
+            # отдавать меньше карточек, чем запрошено в per_page
+            page_size = len(cards)
+            more = limit > page_size > 0 and not self.reached_known(vacancies, known_links)
+            pages = self._plan_pages(soup, page_size, per_page, limit) if more else 1
+            available = self._plan_pages(soup, page_size, per_page, self.max_results) if more else 1
+
+            # Вперед запрашивается не больше PAGE_WORKERS страниц, чтобы остановка
+            # на известных вакансиях не оставляла за собой лишних запросов
+            prefetched = deque()
+            next_page = 1
+            try:
+                while found < limit:
+                    if self.deadline_passed(deadline):
+                        print("⏱️ HH.ru: время опроса истекло, листание остановлено")
+                        self.complete = False
+                        break
+                    if not prefetched and next_page == pages < available:
+                        # Из-за битых карточек запланированных страниц не хватило до limit
+                        pages += 1
+                    while next_page < pages and len(prefetched) < PAGE_WORKERS:
+                        prefetched.append((next_page, _page_executor.submit(self._fetch_page, params, next_page, deadline)))
+                        next_page += 1
+                    if not prefetched:
+                        break
+
+                    page, future = prefetched.popleft()
+                    try:
+                        cards = self._find_cards(BeautifulSoup(future.result(), 'html.parser'))
+                    except Exception as e:
+                        print(f"Ошибка загрузки страницы {page} HH.ru: {e}")
+                        self.complete = False
+                        continue
+
+                    if not cards:
+                        break
+                    vacancies = self._parse_page(cards, limit - found)
+                    if not vacancies:
+                        continue
+                    self.queue_vacancies(vacancies)
+                    found += len(vacancies)
+                    yield vacancies
+
+                    if self.reached_known(vacancies, known_links):
+                        break
+            finally:
+                for _, future in prefetched:
+                    future.cancel()
 
         except Exception as e:
+            # Ошибка до первых результатов — это сбой опроса, а не пустая выдача
             print(f"Ошибка поиска на HH.ru: {e}")
-
-        print(f"✅ HH.ru: найдено {len(vacancies)} вакансий")
+            raise
+
+        self.collect_ingest_stats()
+
+        print(f"✅ HH.ru: найдено {found} вакансий "
+              f"(новых: {self.ingest_stats['new']}, дубликатов: {self.ingest_stats['duplicates']})")
+
+    def _fetch_page(self, params: Dict, page: int, deadline: Optional[float] = None) -> str:
+        """HTML страницы выдачи (нумерация с 0)"""
+        response = self.http_get(
+            f'{self.base_url}/search/vacancy',
+            headers=self.headers,
+            params=dict(params, page=page) if page else params,
+            timeout=self.request_timeout(deadline)
+        )
+        response.raise_for_status()
+        return response.text
+
+    @staticmethod
+    def _find_cards(soup) -> List:
+        """Карточки вакансий страницы выдачи, включая те, что не удастся разобрать"""
+        return soup.find_all('div', {'data-qa': 'vacancy-serp__vacancy'})
+
+    def _parse_page(self, cards: List, limit: int) -> List[Dict]:
+        """Вакансии из карточек страницы выдачи (не больше limit)"""
+        vacancies = []
+        for item in cards[:limit]:
+            try:
+                vacancy_data = self._parse_vacancy_item(item)
+                if vacancy_data:
+                    vacancies.append(vacancy_data)
+
+            except Exception as e:
+                print(f"Ошибка парсинга вакансии HH: {e}")
+                continue
         return vacancies
 
+    def _plan_pages(self, soup, page_size: int, per_page: int, limit: int) -> int:
+        """Сколько страниц нужно скачать для limit вакансий.
+
+        page_size — число карточек на первой странице (фактический размер страницы).
+        Число найденных вакансий берется из заголовка выдачи, если его нет —
+        из последнего номера в пагинаторе, а без них неполная первая страница
+        считается последней. HH.ru отдает не глубже max_results.
+        """
+        wanted = min(limit, self.max_results)
+        total = self._parse_total(soup)
+        if total is not None:
+            wanted = min(wanted, total)
+        else:
+            pager = [int(a.text) for a in soup.find_all('a', {'data-qa': 'pager-page'}) if a.text.strip().isdigit()]
+            if pager:
+                wanted = min(wanted, max(pager) * page_size)
+            elif page_size < per_page:
+                wanted = page_size
+        return max(1, math.ceil(wanted / page_size))
+
+    @staticmethod
+    def _parse_total(soup) -> Optional[int]:
+        """Общее число найденных вакансий из заголовка выдачи"""
+        for qa in ('vacancies-total-found', 'bloko-header-section-3', 'title'):
+            tag = soup.find(attrs={'data-qa': qa})
+            match = TOTAL_RE.search(tag.text) if tag else None
+            if match:
+                return int(re.sub(r'\D', '', match.group(1)))
+        return None
+
     def _parse_vacancy_item(self, item) -> Dict:
         """Парсинг отдельной вакансии"""
         # Название и ссылка
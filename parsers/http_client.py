@@ -0,0 +1,93 @@
+import os
+import threading
+from typing import Dict
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .rate_limiter import RateLimiter, get_rate_limiter
+
+
+class HttpClient:
+    """Общий HTTP-клиент парсеров: пул keep-alive соединений и повторы с backoff"""
+
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+    def __init__(self, pool_size: int = 10, max_retries: int = 3, backoff_factor: float = 0.5,
+                 rate_limiter: RateLimiter = None):
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.rate_limiter = rate_limiter
+        self._sessions: Dict[str, requests.Session] = {}
+        self._lock = threading.Lock()
+
+    def _create_session(self) -> requests.Session:
+        """Создание сессии с пулом соединений и политикой повторов"""
+        retry = Retry(
+            total=self.max_retries,
+            connect=self.max_retries,
+            read=self.max_retries,
+            status=self.max_retries,
+            backoff_factor=self.backoff_factor,
+            status_forcelist=self.RETRY_STATUSES,
+            allowed_methods=frozenset(['GET', 'HEAD']),
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self.pool_size,
+            max_retries=retry
+        )
+
+        session = requests.Session()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def session_for(self, url: str) -> requests.Session:
+        """Постоянная сессия для хоста из URL"""
+        host = urlsplit(url).netloc.lower()
+        session = self._sessions.get(host)
+        if session is None:
+            with self._lock:
+                session = self._sessions.get(host)
+                if session is None:
+                    session = self._create_session()
+                    self._sessions[host] = session
+        return session
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """GET-запрос через сессию хоста с учетом лимита частоты"""
+        if self.rate_limiter:
+            self.rate_limiter.acquire(urlsplit(url).netloc)
+        return self.session_for(url).get(url, **kwargs)
+
+    def close(self):
+        """Закрытие всех сессий"""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_http_client() -> HttpClient:
+    """Общий для процесса HTTP-клиент"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = HttpClient(
+                    pool_size=int(os.getenv('HTTP_POOL_SIZE', 10)),
+                    max_retries=int(os.getenv('HTTP_MAX_RETRIES', 3)),
+                    backoff_factor=float(os.getenv('HTTP_BACKOFF_FACTOR', 0.5)),
+                    rate_limiter=get_rate_limiter()
+                )
+    return _client
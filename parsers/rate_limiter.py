@@ -0,0 +1,95 @@
+import os
+import threading
+import time
+from typing import Dict, Tuple
+
+
+class TokenBucket:
+    """Потокобезопасный token bucket: rate токенов в секунду, запас до capacity"""
+
+    def __init__(self, rate: float, capacity: float, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self._updated = now
+
+    def reserve(self, tokens: float = 1) -> float:
+        """Резервирование токенов, возвращает время ожидания в секундах"""
+        with self._lock:
+            self._refill(self._clock())
+            self.tokens -= tokens
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def acquire(self, tokens: float = 1) -> float:
+        """Блокирующее получение токенов, возвращает фактическое ожидание"""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+
+class RateLimiter:
+    """Набор token bucket'ов по хостам, общий для всех потоков"""
+
+    def __init__(self, default_rate: float = 3.0, default_burst: float = 5.0,
+                 limits: Dict[str, Tuple[float, float]] = None):
+        self.default_rate = default_rate
+        self.default_burst = default_burst
+        self.limits = dict(limits or {})
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def bucket_for(self, host: str) -> TokenBucket:
+        """Bucket для хоста (создается при первом обращении)"""
+        host = host.lower()
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            with self._lock:
+                bucket = self._buckets.get(host)
+                if bucket is None:
+                    rate, burst = self.limits.get(host, (self.default_rate, self.default_burst))
+                    bucket = TokenBucket(rate, burst)
+                    self._buckets[host] = bucket
+        return bucket
+
+    def acquire(self, host: str) -> float:
+        """Дождаться разрешения на один запрос к хосту"""
+        return self.bucket_for(host).acquire()
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Общий для процесса ограничитель частоты запросов"""
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = RateLimiter(
+                    default_rate=float(os.getenv('PARSER_RATE_LIMIT', 3)),
+                    default_burst=float(os.getenv('PARSER_RATE_BURST', 5)),
+                    limits={
+                        'hh.ru': (
+                            float(os.getenv('HH_RATE_LIMIT', 2)),
+                            float(os.getenv('HH_RATE_BURST', 4))
+                        ),
+                        'api.superjob.ru': (
+                            float(os.getenv('SUPERJOB_RATE_LIMIT', 2)),
+                            float(os.getenv('SUPERJOB_RATE_BURST', 4))
+                        )
+                    }
+                )
+    return _limiter
@@ -1,8 +1,32 @@
-import requests
-from .base_parser import BaseParser
-from typing import List, Dict
+import math
 import os
-import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from .base_parser import BaseParser
+from typing import Dict, Iterator, List, Optional, Set
+
+# Пул для упреждающей загрузки страниц SuperJob API
+_page_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('SUPERJOB_PAGE_WORKERS', 4)),
+    thread_name_prefix='sj-page'
+)
+
+# Сколько запросов с одним ключом API может выполняться одновременно
+KEY_CONCURRENCY = max(1, int(os.getenv('SUPERJOB_MAX_CONCURRENCY', 2)))
+
+_key_semaphores = {}
+_key_semaphores_lock = threading.Lock()
+
+
+def _key_semaphore(secret_key: str) -> threading.BoundedSemaphore:
+    """Общий для процесса семафор ключа API"""
+    with _key_semaphores_lock:
+        semaphore = _key_semaphores.get(secret_key)
+        if semaphore is None:
+            semaphore = threading.BoundedSemaphore(KEY_CONCURRENCY)
+            _key_semaphores[secret_key] = semaphore
+        return semaphore
 
 
 class SuperJobParser(BaseParser):
@@ -11,6 +35,8 @@ class SuperJobParser(BaseParser):
     def __init__(self):
         super().__init__('superjob')
         self.api_url = 'https://api.superjob.ru/2.0/vacancies'
+        self.max_per_page = 100
+        self.max_results = 500
         self.secret_key = os.getenv(
             'SUPERJOB_SECRET',
             'v3.r.137222938.adcc1bf5602cc5a2c697d63eb9c580dd5029f96f.049aae965267ebe71bbc7c587187da62cdbc560e'
@@ -20,69 +46,128 @@ class SuperJobParser(BaseParser):
             'Content-Type': 'application/x-www-form-urlencoded'
         }
 
-    def search(self, query: str, limit: int = 20, city: str = '') -> List[Dict]:
+    def search(self, query: str, limit: int = 20, city: str = '',
+               deadline: Optional[float] = None) -> List[Dict]:
         """Поиск вакансий через SuperJob API с фильтром по городу"""
+        return self.collect_pages(self.iter_pages(query, limit=limit, city=city, deadline=deadline))
+
+    def iter_pages(self, query: str, limit: int = 20, city: str = '',
+                   known_links: Optional[Set[str]] = None,
+                   deadline: Optional[float] = None) -> Iterator[List[Dict]]:
+        """Поиск через SuperJob API постранично.
+
+        По total из первого ответа планируется набор страниц, и следующие
+        страницы запрашиваются заранее, пока текущая разбирается и уходит
+        писателю. Одновременных запросов с одним ключом API не больше
+        SUPERJOB_MAX_CONCURRENCY (общий семафор на ключ).
+        known_links — инкрементальный обход, deadline — дедлайн опроса (см. BaseParser.iter_pages).
+        """
         print(f"🔍 Поиск в SuperJob: {query}" + (f" в городе {city}" if city else ""))
-        vacancies = []
-        page = 0
-        per_page = min(20, limit)
+        found = 0
+        self.reset_ingest_stats()
+        per_page = min(self.max_per_page, limit)
+
+        if city:
+            params = {'keyword': f"{query} {city}", 'count': per_page}
+            print(f"📍 Поиск с городом: '{query} {city}'")
+        else:
+            params = {'keyword': query, 'count': per_page}
+            print(f"🌍 Поиск без города: '{query}'")
+
+        if known_links is not None:
+            # Инкрементальный обход: новые вакансии первыми
+            params.update({'order_field': 'date', 'order_direction': 'desc'})
 
         try:
-            while len(vacancies) < limit:
-                params = {
-                    'keyword': query,
-                    'page': page,
-                    'count': per_page
-                }
-
-                # ДОБАВИТЬ ОБРАБОТКУ ГОРОДА:
-                if city:
-                    params['keyword'] = f"{query} {city}"
-                    print(f"📍 Поиск с городом: '{query} {city}'")
-                else:
-                    params['keyword'] = query
-                    print(f"🌍 Поиск без города: '{query}'")
-
-                # Остальной код остается без изменений
-                response = requests.get(
-                    self.api_url,
-                    headers=self.headers,
-                    params=params,
-                    timeout=10
-                )
-                response.raise_for_status()
-
-                data = response.json()
-                objects = data.get('objects', [])
-
-                if not objects:
-                    break
-
-                for obj in objects:
-                    if len(vacancies) >= limit:
+            data = self._fetch_page(params, 0, deadline)
+            page_vacancies = self._parse_page(data, limit)
+
+            # Передаем страницу писателю и сразу идем за следующей
+            found += len(page_vacancies)
+            self.queue_vacancies(page_vacancies)
+            if page_vacancies:
+                yield page_vacancies
+
+            more = data.get('more') and not self.reached_known(page_vacancies, known_links)
+            pages = self._plan_pages(data.get('total'), per_page, limit) if more else 1
+            prefetched = deque()
+            next_page = 1
+            try:
+                while found < limit:
+                    if self.deadline_passed(deadline):
+                        print("⏱️ SuperJob: время опроса истекло, листание остановлено")
+                        self.complete = False
+                        break
+                    while next_page < pages and len(prefetched) < KEY_CONCURRENCY:
+                        prefetched.append((next_page, _page_executor.submit(self._fetch_page, params, next_page, deadline)))
+                        next_page += 1
+                    if not prefetched:
                         break
 
+                    page, future = prefetched.popleft()
                     try:
-                        vacancy_data = self._parse_vacancy_object(obj)
-                        if vacancy_data:
-                            vacancies.append(vacancy_data)
-                            self.save_vacancy(vacancy_data)
-
+                        data = future.result()
+                        page_vacancies = self._parse_page(data, limit - found)
                     except Exception as e:
-                        print(f"Ошибка парсинга вакансии SuperJob: {e}")
+                        print(f"Ошибка загрузки страницы {page} SuperJob: {e}")
+                        self.complete = False
                         continue
 
-                if not data.get('more', False):
-                    break
+                    if not page_vacancies:
+                        break
 
-                page += 1
-                time.sleep(0.5)  # Задержка между запросами
+                    found += len(page_vacancies)
+                    self.queue_vacancies(page_vacancies)
+                    yield page_vacancies
+
+                    if not data.get('more', False) or self.reached_known(page_vacancies, known_links):
+                        break
+            finally:
+                for _, future in prefetched:
+                    future.cancel()
 
         except Exception as e:
+            # Ошибка до первых результатов — это сбой опроса, а не пустая выдача
             print(f"Ошибка поиска в SuperJob: {e}")
-
-        print(f"✅ SuperJob: найдено {len(vacancies)} вакансий")
-        return vacancies
+            raise
+
+        self.collect_ingest_stats()
+
+        print(f"✅ SuperJob: найдено {found} вакансий "
+              f"(новых: {self.ingest_stats['new']}, дубликатов: {self.ingest_stats['duplicates']})")
+
+    def _fetch_page(self, params: Dict, page: int, deadline: Optional[float] = None) -> Dict:
+        """Ответ API для страницы page (нумерация с 0)"""
+        with _key_semaphore(self.secret_key):
+            response = self.http_get(
+                self.api_url,
+                headers=self.headers,
+                params=dict(params, page=page),
+                timeout=self.request_timeout(deadline)
+            )
+        response.raise_for_status()
+        return response.json()
+
+    def _parse_page(self, data: Dict, limit: int) -> List[Dict]:
+        """Вакансии из ответа API (не больше limit)"""
+        page_vacancies = []
+        for obj in data.get('objects', [])[:limit]:
+            try:
+                vacancy_data = self._parse_vacancy_object(obj)
+                if vacancy_data:
+                    page_vacancies.append(vacancy_data)
+
+            except Exception as e:
+                print(f"Ошибка парсинга вакансии SuperJob: {e}")
+                continue
+        return page_vacancies
+
+    def _plan_pages(self, total, per_page: int, limit: int) -> int:
+        """Сколько страниц нужно для limit вакансий (API отдает не глубже max_results)"""
+        wanted = min(limit, self.max_results)
+        if isinstance(total, int):
+            wanted = min(wanted, total)
+        return max(1, math.ceil(wanted / per_page))
 
     def _parse_vacancy_object(self, obj: Dict) -> Dict:
         """Парсинг объекта вакансии из API"""
@@ -1,7 +1,14 @@
-from flask import Blueprint, jsonify, request, session
+import json
+import os
+import time
+from flask import Blueprint, Response, jsonify, request, session, stream_with_context
 from services.search_service import SearchService
 from services.vacancy_service import VacancyService
 from services.stats_service import StatsService
+from services.event_bus import get_event_bus, format_sse
+from services.search_cache import get_search_cache
+from utils.http_cache import conditional_on_data_version
+from database.versions import VACANCIES, get_data_version
 
 api_bp = Blueprint('api', __name__, url_prefix='/api')
 
@@ -11,6 +18,17 @@ def check_auth():
     return 'user' in session
 
 
+# Ответы read-API зависят только от версии данных vacancies
+conditional_get = conditional_on_data_version(check=check_auth)
+
+# Период heartbeat в потоке событий, секунды
+EVENTS_HEARTBEAT = float(os.getenv('EVENTS_HEARTBEAT', '15'))
+
+# Сколько живет одно SSE-соединение, секунды: поток сервера не занят вкладкой
+# навсегда, а EventSource сам переподключается с Last-Event-ID
+EVENTS_MAX_AGE = float(os.getenv('EVENTS_MAX_AGE', '300'))
+
+
 @api_bp.route('/search', methods=['POST'])
 def api_search():
     """API поиска вакансий"""
@@ -42,6 +60,7 @@ def api_search():
 
 
 @api_bp.route('/vacancies')
+@conditional_get
 def api_vacancies():
     """API получения вакансий с пагинацией"""
     if not check_auth():
@@ -54,6 +73,26 @@ def api_vacancies():
         company = request.args.get('company', '')
 
         vacancy_service = VacancyService()
+
+        # Курсорный режим: ?mode=cursor или ?cursor=<значение>
+        if request.args.get('mode') == 'cursor' or 'cursor' in request.args:
+            try:
+                result = vacancy_service.get_vacancies_by_cursor(
+                    cursor=request.args.get('cursor', ''),
+                    per_page=per_page,
+                    source=source,
+                    company=company,
+                    direction=request.args.get('direction', 'next'),
+                    include_total=request.args.get('include_total') in ('1', 'true')
+                )
+            except ValueError as e:
+                return jsonify({'success': False, 'error': str(e)}), 400
+
+            return jsonify({
+                'success': True,
+                'data': result
+            })
+
         result = vacancy_service.get_vacancies_paginated(
             page=page,
             per_page=per_page,
@@ -73,7 +112,44 @@ def api_vacancies():
         }), 500
 
 
+@api_bp.route('/vacancies/search')
+@conditional_get
+def api_vacancies_search():
+    """API полнотекстового поиска по сохраненным вакансиям"""
+    if not check_auth():
+        return jsonify({'error': 'Необходима авторизация'}), 401
+
+    try:
+        query = request.args.get('q', '').strip()
+        page = max(int(request.args.get('page', 1)), 1)
+        per_page = min(max(int(request.args.get('per_page', 10)), 1), 100)
+        source = request.args.get('source', '')
+
+        if not query:
+            return jsonify({'error': 'Не указан поисковый запрос'}), 400
+
+        vacancy_service = VacancyService()
+        result = vacancy_service.search_vacancies(
+            query,
+            page=page,
+            per_page=per_page,
+            source=source
+        )
+
+        return jsonify({
+            'success': True,
+            'data': result
+        })
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
 @api_bp.route('/stats')
+@conditional_get
 def api_stats():
     """API получения статистики"""
     if not check_auth():
@@ -95,6 +171,51 @@ def api_stats():
         }), 500
 
 
+@api_bp.route('/search/stream', methods=['POST'])
+def api_search_stream():
+    """Потоковый поиск: вакансии в формате NDJSON по мере загрузки страниц"""
+    if not check_auth():
+        return jsonify({'error': 'Необходима авторизация'}), 401
+
+    data = request.get_json() or {}
+    query = data.get('query', '')
+    city = data.get('city', '')
+    try:
+        limit = int(data.get('limit', 50))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Некорректный limit'}), 400
+
+    if not query:
+        return jsonify({'error': 'Не указан поисковый запрос'}), 400
+
+    search_service = SearchService()
+
+    def stream():
+        try:
+            for record in search_service.stream(query, city, limit):
+                yield json.dumps(record, ensure_ascii=False, default=str) + '\n'
+        except Exception as e:
+            yield json.dumps({'type': 'error', 'error': str(e)}, ensure_ascii=False) + '\n'
+
+    return Response(
+        stream_with_context(stream()),
+        mimetype='application/x-ndjson',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+@api_bp.route('/search/cache')
+def api_search_cache():
+    """Счетчики кеша поиска (попадания, промахи, размер)"""
+    if not check_auth():
+        return jsonify({'error': 'Необходима авторизация'}), 401
+
+    return jsonify({
+        'success': True,
+        'cache': get_search_cache().get_stats()
+    })
+
+
 @api_bp.route('/health')
 def api_health():
     """Проверка состояния API"""
@@ -129,4 +250,71 @@ def api_clear_vacancies():
         return jsonify({
             'success': False,
             'error': str(e)
-        }), 500
\ No newline at end of file
+        }), 500
+
+
+def _vacancies_version() -> int:
+    from database.models import Session
+    db_session = Session()
+    try:
+        return get_data_version(db_session, VACANCIES)[0]
+    finally:
+        db_session.close()
+
+
+@api_bp.route('/events')
+def api_events():
+    """Поток событий (Server-Sent Events): загрузка вакансий, запуски задач, прогресс поиска.
+
+    Шина событий своя у каждого процесса, поэтому на heartbeat дополнительно
+    сверяется версия данных vacancies: изменение, сделанное другим воркером,
+    приходит клиенту событием data_version. Если пропущенное по Last-Event-ID
+    восстановить нельзя (id прошлого процесса или другого воркера), data_version
+    отправляется сразу, и клиент перечитывает данные целиком.
+    Соединение закрывается через EVENTS_MAX_AGE секунд, клиент переподключается
+    и добирает пропущенное из истории шины.
+    """
+    if not check_auth():
+        return jsonify({'error': 'Необходима авторизация'}), 401
+
+    last_event_id = request.headers.get('Last-Event-ID', '').strip()
+
+    bus = get_event_bus()
+    subscription = bus.subscribe()
+
+    def stream():
+        try:
+            yield "retry: 5000\n\n"
+            version = _vacancies_version()
+            if last_event_id:
+                missed = bus.replay(last_event_id)
+                if missed is None:
+                    # id переводит клиента в эпоху этой шины: следующее переподключение добирает историю
+                    yield f"id: {bus.last_event_id()}\nevent: data_version\ndata: {{\"version\": {version}}}\n\n"
+                else:
+                    for event in missed:
+                        yield format_sse(event)
+
+            closes_at = time.monotonic() + EVENTS_MAX_AGE
+            while True:
+                remaining = closes_at - time.monotonic()
+                if remaining <= 0:
+                    return
+                event = subscription.get(timeout=min(EVENTS_HEARTBEAT, remaining))
+                if event is not None:
+                    yield format_sse(event)
+                    continue
+
+                yield ": heartbeat\n\n"
+                current = _vacancies_version()
+                if current != version:
+                    version = current
+                    yield f"event: data_version\ndata: {{\"version\": {version}}}\n\n"
+        finally:
+            subscription.close()
+
+    return Response(
+        stream_with_context(stream()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
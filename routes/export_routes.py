@@ -1,5 +1,6 @@
-from flask import Blueprint, Response, session, redirect, url_for, flash
+from flask import Blueprint, Response, session, redirect, url_for, flash, stream_with_context
 from services.export_service import ExportService
+from utils.http_cache import conditional_on_data_version
 
 export_bp = Blueprint('export', __name__, url_prefix='/export')
 
@@ -9,7 +10,11 @@ def check_auth():
     return 'user' in session
 
 
+conditional_get = conditional_on_data_version(check=check_auth)
+
+
 @export_bp.route('/csv')
+@conditional_get
 def export_csv():
     """Экспорт в CSV"""
     if not check_auth():
@@ -18,10 +23,10 @@ def export_csv():
 
     try:
         export_service = ExportService()
-        csv_data = export_service.export_to_csv()
 
+        # Отдаем файл по частям по мере чтения из БД
         return Response(
-            csv_data,
+            stream_with_context(export_service.stream_csv()),
             mimetype='text/csv; charset=utf-8',
             headers={
                 'Content-Disposition': 'attachment; filename=vacancies.csv',
@@ -34,6 +39,7 @@ def export_csv():
 
 
 @export_bp.route('/text')
+@conditional_get
 def export_text():
     """Экспорт в текст"""
     if not check_auth():
@@ -42,10 +48,10 @@ def export_text():
 
     try:
         export_service = ExportService()
-        text_data = export_service.export_to_text()
 
+        # Отдаем файл по частям по мере чтения из БД
         return Response(
-            text_data,
+            stream_with_context(export_service.stream_text()),
             mimetype='text/plain; charset=utf-8',
             headers={
                 'Content-Disposition': 'attachment; filename=vacancies.txt',
@@ -1,5 +1,5 @@
-from flask import Blueprint, jsonify, request, session
-from services.scheduler_service import SchedulerService
+from flask import Blueprint, current_app, jsonify, request, session
+from services.scheduler_service import get_scheduler_service
 
 scheduler_bp = Blueprint('scheduler', __name__, url_prefix='/api/scheduler')
 
@@ -14,6 +14,11 @@ def check_admin():
     return session.get('role') == 'admin'
 
 
+def get_scheduler():
+    """Планировщик приложения (создается один раз в create_app)"""
+    return current_app.extensions.get('scheduler_service') or get_scheduler_service()
+
+
 @scheduler_bp.route('/status')
 def get_status():
     """Получение статуса планировщика"""
@@ -21,7 +26,7 @@ def get_status():
         return jsonify({'error': 'Необходима авторизация'}), 401
 
     try:
-        scheduler_service = SchedulerService()
+        scheduler_service = get_scheduler()
         status = scheduler_service.get_status()
 
         return jsonify({
@@ -52,7 +57,7 @@ def start_scheduler():
         return jsonify({'error': 'Необходимы права администратора'}), 403
 
     try:
-        scheduler_service = SchedulerService()
+        scheduler_service = get_scheduler()
         result = scheduler_service.start()
 
         return jsonify({
@@ -79,7 +84,7 @@ def stop_scheduler():
         return jsonify({'error': 'Необходимы права администратора'}), 403
 
     try:
-        scheduler_service = SchedulerService()
+        scheduler_service = get_scheduler()
         result = scheduler_service.stop()
 
         return jsonify({
@@ -110,6 +115,8 @@ def add_search_job():
         city = data.get('city', '').strip()
         limit = int(data.get('limit', 20))
         run_immediately = data.get('run_immediately', False)
+        adaptive = bool(data.get('adaptive', False))
+        incremental = bool(data.get('incremental', True))
 
         if not keywords:
             return jsonify({
@@ -123,13 +130,15 @@ def add_search_job():
                 'error': 'Минимальный интервал: 1 минута'
             }), 400
 
-        scheduler_service = SchedulerService()
+        scheduler_service = get_scheduler()
         job_id = scheduler_service.add_search_job(
             keywords=keywords,
             interval_minutes=interval_minutes,
             city=city,
             limit=limit,
-            run_immediately=run_immediately
+            run_immediately=run_immediately,
+            adaptive=adaptive,
+            incremental=incremental
         )
 
         return jsonify({
@@ -153,7 +162,7 @@ def remove_job(job_id):
         return jsonify({'error': 'Необходима авторизация'}), 401
 
     try:
-        scheduler_service = SchedulerService()
+        scheduler_service = get_scheduler()
         result = scheduler_service.remove_job(job_id)
 
         return jsonify({
@@ -177,14 +186,30 @@ def run_job_now(job_id):
         return jsonify({'error': 'Необходима авторизация'}), 401
 
     try:
-        scheduler_service = SchedulerService()
+        scheduler_service = get_scheduler()
         result = scheduler_service.run_job_now(job_id)
 
+        if result['status'] == 'not_found':
+            return jsonify({
+                'success': False,
+                'error': result['message']
+            }), 404
+
+        if result['status'] == 'not_due':
+            # Аренду только что отпустил другой воркер, выполнивший задачу
+            return jsonify({
+                'success': False,
+                'error': result['message']
+            }), 409
+
+        # Задача выполняется в пуле, прогресс доступен по run_id
         return jsonify({
             'success': True,
-            'message': f'Задача {job_id} запущена',
+            'message': result['message'],
+            'run_id': result['run_id'],
+            'already_running': result['status'] == 'already_running',
             'result': result
-        })
+        }), 202
 
     except Exception as e:
         print(f"❌ Ошибка запуска задачи {job_id}: {e}")
@@ -194,6 +219,60 @@ def run_job_now(job_id):
         }), 500
 
 
+@scheduler_bp.route('/runs/<run_id>')
+def get_run(run_id):
+    """Статус запуска задачи"""
+    if not check_auth():
+        return jsonify({'error': 'Необходима авторизация'}), 401
+
+    scheduler_service = get_scheduler()
+    run = scheduler_service.get_run(run_id)
+
+    if not run:
+        return jsonify({
+            'success': False,
+            'error': f'Запуск {run_id} не найден'
+        }), 404
+
+    return jsonify({
+        'success': True,
+        'run': run
+    })
+
+
+@scheduler_bp.route('/jobs/<job_id>/runs')
+def get_job_runs(job_id):
+    """История запусков задачи и перцентили"""
+    if not check_auth():
+        return jsonify({'error': 'Необходима авторизация'}), 401
+
+    try:
+        limit = min(max(int(request.args.get('limit', 50)), 1), 500)
+
+        scheduler_service = get_scheduler()
+        history = scheduler_service.get_job_runs(job_id, limit=limit)
+
+        return jsonify({
+            'success': True,
+            'job_id': job_id,
+            'runs': history['runs'],
+            'summary': history['summary']
+        })
+
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'error': 'Некорректный параметр limit'
+        }), 400
+
+    except Exception as e:
+        print(f"❌ Ошибка получения истории задачи {job_id}: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
 @scheduler_bp.route('/clear-all-jobs', methods=['DELETE'])
 def clear_all_jobs():
     """Очистка всех задач"""
@@ -204,7 +283,7 @@ def clear_all_jobs():
         return jsonify({'error': 'Необходимы права администратора'}), 403
 
     try:
-        scheduler_service = SchedulerService()
+        scheduler_service = get_scheduler()
         result = scheduler_service.clear_all_jobs()
 
         return jsonify({
@@ -228,7 +307,7 @@ def get_jobs():
         return jsonify({'error': 'Необходима авторизация'}), 401
 
     try:
-        scheduler_service = SchedulerService()
+        scheduler_service = get_scheduler()
         jobs = scheduler_service.get_all_jobs()
 
         return jsonify({
@@ -3,6 +3,7 @@ import time
 from datetime import datetime, timedelta
 from typing import Callable, Dict, Any
 import logging
+from .timer_queue import TimerQueue
 
 logger = logging.getLogger(__name__)
 
@@ -13,6 +14,7 @@ class SimpleScheduler:
         self.jobs = {}
         self.running = False
         self.thread = None
+        self.timers = TimerQueue()
 
     def start(self):
         """Запуск планировщика"""
@@ -27,6 +29,7 @@ class SimpleScheduler:
     def stop(self):
         """Остановка планировщика"""
         self.running = False
+        self.timers.wake()
         if self.thread:
             self.thread.join()
         print("🕐 Планировщик остановлен")
@@ -46,6 +49,7 @@ class SimpleScheduler:
             'last_run': None,
             'run_count': 0
         }
+        self.timers.schedule(job_id, next_run.timestamp())
 
         print(f"📋 Добавлена задача '{job_id}' с интервалом {interval_minutes} мин")
 
@@ -62,16 +66,15 @@ class SimpleScheduler:
         return status
 
     def _run(self):
-        """Основной цикл планировщика"""
+        """Основной цикл планировщика: спим до ближайшей задачи"""
         while self.running:
             try:
-                current_time = datetime.now()
+                job_id = self.timers.wait_next()
+                if job_id is None or job_id not in self.jobs:
+                    continue
 
-                for job_id, job in list(self.jobs.items()):
-                    if current_time >= job['next_run']:
-                        self._execute_job(job_id, job)
-
-                time.sleep(10)  # Проверяем каждые 10 секунд
+                self._execute_job(job_id, self.jobs[job_id])
+                self.timers.schedule(job_id, self.jobs[job_id]['next_run'].timestamp())
 
             except Exception as e:
                 print(f"❌ Ошибка в планировщике: {e}")
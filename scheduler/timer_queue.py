@@ -0,0 +1,98 @@
+import heapq
+import itertools
+import threading
+import time
+from typing import Hashable, Optional
+
+
+class TimerQueue:
+    """Очередь таймеров на приоритетной куче (по времени следующего запуска).
+
+    Поток-потребитель спит ровно до ближайшего срока; schedule/cancel/wake
+    будят его через condition variable, чтобы он пересчитал ожидание.
+    """
+
+    def __init__(self, clock=time.time):
+        self._clock = clock
+        self._heap = []  # (due, seq, key)
+        self._entries = {}  # key -> (due, seq) актуальная запись
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._woken = False
+
+    def schedule(self, key: Hashable, due: float):
+        """Запланировать (или перепланировать) таймер key на время due"""
+        with self._cond:
+            seq = next(self._seq)
+            self._entries[key] = (due, seq)
+            heapq.heappush(self._heap, (due, seq, key))
+            self._cond.notify()
+
+    def cancel(self, key: Hashable) -> bool:
+        """Отменить таймер; устаревшая запись в куче будет пропущена"""
+        with self._cond:
+            removed = self._entries.pop(key, None) is not None
+            if removed:
+                self._cond.notify()
+            return removed
+
+    def clear(self):
+        """Удалить все таймеры"""
+        with self._cond:
+            self._heap.clear()
+            self._entries.clear()
+            self._cond.notify()
+
+    def next_due(self, key: Hashable) -> Optional[float]:
+        """Время срабатывания таймера key или None"""
+        with self._cond:
+            entry = self._entries.get(key)
+            return entry[0] if entry else None
+
+    def keys(self):
+        """Ключи запланированных таймеров"""
+        with self._cond:
+            return list(self._entries)
+
+    def wake(self):
+        """Прервать текущее ожидание wait_next (например, при остановке)"""
+        with self._cond:
+            self._woken = True
+            self._cond.notify_all()
+
+    def __len__(self):
+        with self._cond:
+            return len(self._entries)
+
+    def _discard_stale(self):
+        while self._heap:
+            due, seq, key = self._heap[0]
+            if self._entries.get(key) == (due, seq):
+                return
+            heapq.heappop(self._heap)
+
+    def wait_next(self, timeout: float = None) -> Optional[Hashable]:
+        """Дождаться ближайшего таймера и вернуть его ключ.
+
+        Возвращает None, если ожидание прервано wake() или истек timeout.
+        """
+        deadline = None if timeout is None else self._clock() + timeout
+        with self._cond:
+            while True:
+                if self._woken:
+                    self._woken = False
+                    return None
+
+                self._discard_stale()
+                now = self._clock()
+                if self._heap and self._heap[0][0] <= now:
+                    _, _, key = heapq.heappop(self._heap)
+                    del self._entries[key]
+                    return key
+
+                wait = self._heap[0][0] - now if self._heap else None
+                if deadline is not None:
+                    if now >= deadline:
+                        return None
+                    wait = deadline - now if wait is None else min(wait, deadline - now)
+                self._cond.wait(wait)
@@ -0,0 +1,142 @@
+import itertools
+import json
+import queue
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Dict, List, Optional
+
+
+class Subscription:
+    """Очередь событий одного подписчика (одной вкладки с EventSource)"""
+
+    def __init__(self, bus: 'EventBus', max_queue: int):
+        self._bus = bus
+        self._queue = queue.Queue(maxsize=max_queue)
+        self.dropped = 0
+
+    def _offer(self, event: Dict):
+        """Не блокируем публикацию: при переполнении выбрасываем старейшее событие"""
+        while True:
+            try:
+                self._queue.put_nowait(event)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout: float = None) -> Optional[Dict]:
+        """Следующее событие или None по таймауту"""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self._bus.unsubscribe(self)
+
+
+class EventBus:
+    """Шина событий процесса для SSE (/api/events).
+
+    Публикация неблокирующая и дешевая: событие раскладывается по очередям
+    подписчиков и кладется в кольцевой буфер истории, из которого
+    переподключившийся клиент добирает пропущенное по Last-Event-ID.
+    Id события — "<эпоха>-<номер>": эпоха своя у каждой шины (процесса),
+    так что id от прошлого запуска или другого воркера не спутать со своим.
+    """
+
+    def __init__(self, max_queue: int = 100, history: int = 200, epoch: str = None):
+        self.max_queue = max_queue
+        self.epoch = epoch or uuid.uuid4().hex[:8]
+        self._ids = itertools.count(1)
+        self._last_seq = 0
+        self._history = deque(maxlen=history)
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def publish(self, event_type: str, data: Dict = None) -> Dict:
+        """Опубликовать событие всем подписчикам"""
+        with self._lock:
+            self._last_seq = next(self._ids)
+            event = {
+                'id': f"{self.epoch}-{self._last_seq}",
+                'seq': self._last_seq,
+                'type': event_type,
+                'time': time.time(),
+                'data': data or {}
+            }
+            self._history.append(event)
+            subscribers = list(self._subscribers)
+
+        for subscription in subscribers:
+            subscription._offer(event)
+        return event
+
+    def subscribe(self) -> Subscription:
+        subscription = Subscription(self, self.max_queue)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def subscribers_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+    def last_event_id(self) -> str:
+        """Id последнего опубликованного события (для событий вне истории)"""
+        with self._lock:
+            return f"{self.epoch}-{self._last_seq}"
+
+    def replay(self, last_event_id: str) -> Optional[List[Dict]]:
+        """События из истории, опубликованные после last_event_id.
+
+        None — пропущенное восстановить нельзя: id другой эпохи (клиент был
+        подключен к прошлому процессу или другому воркеру) или часть событий
+        уже вытеснена из истории. Клиенту нужна полная пересинхронизация.
+        """
+        epoch, _, seq = (last_event_id or '').rpartition('-')
+        if epoch != self.epoch or not seq.isdigit():
+            return None
+
+        seq = int(seq)
+        with self._lock:
+            if self._history and seq < self._history[0]['seq'] - 1:
+                return None
+            return [event for event in self._history if event['seq'] > seq]
+
+
+def format_sse(event: Dict) -> str:
+    """Событие в формате text/event-stream"""
+    payload = json.dumps(event['data'], ensure_ascii=False, default=str)
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {payload}\n\n"
+
+
+_event_bus = None
+_event_bus_lock = threading.Lock()
+
+
+def get_event_bus() -> EventBus:
+    """Общая для процесса шина событий"""
+    global _event_bus
+    if _event_bus is None:
+        with _event_bus_lock:
+            if _event_bus is None:
+                _event_bus = EventBus()
+    return _event_bus
+
+
+def publish(event_type: str, data: Dict = None):
+    """Публикация без риска для вызывающего кода: ошибки шины только логируются"""
+    try:
+        get_event_bus().publish(event_type, data)
+    except Exception as e:
+        print(f"❌ Ошибка публикации события {event_type}: {e}")
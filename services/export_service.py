@@ -1,22 +1,44 @@
+import os
 from database.models import Vacancy, Session
 from utils.export import ExportUtils
 
+# Размер пакета строк, читаемых из БД за раз
+EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', 1000))
+
 
 class ExportService:
-    def export_to_csv(self):
-        """Экспорт в CSV"""
-        session = Session()
-        try:
-            vacancies = session.query(Vacancy).all()
-            return ExportUtils.to_csv(vacancies)
-        finally:
-            session.close()
+    def _iter_rows(self):
+        """Только экспортируемые колонки, чтение пакетами по ключу (id > последнего прочитанного).
+
+        На каждый пакет — своя короткая сессия: пока клиент медленно скачивает
+        файл, транзакция чтения SQLite не остается открытой и не блокирует
+        запись новых вакансий.
+        """
+        last_id = 0
+        while True:
+            session = Session()
+            try:
+                rows = session.query(
+                    Vacancy.id,
+                    Vacancy.title,
+                    Vacancy.company,
+                    Vacancy.salary,
+                    Vacancy.source,
+                    Vacancy.link,
+                    Vacancy.created_at
+                ).filter(Vacancy.id > last_id).order_by(Vacancy.id).limit(EXPORT_BATCH_SIZE).all()
+            finally:
+                session.close()
+
+            yield from rows
+            if len(rows) < EXPORT_BATCH_SIZE:
+                return
+            last_id = rows[-1].id
+
+    def stream_csv(self):
+        """Потоковый экспорт в CSV"""
+        return ExportUtils.iter_csv(self._iter_rows())
 
-    def export_to_text(self):
-        """Экспорт в текст"""
-        session = Session()
-        try:
-            vacancies = session.query(Vacancy).all()
-            return ExportUtils.to_text(vacancies)
-        finally:
-            session.close()
\ No newline at end of file
+    def stream_text(self):
+        """Потоковый экспорт в текст"""
+        return ExportUtils.iter_text(self._iter_rows())
@@ -1,92 +1,184 @@
-import json
+import math
 import os
+import random
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
-from threading import Thread
+from threading import Thread, Lock, RLock
 import uuid
+from database.scheduler_store import SchedulerStore
+from services.event_bus import publish
+from scheduler.timer_queue import TimerQueue
+from services.search_coalescer import SearchCoalescer
 from services.search_service import SearchService
 
+# Пул исполнителей задач: долгая задача не задерживает остальные
+_job_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('SCHEDULER_MAX_WORKERS', 2)),
+    thread_name_prefix='scheduler-job'
+)
+
+# Таймаут выполнения задачи по умолчанию, минуты
+JOB_TIMEOUT_MINUTES = int(os.getenv('SCHEDULER_JOB_TIMEOUT', 30))
+
+# Как часто воркер перечитывает задачи и флаг running из БД, секунды
+SYNC_INTERVAL = float(os.getenv('SCHEDULER_SYNC_INTERVAL', 30))
+
+# Запас аренды сверх таймаута задачи, секунды
+LEASE_MARGIN = 60
+
+# Окно, в котором задачи с общими (ключевое слово, город) делят один запрос, секунды
+COALESCE_WINDOW = float(os.getenv('SCHEDULER_COALESCE_WINDOW', 300))
+_coalescer = SearchCoalescer(window=COALESCE_WINDOW)
+
+# История запусков: сколько хранить на задачу и сколько дней
+RUN_HISTORY_LIMIT = int(os.getenv('SCHEDULER_RUN_HISTORY', 200))
+RUN_HISTORY_DAYS = int(os.getenv('SCHEDULER_RUN_HISTORY_DAYS', 30))
+RUN_METRICS = ('found', 'pages', 'http_requests', 'new', 'duplicates', 'errors', 'source_latency')
+
+# Адаптивный интервал: границы по умолчанию (минуты), порог доли новых вакансий и джиттер
+ADAPTIVE_MIN_MINUTES = int(os.getenv('SCHEDULER_ADAPTIVE_MIN', 15))
+ADAPTIVE_MAX_MINUTES = int(os.getenv('SCHEDULER_ADAPTIVE_MAX', 1440))
+ADAPTIVE_HIGH_YIELD = float(os.getenv('SCHEDULER_ADAPTIVE_HIGH_YIELD', 0.3))
+ADAPTIVE_JITTER = float(os.getenv('SCHEDULER_ADAPTIVE_JITTER', 0.1))
+
+
+def _percentiles(values: List[float]) -> Dict:
+    """p50/p90/p99 методом ближайшего ранга"""
+    if not values:
+        return {'p50': None, 'p90': None, 'p99': None}
+
+    ordered = sorted(values)
+    return {
+        f'p{int(q * 100)}': ordered[max(math.ceil(q * len(ordered)) - 1, 0)]
+        for q in (0.5, 0.9, 0.99)
+    }
+
 
 class SchedulerService:
-    """Сервис для управления планировщиком задач"""
+    """Сервис для управления планировщиком задач.
+
+    Состояние хранится в БД (SchedulerStore) и общее для всех воркеров;
+    в памяти держится копия для быстрых ответов API и очередь таймеров.
+    """
 
-    def __init__(self):
-        self.scheduler_file = 'scheduler_data.json'
+    def __init__(self, store: SchedulerStore = None, scheduler_file: str = 'scheduler_data.json'):
+        self.scheduler_file = scheduler_file
+        self.store = store or SchedulerStore()
         self.is_running = False
         self.jobs = {}
+        self.timers = TimerQueue()
+        self._lock = RLock()
+        self._loop_thread = None
+        self._loop_generation = 0
+        self._last_sync = 0.0
+
+        # Задачи из старого JSON-файла переносятся в БД один раз
+        try:
+            self.store.import_json(self.scheduler_file)
+        except Exception as e:
+            print(f"❌ Ошибка переноса задач из {self.scheduler_file}: {e}")
+
         self.load_data()
 
     def load_data(self):
-        """Загрузка данных планировщика из файла"""
+        """Загрузка данных планировщика из БД"""
         try:
-            if os.path.exists(self.scheduler_file):
-                with open(self.scheduler_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    self.is_running = data.get('running', False)
-                    self.jobs = data.get('jobs', {})
-                    print(f"📋 Загружено {len(self.jobs)} задач планировщика")
-            else:
-                self.save_data()
-                print("📋 Создан новый файл планировщика")
+            jobs = self.store.load_jobs()
+            running = self.store.is_running()
+            with self._lock:
+                self.jobs = jobs
+                self.is_running = running
+            self._last_sync = time.monotonic()
+            print(f"📋 Загружено {len(jobs)} задач планировщика")
         except Exception as e:
             print(f"❌ Ошибка загрузки данных планировщика: {e}")
-            self.is_running = False
-            self.jobs = {}
 
-    def save_data(self):
-        """Сохранение данных планировщика в файл"""
-        try:
-            data = {
-                'running': self.is_running,
-                'jobs': self.jobs,
-                'last_update': datetime.now().isoformat()
-            }
+    def refresh(self):
+        """Синхронизация с БД: задачи и флаг running, измененные другими воркерами"""
+        self.load_data()
 
-            with open(self.scheduler_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+        with self._lock:
+            jobs = list(self.jobs.values())
+            known = set(self.jobs)
 
-        except Exception as e:
-            print(f"❌ Ошибка сохранения данных планировщика: {e}")
+        for job in jobs:
+            self._schedule_job(job)
+        for job_id in set(self.timers.keys()) - known:
+            self.timers.cancel(job_id)
+
+    def _publish_changed(self):
+        """Событие об изменении состояния планировщика (для SSE)"""
+        publish('scheduler_changed', {'running': self.is_running, 'jobs_count': len(self.jobs)})
 
     def get_status(self) -> Dict:
         """Получение статуса планировщика"""
         return {
             'running': self.is_running,
-            'jobs': self.jobs,
+            'jobs': self._job_views(),
             'jobs_count': len(self.jobs),
             'last_check': datetime.now().isoformat()
         }
 
     def start(self) -> Dict:
         """Запуск планировщика"""
-        if self.is_running:
+        if self.is_running and self._loop_thread and self._loop_thread.is_alive():
             return {'status': 'already_running', 'message': 'Планировщик уже запущен'}
 
+        self.store.set_running(True)
         self.is_running = True
-        self.save_data()
-
-        # Запускаем планировщик в отдельном потоке
-        scheduler_thread = Thread(target=self._scheduler_loop, daemon=True)
-        scheduler_thread.start()
+        self.resume()
 
+        self._publish_changed()
         print("🟢 Планировщик запущен")
         return {'status': 'started', 'message': 'Планировщик успешно запущен'}
 
+    def resume(self):
+        """Поднять цикл воркера (один на экземпляр).
+
+        Цикл работает и при остановленном планировщике: он периодически
+        перечитывает БД и начинает выполнять задачи, когда планировщик
+        запустят из любого воркера.
+        """
+        with self._lock:
+            # Заполняем очередь таймеров сроками активных задач
+            for job in self.jobs.values():
+                self._schedule_job(job)
+
+            if self._loop_thread and self._loop_thread.is_alive():
+                self.timers.wake()
+                return
+
+            self._loop_generation += 1
+            self._loop_thread = Thread(
+                target=self._scheduler_loop,
+                args=(self._loop_generation,),
+                name='scheduler-loop',
+                daemon=True
+            )
+            self._loop_thread.start()
+
     def stop(self) -> Dict:
         """Остановка планировщика"""
         if not self.is_running:
             return {'status': 'already_stopped', 'message': 'Планировщик уже остановлен'}
 
+        self.store.set_running(False)
         self.is_running = False
-        self.save_data()
+        self.timers.wake()
 
+        self._publish_changed()
         print("🔴 Планировщик остановлен")
         return {'status': 'stopped', 'message': 'Планировщик остановлен'}
 
     def add_search_job(self, keywords: str, interval_minutes: int,
-                       city: str = '', limit: int = 20, run_immediately: bool = False) -> str:
-        """Добавление задачи автопоиска"""
+                       city: str = '', limit: int = 20, run_immediately: bool = False,
+                       adaptive: bool = False, incremental: bool = True) -> str:
+        """Добавление задачи автопоиска.
+
+        incremental — листать выдачу только до уже известных вакансий (водяной знак обхода).
+        """
         job_id = f"search_{uuid.uuid4().hex[:8]}"
 
         # Парсим ключевые слова
@@ -107,12 +199,22 @@ class SchedulerService:
             'last_run': 'Никогда',
             'run_count': 0,
             'created': datetime.now().isoformat(),
-            'status': 'active'
+            'status': 'active',
+            'incremental': incremental
         }
 
-        self.jobs[job_id] = job
-        self.save_data()
+        if adaptive:
+            job['adaptive'] = True
+            job['min_interval_minutes'] = min(ADAPTIVE_MIN_MINUTES, interval_minutes)
+            job['max_interval_minutes'] = max(ADAPTIVE_MAX_MINUTES, interval_minutes)
+            job['current_interval_minutes'] = interval_minutes
+
+        self.store.save_job(job)
+        with self._lock:
+            self.jobs[job_id] = job
+        self._schedule_job(job)
 
+        self._publish_changed()
         print(f"➕ Добавлена задача автопоиска: {job_id}")
 
         # Запускаем сразу, если нужно
@@ -123,88 +225,328 @@ class SchedulerService:
 
     def remove_job(self, job_id: str) -> Dict:
         """Удаление задачи"""
-        if job_id not in self.jobs:
+        if job_id not in self.jobs and not self.store.load_job(job_id):
             return {'status': 'not_found', 'message': f'Задача {job_id} не найдена'}
 
-        del self.jobs[job_id]
-        self.save_data()
+        self.store.delete_job(job_id)
+        with self._lock:
+            self.jobs.pop(job_id, None)
+        self.timers.cancel(job_id)
 
+        self._publish_changed()
         print(f"🗑️ Удалена задача: {job_id}")
         return {'status': 'removed', 'message': f'Задача {job_id} удалена'}
 
-    def run_job_now(self, job_id: str) -> Dict:
-        """Запуск задачи немедленно"""
-        if job_id not in self.jobs:
+    def run_job_now(self, job_id: str, due_only: bool = False, due_within: float = 0) -> Dict:
+        """Постановка задачи в пул исполнителей, возвращает run_id без ожидания.
+
+        Перед запуском захватывается аренда задачи в БД, поэтому одну задачу
+        одновременно выполняет только один воркер. due_only используется
+        циклом планировщика: задача, уже выполненная другим воркером, пропускается.
+        """
+        job = self.jobs.get(job_id) or self.store.load_job(job_id)
+        if not job:
             return {'status': 'not_found', 'message': f'Задача {job_id} не найдена'}
 
-        job = self.jobs[job_id]
+        with self._lock:
+            self.jobs.setdefault(job_id, job)
+
+        run_id = f"run_{uuid.uuid4().hex[:12]}"
+        timeout_minutes = job.get('timeout_minutes') or JOB_TIMEOUT_MINUTES
+        if not self.store.claim(job_id, run_id, timeout_minutes * 60 + LEASE_MARGIN,
+                                due_only=due_only, due_within=due_within):
+            active_run_id = self.store.active_run_id(job_id)
+            if active_run_id:
+                return {
+                    'status': 'already_running',
+                    'run_id': active_run_id,
+                    'message': f'Задача {job_id} уже выполняется'
+                }
+            return {'status': 'not_due', 'message': f'Задача {job_id} уже выполнена другим воркером'}
+
+        self.store.create_run(run_id, job_id)
+
+        print(f"🏃‍♂️ Запуск задачи: {job_id} ({run_id})")
+        _job_executor.submit(self._run_job, job_id, run_id)
+
+        return {'status': 'started', 'run_id': run_id, 'message': f'Задача {job_id} запущена'}
+
+    def get_run(self, run_id: str) -> Optional[Dict]:
+        """Состояние запуска задачи"""
+        return self.store.get_run(run_id)
+
+    def get_job_runs(self, job_id: str, limit: int = 50) -> Dict:
+        """История запусков задачи со сводкой перцентилей"""
+        runs = self.store.list_runs(job_id, limit)
+        finished = [run for run in runs if run['finished_at']]
+
+        durations = [run['duration_ms'] for run in finished if run['duration_ms'] is not None]
+        latencies = {}
+        for run in finished:
+            for name, value in run['source_latency'].items():
+                latencies.setdefault(name, []).append(value)
+
+        summary = {
+            'runs': len(finished),
+            'success_rate': round(
+                sum(1 for run in finished if run['status'] == 'success') / len(finished), 3
+            ) if finished else None,
+            'duration_ms': _percentiles(durations),
+            'source_latency_ms': {name: _percentiles(values) for name, values in latencies.items()},
+            'new': _percentiles([run['new'] for run in finished]),
+            'duplicates': _percentiles([run['duplicates'] for run in finished]),
+            'http_requests': _percentiles([run['http_requests'] for run in finished]),
+            'errors_total': sum(run['errors'] for run in finished)
+        }
+        return {'job_id': job_id, 'runs': runs, 'summary': summary}
+
+    def is_job_running(self, job_id: str) -> bool:
+        """Выполняется ли задача прямо сейчас (на любом воркере)"""
+        return self.store.active_run_id(job_id) is not None
+
+    def _update_run(self, run_id: str, **fields):
+        try:
+            self.store.update_run(run_id, **fields)
+        except Exception as e:
+            print(f"❌ Ошибка обновления запуска {run_id}: {e}")
+
+    def _run_job(self, job_id: str, run_id: str):
+        """Выполнение задачи в потоке пула"""
+        job = self.jobs.get(job_id)
+        timeout_minutes = (job or {}).get('timeout_minutes') or JOB_TIMEOUT_MINUTES
+
+        # Аренда взята при постановке в очередь; пока запуск ждал свободного
+        # исполнителя, она могла истечь. Продлеваем ее на время выполнения,
+        # а если задачу уже перехватил другой воркер — не выполняем повторно
+        try:
+            leased = self.store.renew(job_id, run_id, timeout_minutes * 60 + LEASE_MARGIN)
+        except Exception as e:
+            print(f"❌ Ошибка продления аренды {job_id}: {e}")
+            leased = False
+        if not leased:
+            print(f"⚠️ Запуск {run_id} пропущен: аренду задачи {job_id} перехватил другой воркер")
+            self._update_run(run_id, status='error', error='Аренда задачи перехвачена другим воркером',
+                             finished_at=datetime.utcnow())
+            return
+
+        started = time.monotonic()
+        status, result = 'error', {}
+        self._update_run(run_id, status='running', started_at=datetime.utcnow())
+        publish('job_started', {'job_id': job_id, 'run_id': run_id})
 
         try:
-            print(f"🏃‍♂️ Запуск задачи: {job_id}")
+            if not job:
+                raise KeyError(f'Задача {job_id} не найдена')
+
+            deadline = time.monotonic() + timeout_minutes * 60
 
+            result = {'found': 0, 'new': 0, 'timed_out': False}
             if job['type'] == 'search':
-                self._execute_search_job(job)
+                result = self._execute_search_job(job, deadline=deadline)
 
             # Обновляем информацию о запуске
             job['last_run'] = datetime.now().isoformat()
             job['run_count'] = job.get('run_count', 0) + 1
 
             # Планируем следующий запуск
-            next_run = datetime.now() + timedelta(minutes=job['interval_minutes'])
+            next_run = datetime.now() + timedelta(minutes=self._next_interval(job, result))
             job['next_run'] = next_run.isoformat()
 
-            self.save_data()
-
-            return {'status': 'executed', 'message': f'Задача {job_id} выполнена'}
+            status = 'timeout' if result['timed_out'] else 'success'
+            self._update_run(
+                run_id,
+                status=status,
+                **{field: result[field] for field in RUN_METRICS if field in result}
+            )
 
         except Exception as e:
             print(f"❌ Ошибка выполнения задачи {job_id}: {e}")
-            return {'status': 'error', 'message': str(e)}
+            self._update_run(run_id, status='error', error=str(e))
+
+            # Повторная попытка через 10 минут
+            if job:
+                job['next_run'] = (datetime.now() + timedelta(minutes=10)).isoformat()
+
+        finally:
+            self._update_run(
+                run_id,
+                finished_at=datetime.utcnow(),
+                duration_ms=int((time.monotonic() - started) * 1000)
+            )
+            try:
+                self.store.prune_runs(job_id, RUN_HISTORY_LIMIT, RUN_HISTORY_DAYS)
+            except Exception as e:
+                print(f"❌ Ошибка очистки истории запусков {job_id}: {e}")
+
+            # Новый next_run сохраняется до возврата аренды
+            if job and job_id in self.jobs:
+                try:
+                    self.store.save_job(job)
+                except Exception as e:
+                    print(f"❌ Ошибка сохранения задачи {job_id}: {e}")
+                self._schedule_job(job)
+
+            try:
+                self.store.release(job_id, run_id)
+            except Exception as e:
+                print(f"❌ Ошибка освобождения аренды {job_id}: {e}")
+
+            publish('job_finished', {
+                'job_id': job_id,
+                'run_id': run_id,
+                'status': status,
+                'found': result.get('found', 0),
+                'new': result.get('new', 0),
+                'next_run': job.get('next_run') if job else None
+            })
+
+    @staticmethod
+    def _next_interval(job: Dict, result: Dict) -> float:
+        """Интервал до следующего запуска, минуты.
+
+        Для адаптивных задач интервал сокращается вдвое (до нижней границы),
+        если доля новых вакансий высокая, и удваивается (до верхней), если
+        новых не было. Джиттер разводит задачи, чтобы они не срабатывали разом.
+        """
+        if not job.get('adaptive'):
+            return job['interval_minutes']
+
+        current = job.get('current_interval_minutes') or job['interval_minutes']
+        limit = max(job.get('limit', 1), 1)
+        new_count = result.get('new', 0)
+
+        if new_count / limit >= ADAPTIVE_HIGH_YIELD:
+            current /= 2
+        elif new_count == 0 and not result.get('timed_out'):
+            current *= 2
+
+        floor = job.get('min_interval_minutes', ADAPTIVE_MIN_MINUTES)
+        ceiling = job.get('max_interval_minutes', ADAPTIVE_MAX_MINUTES)
+        current = min(max(current, floor), ceiling)
+        job['current_interval_minutes'] = current
+
+        return current * random.uniform(1 - ADAPTIVE_JITTER, 1 + ADAPTIVE_JITTER)
 
     def clear_all_jobs(self) -> Dict:
         """Очистка всех задач"""
-        deleted_count = len(self.jobs)
-        self.jobs = {}
-        self.save_data()
+        self.store.delete_all_jobs()
+        with self._lock:
+            deleted_count = len(self.jobs)
+            self.jobs = {}
+        self.timers.clear()
 
+        self._publish_changed()
         print(f"🗑️ Удалены все задачи планировщика ({deleted_count} шт.)")
         return {'status': 'cleared', 'deleted_count': deleted_count}
 
     def get_all_jobs(self) -> Dict:
         """Получение всех задач"""
-        return self.jobs.copy()
+        return self._job_views()
 
-    def _scheduler_loop(self):
-        """Основной цикл планировщика"""
-        print("🔄 Запущен цикл планировщика")
+    def _job_views(self) -> Dict:
+        """Копии задач с признаком выполнения (признак не сохраняется в БД)"""
+        try:
+            active = self.store.active_job_ids()
+        except Exception as e:
+            print(f"❌ Ошибка чтения аренд планировщика: {e}")
+            active = {}
+
+        with self._lock:
+            jobs = list(self.jobs.items())
+        views = {}
+        for job_id, job in jobs:
+            view = dict(job)
+            view['running'] = job_id in active
+            view['current_run_id'] = active.get(job_id)
+            views[job_id] = view
+        return views
+
+    def _schedule_job(self, job: Dict):
+        """Поставить таймер активной задачи на ее next_run"""
+        if job.get('status') != 'active' or not job.get('next_run'):
+            self.timers.cancel(job['id'])
+            return
 
-        while self.is_running:
+        try:
+            due = datetime.fromisoformat(job['next_run']).timestamp()
+        except (ValueError, TypeError) as e:
+            print(f"❌ Ошибка обработки задачи {job['id']}: {e}")
+            return
+
+        self.timers.schedule(job['id'], due)
+
+    @staticmethod
+    def _search_pairs(job: Dict) -> set:
+        """Нормализованные пары (ключевое слово, город) задачи"""
+        return {SearchCoalescer.key(keyword, job.get('city', '')) for keyword in job.get('keywords', [])}
+
+    def _dispatch_companions(self, job: Dict):
+        """Запустить вместе с задачей те, что пересекаются с ней по запросам и
+        наступают в пределах окна склейки: их поиски выполнятся одним запросом"""
+        pairs = self._search_pairs(job)
+        horizon = datetime.now() + timedelta(seconds=COALESCE_WINDOW)
+
+        with self._lock:
+            candidates = [other for other in self.jobs.values() if other['id'] != job['id']]
+
+        for other in candidates:
+            if other.get('status') != 'active' or not (pairs & self._search_pairs(other)):
+                continue
             try:
-                current_time = datetime.now()
-
-                # Проверяем все задачи
-                for job_id, job in list(self.jobs.items()):
-                    if job.get('status') != 'active':
-                        continue
+                if datetime.fromisoformat(other['next_run']) > horizon:
+                    continue
+            except (ValueError, TypeError, KeyError):
+                continue
+
+            result = self.run_job_now(other['id'], due_only=True, due_within=COALESCE_WINDOW)
+            if result['status'] == 'started':
+                self.timers.cancel(other['id'])
+                print(f"🔗 Задача {other['id']} объединена с {job['id']}")
+
+    def _dispatch_due(self, job_id: str):
+        """Запуск сработавшей задачи; если ее взял другой воркер — перепланировать"""
+        result = self.run_job_now(job_id, due_only=True)
+        if result['status'] == 'started':
+            self._dispatch_companions(self.jobs[job_id])
+            return
+
+        job = self.store.load_job(job_id)
+        if not job:
+            with self._lock:
+                self.jobs.pop(job_id, None)
+            return
+
+        with self._lock:
+            self.jobs[job_id] = job
+
+        # Задача все еще просрочена, но выполняется другим воркером — проверим позже
+        due = datetime.fromisoformat(job['next_run']).timestamp()
+        if result['status'] == 'already_running' or due <= time.time():
+            self.timers.schedule(job_id, time.time() + SYNC_INTERVAL)
+        else:
+            self._schedule_job(job)
+
+    def _scheduler_loop(self, generation: int = 0):
+        """Основной цикл воркера: спит до ближайшей задачи или очередной синхронизации"""
+        print("🔄 Запущен цикл планировщика")
 
-                    next_run_str = job.get('next_run')
-                    if not next_run_str:
-                        continue
+        while generation == self._loop_generation:
+            try:
+                # Просыпаемся к сроку задачи, при изменении списка задач или для синхронизации
+                job_id = self.timers.wait_next(timeout=SYNC_INTERVAL)
 
-                    try:
-                        next_run = datetime.fromisoformat(next_run_str)
+                if time.monotonic() - self._last_sync >= SYNC_INTERVAL:
+                    self.refresh()
 
-                        # Время выполнить задачу?
-                        if current_time >= next_run:
-                            print(f"⏰ Время выполнения задачи: {job_id}")
-                            self.run_job_now(job_id)
+                if job_id is None or not self.is_running:
+                    continue
 
-                    except Exception as e:
-                        print(f"❌ Ошибка обработки задачи {job_id}: {e}")
+                job = self.jobs.get(job_id)
+                if not job or job.get('status') != 'active':
+                    continue
 
-                # Сохраняем данные и ждем
-                self.save_data()
-                time.sleep(30)  # Проверяем каждые 30 секунд
+                print(f"⏰ Время выполнения задачи: {job_id}")
+                self._dispatch_due(job_id)
 
             except Exception as e:
                 print(f"❌ Ошибка в цикле планировщика: {e}")
@@ -212,36 +554,67 @@ class SchedulerService:
 
         print("🔴 Цикл планировщика остановлен")
 
-    def _execute_search_job(self, job: Dict):
-        """Выполнение задачи поиска"""
+    def _execute_search_job(self, job: Dict, deadline: float = None) -> Dict:
+        """Выполнение задачи поиска с общим дедлайном на все ключевые слова"""
         keywords = job.get('keywords', [])
         city = job.get('city', '')
         limit = job.get('limit', 20)
+        incremental = job.get('incremental', True)
 
         search_service = SearchService()
 
         total_found = 0
+        keywords_processed = 0
+        keywords_shared = 0
+        timed_out = False
+        metrics = {'pages': 0, 'http_requests': 0, 'new': 0, 'duplicates': 0, 'errors': 0, 'source_latency': {}}
 
         for keyword in keywords:
+            remaining = deadline - time.monotonic() if deadline else None
+            if remaining is not None and remaining <= 0:
+                timed_out = True
+                print(f"⏱️ Таймаут задачи {job['id']}: пропущены оставшиеся ключевые слова")
+                break
+
             try:
                 print(f"🔍 Автопоиск: '{keyword}'" + (f" в {city}" if city else ""))
 
-                results = search_service.search_all_sources(
-                    query=keyword,
-                    city=city,
-                    limit=limit // len(keywords) if len(keywords) > 1 else limit
+                keyword_limit = limit // len(keywords) if len(keywords) > 1 else limit
+
+                # Одинаковые пары соседних задач выполняются одним запросом к источникам;
+                # неполный инкрементальный результат с полным не смешивается
+                results, shared = _coalescer.fetch(
+                    keyword, city, keyword_limit,
+                    lambda: search_service.search_all_sources(
+                        query=keyword,
+                        city=city,
+                        limit=keyword_limit,
+                        timeout=remaining,
+                        incremental=incremental
+                    ),
+                    timeout=remaining,
+                    variant='incremental' if incremental else ''
                 )
+                keywords_processed += 1
+                keywords_shared += int(shared)
 
-                found_count = results.get('total', 0)
+                found_count = min(results.get('total', 0), keyword_limit)
                 total_found += found_count
+                self._collect_metrics(metrics, results, shared)
 
-                print(f"✅ Найдено {found_count} вакансий по запросу '{keyword}'")
+                publish('job_progress', {
+                    'job_id': job['id'],
+                    'keyword': keyword,
+                    'processed': keywords_processed,
+                    'total': len(keywords),
+                    'found': total_found
+                })
 
-                # Небольшая пауза между запросами
-                time.sleep(2)
+                print(f"✅ Найдено {found_count} вакансий по запросу '{keyword}'")
 
             except Exception as e:
                 print(f"❌ Ошибка поиска по '{keyword}': {e}")
+                metrics['errors'] += 1
 
         print(f"🎯 Автопоиск завершен. Всего найдено: {total_found} вакансий")
 
@@ -252,5 +625,47 @@ class SchedulerService:
         job['stats']['last_execution'] = {
             'time': datetime.now().isoformat(),
             'found': total_found,
-            'keywords_processed': len(keywords)
-        }
\ No newline at end of file
+            'new': metrics['new'],
+            'keywords_processed': keywords_processed,
+            'keywords_shared': keywords_shared,
+            'timed_out': timed_out
+        }
+
+        return dict(metrics, found=total_found, timed_out=timed_out)
+
+    @staticmethod
+    def _collect_metrics(metrics: Dict, results: Dict, shared: bool):
+        """Добавить метрики одного поиска к метрикам запуска.
+
+        Страницы, HTTP-запросы и задержки засчитываются только задаче,
+        выполнившей запрос; склеенные задачи получают лишь новые/дубликаты.
+        """
+        metrics['new'] += results.get('new', 0)
+        metrics['duplicates'] += results.get('duplicates', 0)
+
+        for name, source in results.get('sources', {}).items():
+            if source.get('status') != 'success':
+                metrics['errors'] += 1
+            else:
+                metrics['errors'] += source.get('errors', 0)
+
+            if shared:
+                continue
+            metrics['pages'] += source.get('pages', 0)
+            metrics['http_requests'] += source.get('http_requests', 0)
+            latency_ms = int(source.get('latency', 0) * 1000)
+            metrics['source_latency'][name] = metrics['source_latency'].get(name, 0) + latency_ms
+
+
+_scheduler_service = None
+_scheduler_service_lock = Lock()
+
+
+def get_scheduler_service() -> SchedulerService:
+    """Общий для процесса планировщик: одно состояние в памяти и один цикл"""
+    global _scheduler_service
+    if _scheduler_service is None:
+        with _scheduler_service_lock:
+            if _scheduler_service is None:
+                _scheduler_service = SchedulerService()
+    return _scheduler_service
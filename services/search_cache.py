@@ -0,0 +1,160 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Dict, Tuple
+
+
+class SearchCache:
+    """Кеш результатов поиска по источникам: TTL + LRU + single-flight.
+
+    Хранит не сами результаты, а Future опроса источника. Пока опрос идет,
+    одинаковые запросы ждут тот же Future (один запрос к источнику на всех),
+    после успешного завершения результат отдается из кеша в течение ttl.
+    Неудачные и отмененные опросы, а также неполные результаты (complete=False:
+    листание оборвал дедлайн или не загрузилась часть страниц) из кеша
+    удаляются сразу. Размер кеша ограничен max_entries, вытесняются давно
+    не использованные записи.
+
+    Присоединившиеся к выполняющемуся опросу получают результат с дедлайном
+    того, кто его запустил. Каждый, кто перестал ждать Future, вызывает
+    release(): опрос отменяется, только когда его больше никто не ждет.
+    """
+
+    def __init__(self, ttl: float = 300, max_entries: int = 256, clock=time.monotonic):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._clock = clock
+        # RLock: future.cancel() под блокировкой синхронно вызывает _finished
+        self._lock = threading.RLock()
+        self._entries = OrderedDict()  # key -> {'future', 'finished_at'}
+        self._waiters = {}  # выполняющийся Future -> сколько запросов его ждут
+        self.stats = {'hits': 0, 'misses': 0, 'inflight_hits': 0, 'evictions': 0}
+
+    @staticmethod
+    def key(query: str, city: str, limit: int, source: str) -> Tuple:
+        """Нормализованный ключ (регистр и лишние пробелы не важны)"""
+        normalize = lambda value: ' '.join((value or '').lower().split())
+        return normalize(query), normalize(city), int(limit), source
+
+    def _expired(self, entry: Dict, now: float) -> bool:
+        return entry['finished_at'] is not None and now - entry['finished_at'] >= self.ttl
+
+    def get_or_submit(self, key: Tuple, submit: Callable[[], Future]) -> Tuple[Future, bool]:
+        """Future результата и признак того, что он взят из кеша (в т.ч. выполняющийся)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry, self._clock()):
+                del self._entries[key]
+                entry = None
+
+            if entry is not None:
+                self._entries.move_to_end(key)
+                if entry['finished_at'] is None:
+                    self.stats['inflight_hits'] += 1
+                    self._waiters[entry['future']] = self._waiters.get(entry['future'], 0) + 1
+                else:
+                    self.stats['hits'] += 1
+                return entry['future'], True
+
+            self.stats['misses'] += 1
+            future = submit()
+            self._waiters[future] = 1
+            entry = self._store(key, future, finished_at=None)
+
+        future.add_done_callback(lambda f: self._finished(key, entry, f))
+        return future, False
+
+    def release(self, future: Future) -> bool:
+        """Перестать ждать Future из get_or_submit; True, если опрос отменен.
+
+        Отменяется только еще не начатый опрос и только последним ожидающим,
+        начатый остановится сам по дедлайну парсера.
+        """
+        with self._lock:
+            waiters = self._waiters.get(future)
+            if waiters is None:
+                return False
+            if waiters > 1:
+                self._waiters[future] = waiters - 1
+                return False
+            del self._waiters[future]
+            return future.cancel()
+
+    def peek(self, key: Tuple):
+        """Готовый свежий результат из кеша или None (выполняющиеся опросы не ждем)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry['finished_at'] is None or self._expired(entry, self._clock()):
+                self.stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return entry['future'].result()
+
+    @staticmethod
+    def _complete(value) -> bool:
+        return not isinstance(value, dict) or value.get('complete', True)
+
+    def put(self, key: Tuple, value):
+        """Положить в кеш результат, полученный в обход get_or_submit (неполный не кладется)"""
+        if not self._complete(value):
+            return
+        future = Future()
+        future.set_result(value)
+        with self._lock:
+            self._store(key, future, finished_at=self._clock())
+
+    def _store(self, key: Tuple, future: Future, finished_at) -> Dict:
+        entry = {'future': future, 'finished_at': finished_at}
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats['evictions'] += 1
+        return entry
+
+    def _finished(self, key: Tuple, entry: Dict, future: Future):
+        with self._lock:
+            self._waiters.pop(future, None)
+            if future.cancelled() or future.exception() is not None or not self._complete(future.result()):
+                # Неудачный или неполный опрос не кешируем: следующий запрос повторит его
+                if self._entries.get(key) is entry:
+                    del self._entries[key]
+            else:
+                entry['finished_at'] = self._clock()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._waiters.clear()
+
+    def get_stats(self) -> Dict:
+        """Счетчики попаданий/промахов и текущий размер"""
+        with self._lock:
+            lookups = self.stats['hits'] + self.stats['inflight_hits'] + self.stats['misses']
+            return dict(
+                self.stats,
+                size=len(self._entries),
+                max_entries=self.max_entries,
+                ttl=self.ttl,
+                hit_rate=round((lookups - self.stats['misses']) / lookups, 3) if lookups else 0.0
+            )
+
+
+_search_cache = None
+_search_cache_lock = threading.Lock()
+
+
+def get_search_cache() -> SearchCache:
+    """Общий для процесса кеш поиска"""
+    global _search_cache
+    if _search_cache is None:
+        with _search_cache_lock:
+            if _search_cache is None:
+                _search_cache = SearchCache(
+                    ttl=float(os.getenv('SEARCH_CACHE_TTL', 300)),
+                    max_entries=int(os.getenv('SEARCH_CACHE_SIZE', 256))
+                )
+    return _search_cache
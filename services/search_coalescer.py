@@ -0,0 +1,69 @@
+import time
+from concurrent.futures import Future
+from threading import Lock
+from typing import Callable, Dict, Tuple
+
+
+class SearchCoalescer:
+    """Склейка одинаковых поисков (ключевое слово + город).
+
+    Первый вызов для пары выполняет запрос к источникам, остальные в течение
+    окна window получают тот же результат: ждут выполняющийся запрос или
+    берут недавно завершенный. Так задачи с общими ключевыми словами,
+    сработавшие рядом по времени, обращаются к HH.ru и SuperJob один раз.
+    """
+
+    def __init__(self, window: float = 300, clock=time.monotonic):
+        self.window = window
+        self._clock = clock
+        self._lock = Lock()
+        self._entries = {}  # key -> {'future', 'limit', 'finished_at'}
+        self.stats = {'fetches': 0, 'shared': 0}
+
+    @staticmethod
+    def key(keyword: str, city: str = '') -> Tuple[str, str]:
+        """Нормализованный ключ пары (регистр и лишние пробелы не важны)"""
+        return ' '.join(keyword.lower().split()), ' '.join((city or '').lower().split())
+
+    def _expired(self, entry: Dict, now: float) -> bool:
+        return entry['finished_at'] is not None and now - entry['finished_at'] > self.window
+
+    def fetch(self, keyword: str, city: str, limit: int, fetch: Callable[[], Dict],
+              timeout: float = None, variant: str = '') -> Tuple[Dict, bool]:
+        """Результат поиска и признак того, что он получен из общего запроса.
+
+        variant разделяет несовместимые режимы поиска по одной паре (например, инкрементальный).
+        """
+        key = self.key(keyword, city) + ((variant,) if variant else ())
+
+        with self._lock:
+            now = self._clock()
+            for stale in [k for k, e in self._entries.items() if self._expired(e, now)]:
+                del self._entries[stale]
+
+            entry = self._entries.get(key)
+            shared = entry is not None and entry['limit'] >= limit
+            if shared:
+                self.stats['shared'] += 1
+            else:
+                entry = {'future': Future(), 'limit': limit, 'finished_at': None}
+                self._entries[key] = entry
+                self.stats['fetches'] += 1
+
+        future = entry['future']
+        if shared:
+            return future.result(timeout=timeout), True
+
+        try:
+            future.set_result(fetch())
+        except Exception as e:
+            # Неудачный запрос не кешируем: следующий вызов повторит его
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    del self._entries[key]
+            future.set_exception(e)
+            raise
+        finally:
+            entry['finished_at'] = self._clock()
+
+        return future.result(), False
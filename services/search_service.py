@@ -1,63 +1,345 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, Iterator
 from parsers.hh_parser import HHParser
 from parsers.superjob_parser import SuperJobParser
+from services.event_bus import publish
+from services.search_cache import SearchCache, get_search_cache
+
+# Общий ограниченный пул потоков для опроса источников
+_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('PARSER_MAX_WORKERS', 4)),
+    thread_name_prefix='search'
+)
+
+# Дедлайн каждого источника в секундах
+SOURCE_TIMEOUT = float(os.getenv('PARSER_TIMEOUT', 30))
+
+# Сколько последних ссылок хранит водяной знак инкрементального обхода
+WATERMARK_SIZE = int(os.getenv('CRAWL_WATERMARK_SIZE', 500))
+
+
+def _fetch_source(parser, query: str, limit: int, city: str, watermark_source: str = None,
+                  deadline: float = None) -> dict:
+    """Опрос одного источника в потоке пула: вакансии и счетчики именно этого опроса.
+
+    С watermark_source обход инкрементальный: листание останавливается на
+    ссылках, уже виденных прошлыми обходами этого (источник, запрос, город).
+    deadline передается парсеру: после него он сам прекращает листание и
+    освобождает поток пула.
+    """
+    if watermark_source is None:
+        vacancies = parser.search(query, limit=limit, city=city, deadline=deadline)
+    else:
+        known_links = _load_watermark(watermark_source, query, city)
+        vacancies = parser.collect_pages(
+            parser.iter_pages(query, limit=limit, city=city, known_links=known_links, deadline=deadline)
+        )
+        _save_watermark(watermark_source, query, city, [v['link'] for v in vacancies if v.get('link')])
+
+    return {
+        'vacancies': vacancies,
+        'ingest_stats': dict(getattr(parser, 'ingest_stats', None) or {}),
+        'fetch_stats': dict(getattr(parser, 'fetch_stats', None) or {}),
+        'complete': getattr(parser, 'complete', True)
+    }
+
+
+def _stream_source(name: str, parser, query: str, limit: int, city: str, pages: queue.Queue,
+                   stop: threading.Event, deadline: float = None):
+    """Постраничный опрос источника в потоке пула: страницы кладутся в общую очередь"""
+    try:
+        iterator = parser.iter_pages(query, limit=limit, city=city, deadline=deadline)
+        try:
+            for page in iterator:
+                pages.put(('page', name, page))
+                if stop.is_set():
+                    return
+        finally:
+            iterator.close()
+        pages.put(('done', name, {
+            'ingest_stats': dict(getattr(parser, 'ingest_stats', None) or {}),
+            'fetch_stats': dict(getattr(parser, 'fetch_stats', None) or {}),
+            'complete': getattr(parser, 'complete', True)
+        }))
+    except Exception as e:
+        pages.put(('error', name, e))
+
+
+def _load_watermark(source: str, query: str, city: str) -> set:
+    from database.models import Session
+    from database.watermarks import load_watermark
+    session = Session()
+    try:
+        return load_watermark(session, source, query, city)
+    except Exception as e:
+        # Без водяного знака обход просто будет полным
+        print(f"❌ Ошибка чтения водяного знака {source}: {e}")
+        return set()
+    finally:
+        session.close()
+
+
+def _save_watermark(source: str, query: str, city: str, links: list):
+    from database.models import Session
+    from database.watermarks import save_watermark
+    session = Session()
+    try:
+        save_watermark(session, source, query, city, links, max_links=WATERMARK_SIZE)
+        session.commit()
+    except Exception as e:
+        session.rollback()
+        print(f"❌ Ошибка сохранения водяного знака {source}: {e}")
+    finally:
+        session.close()
 
 
 class SearchService:
-    def __init__(self):
+    def __init__(self, cache: SearchCache = None):
+        self.cache = cache or get_search_cache()
         self.hh_parser = HHParser()
         self.sj_parser = SuperJobParser()
+        self.source_timeouts = {
+            'hh': float(os.getenv('HH_TIMEOUT', SOURCE_TIMEOUT)),
+            'superjob': float(os.getenv('SUPERJOB_TIMEOUT', SOURCE_TIMEOUT))
+        }
+
+    def _sources(self):
+        """Список источников в порядке опроса"""
+        return [
+            ('hh', 'HH.ru', self.hh_parser),
+            ('superjob', 'SuperJob', self.sj_parser)
+        ]
 
-    def search_all_sources(self, query: str, city: str = '', limit: int = 50):
-        """Поиск вакансий на всех источниках"""
+    def search_all_sources(self, query: str, city: str = '', limit: int = 50, timeout: float = None,
+                           use_cache: bool = True, incremental: bool = False):
+        """Поиск вакансий на всех источниках параллельно.
+
+        timeout ограничивает дедлайн каждого источника сверху (для задач планировщика).
+        Результат каждого источника берется из кеша поиска, если такой же запрос
+        недавно выполнялся или выполняется прямо сейчас (use_cache=False — в обход кеша).
+        Присоединившийся к выполняющемуся опросу ждет его до своего дедлайна, но сам
+        опрос идет с дедлайном запустившего; обрезанный им результат не кешируется.
+        incremental — обход до уже известных вакансий по водяному знаку; такой
+        обход всегда идет в обход кеша, иначе он не увидит новых вакансий.
+        """
+        use_cache = use_cache and not incremental
         print(f"🔍 Начинаем поиск: {query}")
 
         results = {
             'query': query,
             'vacancies': [],
-            'sources': {
-                'hh': {'count': 0, 'status': 'pending'},
-                'superjob': {'count': 0, 'status': 'pending'}
-            },
-            'total': 0
+            'sources': {},
+            'total': 0,
+            'new': 0,
+            'duplicates': 0
         }
 
-        # Поиск на HH.ru
-        try:
-            print("📊 Парсинг HH.ru...")
-            hh_vacancies = self.hh_parser.search(query, limit=limit, city=city)
-            results['vacancies'].extend(hh_vacancies)
-            results['sources']['hh'] = {
-                'count': len(hh_vacancies),
-                'status': 'success'
-            }
-            print(f"✅ HH.ru: {len(hh_vacancies)} вакансий")
-        except Exception as e:
-            print(f"❌ Ошибка HH.ru: {e}")
-            results['sources']['hh'] = {
-                'count': 0,
-                'status': 'error',
-                'error': str(e)
-            }
-
-        # Поиск на SuperJob
-        try:
-            print("📊 Парсинг SuperJob...")
-            sj_vacancies = self.sj_parser.search(query, limit=limit, city=city)
-            results['vacancies'].extend(sj_vacancies)
-            results['sources']['superjob'] = {
-                'count': len(sj_vacancies),
-                'status': 'success'
-            }
-            print(f"✅ SuperJob: {len(sj_vacancies)} вакансий")
-        except Exception as e:
-            print(f"❌ Ошибка SuperJob: {e}")
-            results['sources']['superjob'] = {
-                'count': 0,
-                'status': 'error',
-                'error': str(e)
-            }
+        # Запускаем все источники одновременно, у каждого свой дедлайн
+        started = time.monotonic()
+        futures = {}
+        for name, title, parser in self._sources():
+            results['sources'][name] = {'count': 0, 'status': 'pending'}
+            source_timeout = self.source_timeouts.get(name, SOURCE_TIMEOUT)
+            if timeout is not None:
+                source_timeout = min(source_timeout, timeout)
+            deadline = started + source_timeout
+            submit = lambda: _executor.submit(
+                _fetch_source, parser, query, limit, city, name if incremental else None, deadline
+            )
+            if use_cache:
+                future, cached = self.cache.get_or_submit(SearchCache.key(query, city, limit, name), submit)
+            else:
+                future, cached = submit(), False
+            print(f"♻️ {title}: результат из кеша" if cached else f"📊 Парсинг {title}...")
+            futures[future] = (name, title, deadline, source_timeout, cached)
+
+        # Собираем результаты по мере готовности
+        pending = set(futures)
+        while pending:
+            now = time.monotonic()
+
+            for future in [f for f in pending if futures[f][2] <= now]:
+                name, title, _, source_timeout, _ = futures[future]
+                # cancel() снимает только еще не начатый опрос; начатый остановится
+                # сам по переданному парсеру дедлайну. Общий опрос из кеша
+                # отменяется, только если его больше никто не ждет
+                if use_cache:
+                    self.cache.release(future)
+                else:
+                    future.cancel()
+                pending.discard(future)
+                print(f"⏱️ {title}: превышено время ожидания")
+                results['sources'][name] = {
+                    'count': 0,
+                    'status': 'timeout',
+                    'error': f'Превышено время ожидания ({source_timeout:.0f} с)',
+                    'latency': source_timeout
+                }
+                self._publish_source(query, name, results['sources'][name])
+
+            if not pending:
+                break
+
+            nearest = min(futures[f][2] for f in pending)
+            done, pending = wait(pending, timeout=max(nearest - now, 0), return_when=FIRST_COMPLETED)
+
+            for future in done:
+                name, title, _, _, cached = futures[future]
+                try:
+                    fetched = future.result()
+                    vacancies = fetched['vacancies']
+                    results['vacancies'].extend(vacancies)
+
+                    source = self._success_entry(fetched, len(vacancies), time.monotonic() - started, cached)
+                    results['sources'][name] = source
+                    results['new'] += source['new']
+                    results['duplicates'] += source['duplicates']
+                    print(f"✅ {title}: {len(vacancies)} вакансий")
+                except Exception as e:
+                    print(f"❌ Ошибка {title}: {e}")
+                    results['sources'][name] = {
+                        'count': 0,
+                        'status': 'error',
+                        'error': str(e),
+                        'latency': time.monotonic() - started
+                    }
+
+                self._publish_source(query, name, results['sources'][name])
 
         results['total'] = len(results['vacancies'])
-        print(f"🎉 Поиск завершен. Всего: {results['total']} вакансий")
+        print(f"🎉 Поиск завершен за {time.monotonic() - started:.1f} с. Всего: {results['total']} вакансий")
+        publish('search_finished', {'query': query, 'city': city, 'total': results['total'], 'new': results['new']})
+
+        return results
+
+    def stream(self, query: str, city: str = '', limit: int = 50, use_cache: bool = True) -> Iterator[Dict]:
+        """Поиск с выдачей результатов по мере загрузки страниц.
+
+        Генератор записей:
+        {'type': 'vacancies', 'source', 'vacancies'} — очередная страница источника,
+        {'type': 'source', 'source', 'status', ...} — итог источника (как в search_all_sources),
+        {'type': 'done', 'query', 'total', 'new', 'duplicates'} — последняя запись.
+        Источники опрашиваются параллельно, страницы приходят через общую очередь.
+        """
+        print(f"🔍 Потоковый поиск: {query}")
+        started = time.monotonic()
+        pages = queue.Queue()
+        running = {}  # name -> (deadline, source_timeout, stop, title)
+        collected = {}  # name -> вакансии, уже отданные клиенту
+        totals = {'total': 0, 'new': 0, 'duplicates': 0}
+
+        def finish(name, source):
+            totals['new'] += source.get('new', 0)
+            totals['duplicates'] += source.get('duplicates', 0)
+            self._publish_source(query, name, source)
+            return dict(source, type='source', source=name)
+
+        from_cache = []
+        for name, title, parser in self._sources():
+            cached = self.cache.peek(SearchCache.key(query, city, limit, name)) if use_cache else None
+            if cached is not None:
+                print(f"♻️ {title}: результат из кеша")
+                from_cache.append((name, cached))
+                continue
+
+            print(f"📊 Парсинг {title}...")
+            stop = threading.Event()
+            source_timeout = self.source_timeouts.get(name, SOURCE_TIMEOUT)
+            deadline = started + source_timeout
+            running[name] = (deadline, source_timeout, stop, title)
+            collected[name] = []
+            _executor.submit(_stream_source, name, parser, query, limit, city, pages, stop, deadline)
 
-        return results
\ No newline at end of file
+        try:
+            # Результаты из кеша отдаем сразу, пока остальные источники опрашиваются
+            for name, cached in from_cache:
+                totals['total'] += len(cached['vacancies'])
+                if cached['vacancies']:
+                    yield {'type': 'vacancies', 'source': name, 'vacancies': cached['vacancies']}
+                yield finish(name, self._success_entry(cached, len(cached['vacancies']), 0.0, True))
+
+            while running:
+                nearest = min(deadline for deadline, _, _, _ in running.values())
+                try:
+                    kind, name, payload = pages.get(timeout=max(nearest - time.monotonic(), 0))
+                except queue.Empty:
+                    now = time.monotonic()
+                    for name in [n for n, (deadline, _, _, _) in running.items() if deadline <= now]:
+                        _, source_timeout, stop, title = running.pop(name)
+                        stop.set()
+                        print(f"⏱️ {title}: превышено время ожидания")
+                        yield finish(name, {
+                            'count': len(collected[name]),
+                            'status': 'timeout',
+                            'error': f'Превышено время ожидания ({source_timeout:.0f} с)',
+                            'latency': source_timeout
+                        })
+                    continue
+
+                if name not in running:
+                    # Источник уже отчитался по таймауту, опоздавшие страницы не отдаем
+                    continue
+
+                if kind == 'page':
+                    collected[name].extend(payload)
+                    totals['total'] += len(payload)
+                    yield {'type': 'vacancies', 'source': name, 'vacancies': payload}
+                elif kind == 'done':
+                    running.pop(name)
+                    fetched = dict(payload, vacancies=collected[name])
+                    if use_cache:
+                        self.cache.put(SearchCache.key(query, city, limit, name), fetched)
+                    yield finish(name, self._success_entry(fetched, len(collected[name]), time.monotonic() - started, False))
+                else:
+                    title = running.pop(name)[3]
+                    print(f"❌ Ошибка {title}: {payload}")
+                    yield finish(name, {
+                        'count': len(collected[name]),
+                        'status': 'error',
+                        'error': str(payload),
+                        'latency': time.monotonic() - started
+                    })
+        finally:
+            # Клиент мог отключиться раньше: останавливаем опрос оставшихся источников
+            for _, _, stop, _ in running.values():
+                stop.set()
+
+        print(f"🎉 Потоковый поиск завершен за {time.monotonic() - started:.1f} с. Всего: {totals['total']} вакансий")
+        publish('search_finished', dict(totals, query=query, city=city))
+        yield dict(totals, type='done', query=query)
+
+    @staticmethod
+    def _success_entry(fetched: Dict, count: int, latency: float, cached: bool) -> Dict:
+        """Итог успешно опрошенного источника.
+
+        Новые/дубликаты считает путь записи в БД (ingest); результат из кеша
+        источник не опрашивал и в БД ничего не записал.
+        """
+        ingest_stats = {} if cached else fetched['ingest_stats']
+        fetch_stats = {} if cached else fetched['fetch_stats']
+        return {
+            'count': count,
+            'status': 'success',
+            'new': ingest_stats.get('new', 0),
+            'duplicates': ingest_stats.get('duplicates', 0),
+            'errors': ingest_stats.get('errors', 0),
+            'pages': fetch_stats.get('pages', 0),
+            'http_requests': fetch_stats.get('http_requests', 0),
+            'latency': latency,
+            'cached': cached,
+            'complete': fetched.get('complete', True)
+        }
+
+    @staticmethod
+    def _publish_source(query: str, name: str, source: dict):
+        """Событие о завершении опроса одного источника (для SSE)"""
+        publish('search_progress', {
+            'query': query,
+            'source': name,
+            'status': source['status'],
+            'count': source['count']
+        })
@@ -1,5 +1,5 @@
-from database.models import Vacancy, Session
-from utils.search import SearchUtils
+from database.models import Session
+from database.stats import read_stats
 
 
 class StatsService:
@@ -7,23 +7,21 @@ class StatsService:
         """Получение базовой статистики БД"""
         session = Session()
         try:
-            total_count = session.query(Vacancy).count()
-            hh_count = session.query(Vacancy).filter_by(source='hh').count()
-            sj_count = session.query(Vacancy).filter_by(source='superjob').count()
+            stats = read_stats(session)
 
             return {
-                'total_vacancies': total_count,
-                'hh_vacancies': hh_count,
-                'superjob_vacancies': sj_count
+                'total_vacancies': stats['total_vacancies'],
+                'hh_vacancies': stats['by_source'].get('hh', 0),
+                'superjob_vacancies': stats['by_source'].get('superjob', 0)
             }
         finally:
             session.close()
 
     def get_full_statistics(self):
-        """Получение полной статистики"""
+        """Получение полной статистики из агрегатов"""
         session = Session()
         try:
-            stats = SearchUtils.get_statistics(session)
+            stats = read_stats(session)
             return stats
         finally:
             session.close()
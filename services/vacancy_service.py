@@ -1,6 +1,44 @@
-from database.models import Vacancy, Session
-from sqlalchemy import or_
+import base64
+import json
+import re
+import threading
+import time
+from datetime import datetime
+from database.models import Vacancy, Session, FTS_TABLE
+from database.stats import reset_stats
+from database.versions import bump_data_version, get_data_version
+from database.watermarks import reset_watermarks
+from sqlalchemy import or_, tuple_, text
+from sqlalchemy.exc import OperationalError
 from utils.search import SearchUtils
+from services.search_cache import get_search_cache
+
+# Кэш количества вакансий для курсорной пагинации: {(source, company): (время, total)}
+COUNT_CACHE_TTL = 30
+_count_cache = {}
+_count_cache_lock = threading.Lock()
+
+
+def encode_cursor(vacancy: Vacancy) -> str:
+    """Непрозрачный курсор по ключу (created_at, id)"""
+    raw = json.dumps([vacancy.created_at.isoformat(), vacancy.id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str):
+    """Разбор курсора, ValueError при некорректном значении"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, vacancy_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), int(vacancy_id)
+    except Exception:
+        raise ValueError('Некорректный курсор пагинации')
+
+
+def build_match_query(query: str) -> str:
+    """Безопасное FTS5-выражение: каждое слово как префиксный термин, все слова обязательны"""
+    terms = re.findall(r'\w+', query.lower())
+    return ' '.join(f'"{term}"*' for term in terms)
 
 
 class VacancyService:
@@ -38,14 +76,174 @@ class VacancyService:
         finally:
             session.close()
 
+    def get_vacancies_by_cursor(self, cursor='', per_page=10, source='', company='',
+                                direction='next', include_total=False):
+        """Курсорная (keyset) пагинация по (created_at, id), новые вакансии первыми"""
+        session = Session()
+        try:
+            query = self._filtered_query(session, source, company)
+            key = tuple_(Vacancy.created_at, Vacancy.id)
+
+            if cursor:
+                position = decode_cursor(cursor)
+                if direction == 'prev':
+                    query = query.filter(key > position)
+                else:
+                    query = query.filter(key < position)
+
+            if direction == 'prev':
+                query = query.order_by(Vacancy.created_at.asc(), Vacancy.id.asc())
+            else:
+                query = query.order_by(Vacancy.created_at.desc(), Vacancy.id.desc())
+
+            # Берем на одну запись больше, чтобы понять, есть ли следующая страница
+            rows = query.limit(per_page + 1).all()
+            has_more = len(rows) > per_page
+            rows = rows[:per_page]
+
+            if direction == 'prev':
+                rows.reverse()
+                has_prev, has_next = has_more, bool(cursor)
+            else:
+                has_prev, has_next = bool(cursor), has_more
+
+            pagination = {
+                'per_page': per_page,
+                'next_cursor': encode_cursor(rows[-1]) if rows and has_next else None,
+                'prev_cursor': encode_cursor(rows[0]) if rows and has_prev else None
+            }
+            if include_total:
+                pagination['total'] = self._cached_count(session, source, company)
+
+            return {
+                'vacancies': [SearchUtils.vacancy_to_dict(v) for v in rows],
+                'pagination': pagination
+            }
+        finally:
+            session.close()
+
+    def search_vacancies(self, query, page=1, per_page=10, source=''):
+        """Полнотекстовый поиск по сохраненным вакансиям с ранжированием"""
+        match = build_match_query(query)
+        if not match:
+            return self._search_result([], 0, page, per_page, query)
+
+        session = Session()
+        try:
+            try:
+                return self._search_fulltext(session, match, query, page, per_page, source)
+            except OperationalError:
+                # Нет FTS5 (не SQLite или старая сборка) — простой поиск по подстроке
+                session.rollback()
+                return self._search_like(session, query, page, per_page, source)
+        finally:
+            session.close()
+
+    def _search_fulltext(self, session, match, query, page, per_page, source):
+        """Поиск по индексу FTS5, ранжирование bm25 (заголовок весомее описания)"""
+        source_filter = 'AND v.source = :source' if source else ''
+        params = {'match': match, 'source': source}
+
+        total = session.execute(text(
+            f"SELECT count(*) FROM {FTS_TABLE} JOIN vacancies v ON v.id = {FTS_TABLE}.rowid "
+            f"WHERE {FTS_TABLE} MATCH :match {source_filter}"
+        ), params).scalar()
+
+        rows = session.execute(text(
+            f"SELECT v.id, bm25({FTS_TABLE}, 10.0, 5.0, 1.0, 2.0) AS rank "
+            f"FROM {FTS_TABLE} JOIN vacancies v ON v.id = {FTS_TABLE}.rowid "
+            f"WHERE {FTS_TABLE} MATCH :match {source_filter} "
+            f"ORDER BY rank LIMIT :limit OFFSET :offset"
+        ), dict(params, limit=per_page, offset=(page - 1) * per_page)).all()
+
+        ranks = {row.id: row.rank for row in rows}
+        vacancies = session.query(Vacancy).filter(Vacancy.id.in_(list(ranks))).all() if ranks else []
+        vacancies.sort(key=lambda v: ranks[v.id])
+
+        items = []
+        for vacancy in vacancies:
+            item = SearchUtils.vacancy_to_dict(vacancy)
+            item['rank'] = round(-ranks[vacancy.id], 4)
+            items.append(item)
+
+        return self._search_result(items, total, page, per_page, query)
+
+    def _search_like(self, session, query, page, per_page, source):
+        """Запасной поиск через LIKE по всем текстовым полям"""
+        pattern = f'%{query.strip()}%'
+        db_query = session.query(Vacancy).filter(or_(
+            Vacancy.title.ilike(pattern),
+            Vacancy.company.ilike(pattern),
+            Vacancy.description.ilike(pattern),
+            Vacancy.requirements.ilike(pattern)
+        ))
+        if source:
+            db_query = db_query.filter(Vacancy.source == source)
+
+        total = db_query.count()
+        vacancies = db_query.order_by(Vacancy.created_at.desc()).offset(
+            (page - 1) * per_page
+        ).limit(per_page).all()
+
+        items = [SearchUtils.vacancy_to_dict(v) for v in vacancies]
+        return self._search_result(items, total, page, per_page, query)
+
+    def _search_result(self, items, total, page, per_page, query):
+        return {
+            'query': query,
+            'vacancies': items,
+            'pagination': {
+                'page': page,
+                'per_page': per_page,
+                'total': total,
+                'pages': (total + per_page - 1) // per_page
+            }
+        }
+
+    def _filtered_query(self, session, source='', company=''):
+        """Запрос вакансий с фильтрами по источнику и компании"""
+        query = session.query(Vacancy)
+        if source:
+            query = query.filter(Vacancy.source == source)
+        if company:
+            query = query.filter(Vacancy.company.ilike(f'%{company}%'))
+        return query
+
+    def _cached_count(self, session, source='', company=''):
+        """Количество вакансий с кэшированием на COUNT_CACHE_TTL секунд.
+
+        Запись кеша действительна, пока не изменилась версия данных.
+        """
+        key = (source, company)
+        now = time.monotonic()
+        version, _ = get_data_version(session)
+        with _count_cache_lock:
+            cached = _count_cache.get(key)
+        if cached and cached[2] == version and now - cached[0] < COUNT_CACHE_TTL:
+            return cached[1]
+
+        total = self._filtered_query(session, source, company).count()
+        with _count_cache_lock:
+            _count_cache[key] = (now, total, version)
+        return total
+
     def clear_all_vacancies(self):
         """Очистка всех вакансий"""
         session = Session()
         try:
             count_before = session.query(Vacancy).count()
             deleted_count = session.query(Vacancy).delete()
+            reset_stats(session)
+            # Без вакансий водяные знаки обхода устарели: следующий обход снова полный
+            reset_watermarks(session)
+            bump_data_version(session)
             session.commit()
 
+            with _count_cache_lock:
+                _count_cache.clear()
+            # Результаты из кеша поиска не записываются в БД повторно — сбрасываем и его
+            get_search_cache().clear()
+
             print(f"🗑️ База данных очищена! Удалено {deleted_count} вакансий")
 
             return {
@@ -39,6 +39,12 @@ class JobParserApp {
         this.hideSuccess();
 
         try {
+            // Потоковый поиск: вакансии показываются по мере загрузки страниц
+            if (window.ReadableStream && window.TextDecoder) {
+                await this.streamSearch(vacancy, city);
+                return;
+            }
+
             // ИСПРАВЛЕНО: отправляем правильный параметр 'query' вместо 'vacancy'
             const response = await fetch('/api/search', {
                 method: 'POST',
@@ -71,6 +77,64 @@ class JobParserApp {
         }
     }
 
+    async streamSearch(query, city) {
+        const response = await fetch('/api/search/stream', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ query: query, city: city, limit: 50 })
+        });
+
+        if (!response.ok) {
+            const data = await response.json().catch(() => ({}));
+            throw new Error(data.error || `HTTP ${response.status}`);
+        }
+
+        const results = { vacancies: [], sources: {}, total: 0 };
+        this.allVacancies = results.vacancies;
+        this.currentPage = 1;
+
+        // Ответ — NDJSON: по одной JSON-записи на строку
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+
+            buffer += decoder.decode(value, { stream: true });
+            const lines = buffer.split('\n');
+            buffer = lines.pop();
+
+            lines.filter(line => line.trim()).forEach(line => {
+                this.handleStreamRecord(JSON.parse(line), results);
+            });
+
+            if (results.vacancies.length > 0) {
+                this.displayStats(results);
+                this.displayPage(this.currentPage);
+                this.showResults();
+            }
+        }
+
+        this.displayStats(results);
+        this.displayPage(this.currentPage);
+        this.showResults();
+    }
+
+    handleStreamRecord(record, results) {
+        if (record.type === 'vacancies') {
+            results.vacancies.push(...record.vacancies);
+            results.total = results.vacancies.length;
+        } else if (record.type === 'source') {
+            results.sources[record.source] = record;
+        } else if (record.type === 'done') {
+            results.total = record.total;
+        } else if (record.type === 'error') {
+            throw new Error(record.error);
+        }
+    }
+
     async handleClearDb() {
         if (!confirm('⚠️ Вы уверены, что хотите удалить ВСЕ вакансии из базы данных?')) {
             return;
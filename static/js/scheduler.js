@@ -221,15 +221,47 @@ class SchedulerManager {
     }
 
     startAutoRefresh() {
-        // Автоматически обновляем статус каждые 30 секунд
-        this.statusCheckInterval = setInterval(() => {
+        // Обновления приходят через SSE; опрос каждые 30 секунд — только пока поток недоступен
+        if (!window.EventSource) {
+            this.startPolling();
+            return;
+        }
+
+        this.events = new EventSource('/api/events');
+        this.events.onopen = () => this.stopPolling();
+        this.events.onerror = () => this.startPolling();
+
+        ['job_started', 'job_progress', 'job_finished', 'scheduler_changed'].forEach(type => {
+            this.events.addEventListener(type, () => this.scheduleStatusReload());
+        });
+    }
+
+    scheduleStatusReload() {
+        clearTimeout(this.statusReloadTimer);
+        this.statusReloadTimer = setTimeout(() => {
             this.loadStatus();
-        }, 30000);
+        }, 500);
     }
 
-    stopAutoRefresh() {
+    startPolling() {
+        if (!this.statusCheckInterval) {
+            this.statusCheckInterval = setInterval(() => {
+                this.loadStatus();
+            }, 30000);
+        }
+    }
+
+    stopPolling() {
         if (this.statusCheckInterval) {
             clearInterval(this.statusCheckInterval);
+            this.statusCheckInterval = null;
+        }
+    }
+
+    stopAutoRefresh() {
+        this.stopPolling();
+        if (this.events) {
+            this.events.close();
         }
     }
 }
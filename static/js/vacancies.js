@@ -1,21 +1,71 @@
 class VacanciesPage {
     constructor() {
         this.currentPage = 1;
+        this.currentCursor = '';
+        this.currentDirection = 'next';
+        this.pagination = {};
+        this.total = null;
         this.currentFilters = { source: '', company: '' };
         this.init();
     }
 
     init() {
         this.bindEvents();
+        this.subscribeEvents();
         this.loadVacancies();
     }
 
+    subscribeEvents() {
+        // Новые вакансии приходят через SSE вместо ручного обновления
+        if (!window.EventSource) return;
+
+        this.events = new EventSource('/api/events');
+        const onChange = () => this.onVacanciesChanged();
+        this.events.addEventListener('vacancies_ingested', onChange);
+        this.events.addEventListener('data_version', onChange);
+        window.addEventListener('beforeunload', () => this.events.close());
+    }
+
+    onVacanciesChanged() {
+        // На первой странице просто перечитываем список, на остальных — не сбиваем
+        // пользователя с места, а показываем плашку
+        clearTimeout(this.refreshTimer);
+        this.refreshTimer = setTimeout(() => {
+            if (this.currentCursor === '') {
+                // Общее число тоже изменилось: запрашиваем его заново
+                this.total = null;
+                this.loadVacancies();
+            } else {
+                this.showNewVacanciesNotice();
+            }
+        }, 1000);
+    }
+
+    showNewVacanciesNotice() {
+        if (document.getElementById('newVacanciesNotice')) return;
+
+        const notice = document.createElement('div');
+        notice.id = 'newVacanciesNotice';
+        notice.className = 'alert alert-info d-flex justify-content-between align-items-center';
+        notice.innerHTML = `
+            <span>🆕 Появились новые вакансии</span>
+            <button type="button" class="btn btn-sm btn-primary">Показать</button>
+        `;
+        notice.querySelector('button').addEventListener('click', () => {
+            this.resetPaging();
+            this.loadVacancies();
+        });
+
+        const container = document.getElementById('vacanciesList');
+        container.parentNode.insertBefore(notice, container);
+    }
+
     bindEvents() {
         const sourceFilter = document.getElementById('sourceFilter');
         if (sourceFilter) {
             sourceFilter.addEventListener('change', (e) => {
                 this.currentFilters.source = e.target.value;
-                this.currentPage = 1;
+                this.resetPaging();
                 this.loadVacancies();
             });
         }
@@ -27,15 +77,24 @@ class VacanciesPage {
                 clearTimeout(debounceTimer);
                 debounceTimer = setTimeout(() => {
                     this.currentFilters.company = e.target.value.trim();
-                    this.currentPage = 1;
+                    this.resetPaging();
                     this.loadVacancies();
                 }, 500);
             });
         }
     }
 
-    async loadVacancies(page = 1) {
+    resetPaging() {
+        this.currentPage = 1;
+        this.currentCursor = '';
+        this.currentDirection = 'next';
+        this.total = null;
+    }
+
+    async loadVacancies(cursor = '', direction = 'next') {
         const container = document.getElementById('vacanciesList');
+        const notice = document.getElementById('newVacanciesNotice');
+        if (notice) notice.remove();
 
         // Показываем индикатор загрузки
         container.innerHTML = `
@@ -48,13 +107,21 @@ class VacanciesPage {
         `;
 
         try {
+            // Курсорная пагинация: сервер не считает OFFSET и COUNT на каждой странице
             const params = new URLSearchParams({
-                page: page.toString(),
+                mode: 'cursor',
+                cursor: cursor || '',
+                direction: direction,
                 per_page: '10',
                 source: this.currentFilters.source || '',
                 company: this.currentFilters.company || ''
             });
 
+            // Общее количество запрашиваем только один раз для набора фильтров
+            if (this.total === null) {
+                params.set('include_total', '1');
+            }
+
             const response = await fetch(`/api/vacancies?${params}`);
 
             if (!response.ok) {
@@ -77,6 +144,13 @@ class VacanciesPage {
             const vacancies = responseData.vacancies || [];
             const pagination = responseData.pagination || {};
 
+            if (pagination.total !== undefined) {
+                this.total = pagination.total;
+            }
+            this.currentCursor = cursor || '';
+            this.currentDirection = direction;
+            this.pagination = pagination;
+
             this.displayVacancies(vacancies);
             this.displayPagination(pagination);
 
@@ -86,7 +160,7 @@ class VacanciesPage {
                 <div class="alert alert-danger">
                     <h6>❌ Ошибка загрузки вакансий</h6>
                     <p>${error.message}</p>
-                    <button class="btn btn-outline-danger btn-sm" onclick="vacanciesPage.loadVacancies(${page})">
+                    <button class="btn btn-outline-danger btn-sm" onclick="vacanciesPage.loadVacancies('${cursor || ''}', '${direction}')">
                         🔄 Попробовать снова
                     </button>
                 </div>
@@ -186,59 +260,33 @@ class VacanciesPage {
             return;
         }
 
-        const { page = 1, pages = 1, total = 0 } = pagination;
+        const hasPrev = Boolean(pagination.prev_cursor);
+        const hasNext = Boolean(pagination.next_cursor);
 
-        if (pages <= 1) {
+        if (!hasPrev && !hasNext) {
             nav.style.display = 'none';
             return;
         }
 
+        const page = this.currentPage;
+        const pages = this.total !== null ? Math.max(1, Math.ceil(this.total / 10)) : null;
+
         let html = '<ul class="pagination justify-content-center">';
 
         // Предыдущая страница
-        html += `<li class="page-item ${page <= 1 ? 'disabled' : ''}">
-            <a class="page-link" href="#" onclick="vacanciesPage.changePage(${page - 1})" ${page <= 1 ? 'tabindex="-1"' : ''}>
+        html += `<li class="page-item ${!hasPrev ? 'disabled' : ''}">
+            <a class="page-link" href="#" onclick="vacanciesPage.prevPage(); return false;" ${!hasPrev ? 'tabindex="-1"' : ''}>
                 ‹ Предыдущая
             </a>
         </li>`;
 
-        // Номера страниц (показываем максимум 5 страниц)
-        const startPage = Math.max(1, page - 2);
-        const endPage = Math.min(pages, page + 2);
-
-        // Первая страница, если нужно
-        if (startPage > 1) {
-            html += `<li class="page-item">
-                <a class="page-link" href="#" onclick="vacanciesPage.changePage(1)">1</a>
-            </li>`;
-            if (startPage > 2) {
-                html += `<li class="page-item disabled"><span class="page-link">...</span></li>`;
-            }
-        }
-
-        // Основные страницы
-        for (let i = startPage; i <= endPage; i++) {
-            html += `<li class="page-item ${i === page ? 'active' : ''}">
-                ${i === page ?
-                    `<span class="page-link">${i}</span>` :
-                    `<a class="page-link" href="#" onclick="vacanciesPage.changePage(${i})">${i}</a>`
-                }
-            </li>`;
-        }
-
-        // Последняя страница, если нужно
-        if (endPage < pages) {
-            if (endPage < pages - 1) {
-                html += `<li class="page-item disabled"><span class="page-link">...</span></li>`;
-            }
-            html += `<li class="page-item">
-                <a class="page-link" href="#" onclick="vacanciesPage.changePage(${pages})">${pages}</a>
-            </li>`;
-        }
+        html += `<li class="page-item active">
+            <span class="page-link">${page}${pages ? ` из ${pages}` : ''}</span>
+        </li>`;
 
         // Следующая страница
-        html += `<li class="page-item ${page >= pages ? 'disabled' : ''}">
-            <a class="page-link" href="#" onclick="vacanciesPage.changePage(${page + 1})" ${page >= pages ? 'tabindex="-1"' : ''}>
+        html += `<li class="page-item ${!hasNext ? 'disabled' : ''}">
+            <a class="page-link" href="#" onclick="vacanciesPage.nextPage(); return false;" ${!hasNext ? 'tabindex="-1"' : ''}>
                 Следующая ›
             </a>
         </li>`;
@@ -246,24 +294,42 @@ class VacanciesPage {
         html += '</ul>';
 
         // Информация о текущих результатах
-        const startItem = ((page - 1) * 10) + 1;
-        const endItem = Math.min(page * 10, total);
-        html += `
-            <div class="text-center mt-2 text-muted">
-                <small>Показано ${startItem}-${endItem} из ${total} вакансий</small>
-            </div>
-        `;
+        if (this.total !== null) {
+            const startItem = ((page - 1) * 10) + 1;
+            const endItem = Math.min(page * 10, this.total);
+            html += `
+                <div class="text-center mt-2 text-muted">
+                    <small>Показано ${startItem}-${endItem} из ${this.total} вакансий</small>
+                </div>
+            `;
+        }
 
         nav.innerHTML = html;
         nav.style.display = 'block';
     }
 
-    changePage(page) {
-        if (page < 1) return;
+    nextPage() {
+        if (!this.pagination.next_cursor) return;
+
+        this.currentPage += 1;
+        this.loadVacancies(this.pagination.next_cursor, 'next');
+        this.scrollToList();
+    }
 
-        this.currentPage = page;
-        this.loadVacancies(page);
+    prevPage() {
+        if (!this.pagination.prev_cursor) return;
 
+        this.currentPage = Math.max(1, this.currentPage - 1);
+        if (this.currentPage === 1) {
+            // Первая страница всегда загружается без курсора
+            this.loadVacancies('', 'next');
+        } else {
+            this.loadVacancies(this.pagination.prev_cursor, 'prev');
+        }
+        this.scrollToList();
+    }
+
+    scrollToList() {
         // Прокручиваем к началу списка
         document.getElementById('vacanciesList').scrollIntoView({
             behavior: 'smooth',
@@ -274,7 +340,7 @@ class VacanciesPage {
     clearFilters() {
         // Сбрасываем фильтры
         this.currentFilters = { source: '', company: '' };
-        this.currentPage = 1;
+        this.resetPaging();
 
         // Очищаем поля фильтров
         const sourceFilter = document.getElementById('sourceFilter');
@@ -284,7 +350,7 @@ class VacanciesPage {
         if (companyFilter) companyFilter.value = '';
 
         // Перезагружаем данные
-        this.loadVacancies(1);
+        this.loadVacancies();
     }
 }
 
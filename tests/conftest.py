@@ -0,0 +1,13 @@
+import atexit
+import os
+import shutil
+import tempfile
+
+# Тесты работают с временной БД. Переменная задается до импорта database.models:
+# иначе модульный engine и init_db() в create_app() мигрируют и пишут рабочую vacancies.db
+_tmp_dir = tempfile.mkdtemp(prefix='job-parser-tests-')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(_tmp_dir, 'vacancies.db')
+atexit.register(shutil.rmtree, _tmp_dir, ignore_errors=True)
+
+# Цикл планировщика в тестах не запускаем: задачи из scheduler_data.json ходили бы в сеть
+os.environ['SCHEDULER_ENABLED'] = 'false'
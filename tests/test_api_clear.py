@@ -1,16 +1,16 @@
 import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-import types
-# Мокаем VacancyService до импорта app_module
-import services.vacancy_service as vs
+import pytest
+import app as app_module
+import routes.api_routes as api_routes
+
 class DummyVacancyService:
     def clear_all_vacancies(self):
         return {'message': 'Cleared', 'deleted_count': 5}
-vs.VacancyService = DummyVacancyService
-import app as app_module
 
-def test_api_clear():
+def test_api_clear(monkeypatch):
+    monkeypatch.setattr(api_routes, 'VacancyService', DummyVacancyService)
     app = app_module.create_app()
     app.config['TESTING'] = True
     with app.test_client() as client:
@@ -35,4 +35,5 @@ def test_api_clear():
         print('test_api_clear: OK')
 
 if __name__ == "__main__":
-    test_api_clear() 
\ No newline at end of file
+    with pytest.MonkeyPatch.context() as mp:
+        test_api_clear(mp)
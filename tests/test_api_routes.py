@@ -23,5 +23,58 @@ def test_api_health():
         assert data2['user'] == 'testuser'
         print('test_api_health: OK')
 
+def test_run_job_now_not_due():
+    class NotDueScheduler:
+        def run_job_now(self, job_id):
+            return {'status': 'not_due', 'message': f'Задача {job_id} уже выполнена другим воркером'}
+
+    app = app_module.create_app()
+    app.config['TESTING'] = True
+    app.extensions['scheduler_service'] = NotDueScheduler()
+    with app.test_client() as client:
+        with client.session_transaction() as sess:
+            sess['user'] = 'testuser'
+        resp = client.post('/api/scheduler/run-job-now/job1')
+        assert resp.status_code == 409
+        assert resp.get_json() == {'success': False, 'error': 'Задача job1 уже выполнена другим воркером'}
+        print('test_run_job_now_not_due: OK')
+
+def test_api_events_resync_on_foreign_epoch():
+    from services.event_bus import get_event_bus
+    app = app_module.create_app()
+    app.config['TESTING'] = True
+    bus = get_event_bus()
+    with app.test_client() as client:
+        with client.session_transaction() as sess:
+            sess['user'] = 'testuser'
+        # Id от прошлого запуска процесса: вместо повтора истории сразу приходит data_version
+        resp = client.get('/api/events', headers={'Last-Event-ID': 'oldboot-42'}, buffered=False)
+        chunks = iter(resp.response)
+        assert next(chunks).decode() == 'retry: 5000\n\n'
+        resync = next(chunks).decode()
+        assert resync.startswith(f'id: {bus.epoch}-')
+        assert 'event: data_version' in resync
+        resp.close()
+        print('test_api_events_resync_on_foreign_epoch: OK')
+
+def test_api_events_stream_closes_after_max_age(monkeypatch):
+    import routes.api_routes as api_routes
+    monkeypatch.setattr(api_routes, 'EVENTS_HEARTBEAT', 0.05)
+    monkeypatch.setattr(api_routes, 'EVENTS_MAX_AGE', 0.2)
+    app = app_module.create_app()
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        with client.session_transaction() as sess:
+            sess['user'] = 'testuser'
+        # Поток завершается сам, браузер переподключится по retry
+        body = client.get('/api/events').get_data(as_text=True)
+        assert body.startswith('retry: 5000')
+        assert ': heartbeat' in body
+        print('test_api_events_stream_closes_after_max_age: OK')
+
 if __name__ == "__main__":
-    test_api_health() 
\ No newline at end of file
+    test_api_health()
+    test_run_job_now_not_due()
+    test_api_events_resync_on_foreign_epoch()
+    with pytest.MonkeyPatch.context() as mp:
+        test_api_events_stream_closes_after_max_age(mp)
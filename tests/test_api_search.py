@@ -1,16 +1,20 @@
 import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-import types
-# Мокаем SearchService до импорта app_module
-import services.search_service as ss
+import pytest
+import app as app_module
+import routes.api_routes as api_routes
+
 class DummySearchService:
     def search_all_sources(self, query, city='', limit=50):
         return {'query': query, 'vacancies': [{'title': 'Test'}], 'sources': {}, 'total': 1}
-ss.SearchService = DummySearchService
-import app as app_module
+    def stream(self, query, city='', limit=50):
+        yield {'type': 'vacancies', 'source': 'hh', 'vacancies': [{'title': 'Тест'}]}
+        yield {'type': 'source', 'source': 'hh', 'status': 'success', 'count': 1}
+        yield {'type': 'done', 'query': query, 'total': 1, 'new': 1, 'duplicates': 0}
 
-def test_api_search():
+def test_api_search(monkeypatch):
+    monkeypatch.setattr(api_routes, 'SearchService', DummySearchService)
     app = app_module.create_app()
     app.config['TESTING'] = True
     with app.test_client() as client:
@@ -27,5 +31,26 @@ def test_api_search():
         assert data2['results']['total'] == 1
         print('test_api_search: OK')
 
+def test_api_search_stream(monkeypatch):
+    import json
+    monkeypatch.setattr(api_routes, 'SearchService', DummySearchService)
+    app = app_module.create_app()
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        resp = client.post('/api/search/stream', json={'query': 'python'})
+        assert resp.status_code == 401
+        with client.session_transaction() as sess:
+            sess['user'] = 'testuser'
+        resp2 = client.post('/api/search/stream', json={'query': 'python'})
+        assert resp2.status_code == 200
+        assert resp2.mimetype == 'application/x-ndjson'
+        records = [json.loads(line) for line in resp2.get_data(as_text=True).splitlines()]
+        assert [r['type'] for r in records] == ['vacancies', 'source', 'done']
+        assert records[0]['vacancies'][0]['title'] == 'Тест'
+        print('test_api_search_stream: OK')
+
 if __name__ == "__main__":
-    test_api_search() 
\ No newline at end of file
+    with pytest.MonkeyPatch.context() as mp:
+        test_api_search(mp)
+    with pytest.MonkeyPatch.context() as mp:
+        test_api_search_stream(mp)
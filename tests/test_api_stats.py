@@ -1,16 +1,16 @@
 import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-import types
-# Мокаем StatsService до импорта app_module
-import services.stats_service as ss
+import pytest
+import app as app_module
+import routes.api_routes as api_routes
+
 class DummyStatsService:
     def get_full_statistics(self):
         return {'total': 42}
-ss.StatsService = DummyStatsService
-import app as app_module
 
-def test_api_stats():
+def test_api_stats(monkeypatch):
+    monkeypatch.setattr(api_routes, 'StatsService', DummyStatsService)
     app = app_module.create_app()
     app.config['TESTING'] = True
     with app.test_client() as client:
@@ -28,4 +28,5 @@ def test_api_stats():
         print('test_api_stats: OK')
 
 if __name__ == "__main__":
-    test_api_stats() 
\ No newline at end of file
+    with pytest.MonkeyPatch.context() as mp:
+        test_api_stats(mp)
@@ -78,6 +78,47 @@ def test_load_users():
     finally:
         builtins.open = orig_open
 
+def test_user_cache_revalidates_on_change():
+    import tempfile
+    import auth.routes as ar
+    orig_file, orig_read = ar.USERS_FILE, ar._read_users_file
+    reads = []
+
+    def counting_read():
+        reads.append(1)
+        return orig_read()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ar.USERS_FILE = os.path.join(tmp, 'users.json')
+        ar._read_users_file = counting_read
+        ar.invalidate_users_cache()
+        try:
+            with open(ar.USERS_FILE, 'w', encoding='utf-8') as f:
+                json.dump({'alice': {'password_hash': 'h', 'expires': '2030-01-01T00:00:00', 'role': 'user'}}, f)
+
+            # Повторные проверки не перечитывают файл
+            for _ in range(5):
+                user = ar.get_user('alice')
+            assert user['expires'] == datetime(2030, 1, 1)
+            assert len(reads) == 1
+
+            # Изменение файла через save_users видно сразу
+            users = ar.load_users()
+            users['bob'] = {'password_hash': 'h2', 'expires': None, 'role': 'admin'}
+            assert ar.save_users(users) is True
+            assert ar.get_user('bob')['role'] == 'admin'
+            assert len(reads) == 2
+
+            # Копии из load_users не портят кеш
+            ar.load_users()['alice']['role'] = 'admin'
+            assert ar.get_user('alice')['role'] == 'user'
+            assert ar.get_user('nobody') is None
+            print('test_user_cache_revalidates_on_change: OK')
+        finally:
+            ar.USERS_FILE, ar._read_users_file = orig_file, orig_read
+            ar.invalidate_users_cache()
+
 if __name__ == "__main__":
     test_save_users()
-    test_load_users() 
\ No newline at end of file
+    test_load_users() 
+    test_user_cache_revalidates_on_change()
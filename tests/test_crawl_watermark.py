@@ -0,0 +1,117 @@
+import sys
+import os
+import types
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from database.models import Base
+from database.watermarks import load_watermark, save_watermark, reset_watermarks
+
+
+def make_session():
+    engine = create_engine('sqlite:///:memory:')
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine)()
+
+
+def test_watermark_merge_and_reset():
+    session = make_session()
+    assert load_watermark(session, 'hh', 'python', '') == set()
+
+    save_watermark(session, 'hh', 'Python ', 'Москва', ['l1', 'l2'])
+    save_watermark(session, 'hh', 'python', 'москва', ['l3', 'l1'], max_links=3)
+    session.commit()
+
+    # Запрос и город нормализуются, свежие ссылки вытесняют старые
+    assert load_watermark(session, 'hh', 'PYTHON', 'Москва') == {'l3', 'l1', 'l2'}
+    save_watermark(session, 'hh', 'python', 'москва', ['l4'], max_links=3)
+    assert load_watermark(session, 'hh', 'python', 'москва') == {'l4', 'l3', 'l1'}
+    assert load_watermark(session, 'superjob', 'python', 'москва') == set()
+
+    reset_watermarks(session)
+    assert load_watermark(session, 'hh', 'python', 'москва') == set()
+    print('test_watermark_merge_and_reset: OK')
+
+
+def test_superjob_stops_at_known_links():
+    import parsers.base_parser as base
+    import parsers.superjob_parser as sj
+    requested = []
+
+    class PageResponse:
+        def __init__(self, page, count):
+            self.page = page
+            self.count = count
+        def raise_for_status(self):
+            pass
+        def json(self):
+            # На первой странице 3 новые вакансии, дальше — уже известные
+            objects = [{'profession': f'V{self.page}-{i}', 'link': f'http://sj/{self.page}-{i}'}
+                       for i in range(self.count)]
+            return {'objects': objects, 'total': 200, 'more': True}
+
+    def fake_get(url, headers=None, params=None, timeout=None):
+        requested.append(params)
+        return PageResponse(params['page'], params['count'])
+
+    parser = sj.SuperJobParser()
+    parser.http = types.SimpleNamespace(get=fake_get)
+    parser.queue_vacancies = lambda vacancies: None
+    known = {f'http://sj/0-{i}' for i in range(3, 100)}
+
+    pages = list(parser.iter_pages('python', limit=200, city='', known_links=known))
+    assert len(pages) == 1 and len(pages[0]) == 100
+    assert base.KNOWN_RUN_LIMIT <= 97
+    assert [p['page'] for p in requested] == [0]
+    assert requested[0]['order_field'] == 'date'
+
+    # Без водяного знака обход полный
+    requested.clear()
+    parser.search('python', limit=200)
+    assert len(requested) == 2
+    assert 'order_field' not in requested[0]
+    print('test_superjob_stops_at_known_links: OK')
+
+
+def test_incremental_search_bypasses_cache_and_updates_watermark(monkeypatch):
+    import services.search_service as ss
+    from services.search_cache import SearchCache
+    watermarks = {}
+    calls = []
+
+    class PagedParser:
+        def __init__(self, name):
+            self.name = name
+        def search(self, query, limit=20, city='', deadline=None):
+            calls.append((self.name, None))
+            return [{'title': 't', 'link': f'http://{self.name}/1'}]
+        def iter_pages(self, query, limit=20, city='', known_links=None, deadline=None):
+            calls.append((self.name, set(known_links)))
+            yield [{'title': 't', 'link': f'http://{self.name}/2'}]
+        def collect_pages(self, pages):
+            return [v for page in pages for v in page]
+
+    monkeypatch.setattr(ss, '_load_watermark', lambda source, query, city: set(watermarks.get(source, [])))
+    monkeypatch.setattr(ss, '_save_watermark',
+                        lambda source, query, city, links: watermarks.setdefault(source, []).extend(links))
+    service = ss.SearchService(cache=SearchCache(ttl=60))
+    service.hh_parser = PagedParser('hh')
+    service.sj_parser = PagedParser('superjob')
+
+    service.search_all_sources('python')
+    result = service.search_all_sources('python', incremental=True)
+    assert result['sources']['hh']['cached'] is False
+    assert ('hh', set()) in calls
+
+    service.search_all_sources('python', incremental=True)
+    assert ('hh', {'http://hh/2'}) in calls
+    assert watermarks['hh'] == ['http://hh/2', 'http://hh/2']
+    print('test_incremental_search_bypasses_cache_and_updates_watermark: OK')
+
+
+if __name__ == "__main__":
+    test_watermark_merge_and_reset()
+    test_superjob_stops_at_known_links()
+    with pytest.MonkeyPatch.context() as mp:
+        test_incremental_search_bypasses_cache_and_updates_watermark(mp)
@@ -0,0 +1,45 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from sqlalchemy import create_engine, inspect, text
+from database.models import upgrade_schema
+
+def test_upgrade_schema_adds_missing_indexes():
+    engine = create_engine('sqlite://')
+    with engine.begin() as conn:
+        # Схема vacancies.db до появления индексов
+        conn.execute(text(
+            'CREATE TABLE vacancies (id INTEGER PRIMARY KEY, title VARCHAR(512) NOT NULL, '
+            'link TEXT NOT NULL UNIQUE, company VARCHAR(256), salary VARCHAR(256), '
+            'location VARCHAR(256), description TEXT, requirements TEXT, '
+            'source VARCHAR(64) NOT NULL, created_at DATETIME)'
+        ))
+    upgrade_schema(engine)
+    # Повторный запуск ничего не ломает
+    upgrade_schema(engine)
+    indexes = {index['name'] for index in inspect(engine).get_indexes('vacancies')}
+    assert 'ix_vacancies_source_created_at' in indexes
+    assert 'ix_vacancies_company' in indexes
+    assert 'ix_vacancies_location' in indexes
+    assert 'ix_vacancies_created_at_id' in indexes
+    assert inspect(engine).has_table('vacancies_fts')
+    print('test_upgrade_schema_adds_missing_indexes: OK')
+
+def test_upgrade_schema_adds_missing_columns():
+    engine = create_engine('sqlite://')
+    with engine.begin() as conn:
+        # scheduler_runs до появления метрик запуска
+        conn.execute(text(
+            'CREATE TABLE scheduler_runs (run_id VARCHAR(64) PRIMARY KEY, job_id VARCHAR(64) NOT NULL, '
+            'owner VARCHAR(128), status VARCHAR(16) NOT NULL, queued_at DATETIME, started_at DATETIME, '
+            'finished_at DATETIME, found INTEGER, error TEXT)'
+        ))
+    upgrade_schema(engine)
+    upgrade_schema(engine)
+    columns = {column['name'] for column in inspect(engine).get_columns('scheduler_runs')}
+    assert {'duration_ms', 'pages', 'http_requests', 'new', 'duplicates', 'errors', 'source_latency'} <= columns
+    print('test_upgrade_schema_adds_missing_columns: OK')
+
+if __name__ == "__main__":
+    test_upgrade_schema_adds_missing_indexes()
+    test_upgrade_schema_adds_missing_columns()
@@ -0,0 +1,79 @@
+import sys
+import os
+import json
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.event_bus import EventBus, format_sse
+
+
+def test_publish_reaches_subscribers():
+    bus = EventBus()
+    first = bus.subscribe()
+    second = bus.subscribe()
+    bus.publish('job_started', {'job_id': 'job1'})
+
+    for subscription in (first, second):
+        event = subscription.get(timeout=1)
+        assert event['type'] == 'job_started'
+        assert event['data'] == {'job_id': 'job1'}
+
+    first.close()
+    assert bus.subscribers_count() == 1
+    assert first.get(timeout=0.01) is None
+    print('test_publish_reaches_subscribers: OK')
+
+
+def test_slow_subscriber_drops_oldest():
+    bus = EventBus(max_queue=2)
+    subscription = bus.subscribe()
+    for i in range(5):
+        bus.publish('job_progress', {'processed': i})
+
+    # Публикация не блокируется, у медленного клиента остаются последние события
+    assert subscription.dropped == 3
+    assert [subscription.get(timeout=1)['data']['processed'] for _ in range(2)] == [3, 4]
+    print('test_slow_subscriber_drops_oldest: OK')
+
+
+def test_replay_after_last_event_id():
+    bus = EventBus(history=3, epoch='boot1')
+    ids = [bus.publish('vacancies_ingested', {'new': i})['id'] for i in range(5)]
+    assert ids[0] == 'boot1-1' and bus.last_event_id() == 'boot1-5'
+
+    assert [e['id'] for e in bus.replay(ids[2])] == ids[3:]
+    assert [e['id'] for e in bus.replay(ids[1])] == ids[2:]
+    assert bus.replay(ids[4]) == []
+    # Пропущенное вытеснено из истории — нужна пересинхронизация
+    assert bus.replay(ids[0]) is None
+    print('test_replay_after_last_event_id: OK')
+
+
+def test_replay_rejects_foreign_epoch():
+    bus = EventBus(epoch='boot2')
+    bus.publish('job_started', {'job_id': 'job1'})
+
+    # id прошлого процесса, другого воркера или мусор в заголовке
+    assert bus.replay('boot1-1') is None
+    assert bus.replay('7') is None
+    assert bus.replay('boot2-x') is None
+    assert len(bus.replay('boot2-0')) == 1
+    assert EventBus().epoch != EventBus().epoch
+    print('test_replay_rejects_foreign_epoch: OK')
+
+
+def test_format_sse():
+    text = format_sse({'id': 'boot1-7', 'type': 'job_finished', 'data': {'status': 'success', 'city': 'Москва'}})
+    lines = text.split('\n')
+    assert lines[0] == 'id: boot1-7'
+    assert lines[1] == 'event: job_finished'
+    assert json.loads(lines[2][len('data: '):]) == {'status': 'success', 'city': 'Москва'}
+    assert text.endswith('\n\n')
+    print('test_format_sse: OK')
+
+
+if __name__ == "__main__":
+    test_publish_reaches_subscribers()
+    test_slow_subscriber_drops_oldest()
+    test_replay_after_last_event_id()
+    test_replay_rejects_foreign_epoch()
+    test_format_sse()
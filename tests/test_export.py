@@ -1,6 +1,9 @@
 import sys
 import os
+import pathlib
+import tempfile
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import pytest
 from utils.export import ExportUtils
 
 class DummyVacancy:
@@ -31,6 +34,68 @@ def test_export_to_text():
     assert 'СПИСОК ВАКАНСИЙ' in text_data and 'Dev' in text_data and 'QA' in text_data
     print('test_export_to_text: OK')
 
+def test_export_streams_in_chunks():
+    vacancies = [
+        DummyVacancy(i, f'Dev {i}', 'Comp', '1000', 'hh', f'http://link/{i}', None)
+        for i in range(5)
+    ]
+    chunks = list(ExportUtils.iter_csv(iter(vacancies), chunk_rows=2))
+    assert len(chunks) == 3
+    assert ''.join(chunks) == ExportUtils.to_csv(vacancies)
+
+    text_chunks = list(ExportUtils.iter_text(iter(vacancies), chunk_rows=2))
+    assert len(text_chunks) == 3
+    assert 'Всего вакансий: 5' in text_chunks[-1]
+    print('test_export_streams_in_chunks: OK')
+
+def test_export_service_stream_csv(monkeypatch):
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from database.models import Base, Vacancy
+    import services.export_service as es
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    session = Session()
+    session.add_all(Vacancy(title=f'V{i}', link=f'http://v/{i}', source='hh') for i in range(3))
+    session.commit()
+    session.close()
+    monkeypatch.setattr(es, 'Session', Session)
+    data = ''.join(es.ExportService().stream_csv())
+    assert data.count('http://v/') == 3 and 'Название' in data
+    print('test_export_service_stream_csv: OK')
+
+def test_export_does_not_block_writes(monkeypatch, tmp_path):
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from database.models import Base, Vacancy
+    import services.export_service as es
+    # Файловая БД: блокировки SQLite видны только между соединениями
+    engine = create_engine(f'sqlite:///{tmp_path / "export.db"}', connect_args={'timeout': 0.5})
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    session = Session()
+    session.add_all(Vacancy(title=f'V{i}', link=f'http://v/{i}', source='hh') for i in range(5))
+    session.commit()
+    session.close()
+    monkeypatch.setattr(es, 'Session', Session)
+    monkeypatch.setattr(es, 'EXPORT_BATCH_SIZE', 2)
+
+    rows = es.ExportService()._iter_rows()
+    assert next(rows).title == 'V0'
+    # Клиент еще скачивает, а запись проходит без "database is locked"
+    session = Session()
+    session.add(Vacancy(title='V5', link='http://v/5', source='hh'))
+    session.commit()
+    session.close()
+    assert [row.title for row in rows] == ['V1', 'V2', 'V3', 'V4', 'V5']
+    print('test_export_does_not_block_writes: OK')
+
 if __name__ == "__main__":
     test_export_to_csv()
-    test_export_to_text() 
\ No newline at end of file
+    test_export_to_text()
+    test_export_streams_in_chunks()
+    with pytest.MonkeyPatch.context() as mp:
+        test_export_service_stream_csv(mp)
+    with pytest.MonkeyPatch.context() as mp:
+        test_export_does_not_block_writes(mp, pathlib.Path(tempfile.mkdtemp()))
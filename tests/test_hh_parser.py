@@ -5,7 +5,7 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 import parsers.hh_parser as hh
 
 def test_hhparser_search():
-    # Мокаем requests.get
+    # Мокаем общий HTTP-клиент
     class DummyResponse:
         def __init__(self, text):
             self.text = text
@@ -13,7 +13,6 @@ def test_hhparser_search():
             pass
     def fake_get(url, headers=None, params=None, timeout=None):
         return DummyResponse('<html></html>')
-    hh.requests.get = fake_get
 
     # Мокаем BeautifulSoup
     class DummySoup:
@@ -36,19 +35,136 @@ def test_hhparser_search():
             return [DummyItem()]
     hh.BeautifulSoup = DummySoup
 
-    # Мокаем save_vacancy чтобы не писать в БД
+    # Мокаем queue_vacancies чтобы не писать в БД
     class DummyBase(hh.BaseParser):
         def search(self, *a, **k):
             return []
-        def save_vacancy(self, vacancy_data):
-            return True
+        def queue_vacancies(self, vacancies):
+            self.ingest_stats['new'] += len(vacancies)
     hh.HHParser.__bases__ = (DummyBase,)
 
     parser = hh.HHParser()
+    parser.http = types.SimpleNamespace(get=fake_get)
     result = parser.search('python', limit=1)
     assert len(result) == 1
     assert result[0]['title'] == 'Test Vacancy'
     print('test_hhparser_search: OK')
 
+def test_hhparser_fetches_pages_concurrently():
+    import threading
+    import time
+    from bs4 import BeautifulSoup
+    hh.BeautifulSoup = BeautifulSoup
+
+    def page_html(page, count):
+        items = ''.join(
+            f'<div data-qa="vacancy-serp__vacancy">'
+            f'<a data-qa="serp-item__title" href="/vacancy/{page}-{i}">V{page}-{i}</a></div>'
+            for i in range(count)
+        )
+        return f'<h1 data-qa="title">Найдено 1\u00a0020 вакансий</h1>{items}'
+
+    requested = []
+    active = {'now': 0, 'max': 0}
+    lock = threading.Lock()
+
+    class DummyResponse:
+        def __init__(self, text):
+            self.text = text
+        def raise_for_status(self):
+            pass
+
+    def fake_get(url, headers=None, params=None, timeout=None):
+        page = params.get('page', 0)
+        with lock:
+            requested.append(page)
+            active['now'] += 1
+            active['max'] = max(active['max'], active['now'])
+        time.sleep(0.05)
+        with lock:
+            active['now'] -= 1
+        return DummyResponse(page_html(page, params['per_page']))
+
+    parser = hh.HHParser()
+    parser.http = types.SimpleNamespace(get=fake_get)
+    pages = []
+    parser.queue_vacancies = lambda vacancies: pages.append(len(vacancies))
+
+    result = parser.search('python', limit=120)
+    assert len(result) == 120
+    assert pages == [50, 50, 20]
+    assert sorted(requested) == [0, 1, 2]
+    assert parser.fetch_stats['http_requests'] == 3
+    # Страницы после первой скачиваются одновременно
+    assert active['max'] == 2
+    assert result[50]['link'] == 'https://hh.ru/vacancy/1-0'
+
+    # Общее число найденных ограничивает план страниц
+    requested.clear()
+    parser.search('python', limit=2000)
+    assert sorted(requested) == list(range(21))
+    assert parser.fetch_stats['http_requests'] == 21
+
+    # По дедлайну опроса парсер сам прекращает листание
+    requested.clear()
+    assert parser.complete is True
+    result = parser.search('python', limit=2000, deadline=time.monotonic() + 0.08)
+    assert 0 < len(requested) < 21 and len(result) < 2000
+    assert parser.complete is False
+
+    # Сбой первой страницы — ошибка опроса, а не пустая выдача
+    requested.clear()
+    try:
+        parser.search('python', limit=100, deadline=time.monotonic() - 1)
+        assert False, 'ожидался TimeoutError'
+    except TimeoutError:
+        pass
+    assert requested == []
+    print('test_hhparser_fetches_pages_concurrently: OK')
+
+def test_hhparser_plans_pages_by_card_count():
+    from bs4 import BeautifulSoup
+    hh.BeautifulSoup = BeautifulSoup
+
+    class DummyResponse:
+        def __init__(self, text):
+            self.text = text
+        def raise_for_status(self):
+            pass
+
+    def make_get(page_size, header, broken=()):
+        requested = []
+
+        def fake_get(url, headers=None, params=None, timeout=None):
+            page = params.get('page', 0)
+            requested.append(page)
+            items = ''.join(
+                '<div data-qa="vacancy-serp__vacancy"></div>' if (page, i) in broken else
+                f'<div data-qa="vacancy-serp__vacancy">'
+                f'<a data-qa="serp-item__title" href="/vacancy/{page}-{i}">V{page}-{i}</a></div>'
+                for i in range(page_size)
+            )
+            return DummyResponse(header + items)
+        return fake_get, requested
+
+    parser = hh.HHParser()
+    parser.queue_vacancies = lambda vacancies: None
+
+    # Битая карточка на первой странице не обрывает листание
+    fake_get, requested = make_get(50, '', broken={(0, 7)})
+    parser.http = types.SimpleNamespace(get=fake_get)
+    result = parser.search('python', limit=150)
+    assert len(result) == 150
+    assert sorted(requested) == [0, 1, 2, 3]
+
+    # hh.ru отдает по 20 карточек вместо запрошенных 50: страницы считаются по 20
+    fake_get, requested = make_get(20, '<h1 data-qa="title">Найдено 1\u00a0020 вакансий</h1>')
+    parser.http = types.SimpleNamespace(get=fake_get)
+    result = parser.search('python', limit=150)
+    assert len(result) == 150
+    assert sorted(requested) == list(range(8))
+    print('test_hhparser_plans_pages_by_card_count: OK')
+
 if __name__ == "__main__":
-    test_hhparser_search() 
\ No newline at end of file
+    test_hhparser_search()
+    test_hhparser_fetches_pages_concurrently() 
\ No newline at end of file
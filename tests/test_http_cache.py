@@ -0,0 +1,91 @@
+import sys
+import os
+from datetime import datetime
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from flask import Flask, jsonify
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+import utils.http_cache as http_cache
+from database.models import Base
+from database.ingest import ingest_vacancies
+from database.versions import bump_data_version, get_data_version
+
+
+def make_app(state, calls, allowed=True):
+    app = Flask(__name__)
+
+    @app.route('/data')
+    @http_cache.conditional_on_data_version(check=lambda: allowed)
+    def data():
+        calls.append(1)
+        return jsonify({'version': state['version']})
+
+    return app
+
+
+def test_conditional_get_returns_304_before_view(monkeypatch):
+    state = {'version': 3}
+    calls = []
+    monkeypatch.setattr(http_cache, '_read_version', lambda name: (state['version'], datetime(2025, 1, 1, 12, 0, 0)))
+    client = make_app(state, calls).test_client()
+
+    response = client.get('/data')
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+    assert etag == '"vacancies-3"'
+    assert response.headers['Last-Modified'] == 'Wed, 01 Jan 2025 12:00:00 GMT'
+
+    # Совпавший ETag: 304 без вызова представления
+    response = client.get('/data', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert len(calls) == 1
+
+    response = client.get('/data', headers={'If-Modified-Since': 'Wed, 01 Jan 2025 12:00:00 GMT'})
+    assert response.status_code == 304
+
+    # Новые данные — новая версия и полный ответ
+    state['version'] = 4
+    response = client.get('/data', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] == '"vacancies-4"'
+    assert len(calls) == 2
+    print('test_conditional_get_returns_304_before_view: OK')
+
+
+def test_conditional_get_skipped_without_access(monkeypatch):
+    calls = []
+    monkeypatch.setattr(http_cache, '_read_version', lambda name: (1, None))
+    client = make_app({'version': 1}, calls, allowed=False).test_client()
+    response = client.get('/data', headers={'If-None-Match': '"vacancies-1"'})
+    assert response.status_code == 200
+    assert 'ETag' not in response.headers
+    assert len(calls) == 1
+    print('test_conditional_get_skipped_without_access: OK')
+
+
+def test_ingest_bumps_data_version_only_for_new_rows():
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    vacancy = {'title': 'Python', 'link': 'https://example.com/1', 'company': 'C', 'salary': 'S'}
+
+    assert get_data_version(session) == (0, None)
+    ingest_vacancies(session, [vacancy], 'hh')
+    assert get_data_version(session)[0] == 1
+    # Только дубликаты — версия не меняется
+    ingest_vacancies(session, [vacancy], 'hh')
+    assert get_data_version(session)[0] == 1
+    bump_data_version(session)
+    assert get_data_version(session)[0] == 2
+    session.close()
+    print('test_ingest_bumps_data_version_only_for_new_rows: OK')
+
+
+if __name__ == "__main__":
+    with pytest.MonkeyPatch.context() as mp:
+        test_conditional_get_returns_304_before_view(mp)
+    with pytest.MonkeyPatch.context() as mp:
+        test_conditional_get_skipped_without_access(mp)
+    test_ingest_bumps_data_version_only_for_new_rows()
@@ -0,0 +1,32 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from parsers.http_client import HttpClient, get_http_client
+
+def test_session_per_host():
+    client = HttpClient(pool_size=5)
+    s1 = client.session_for('https://hh.ru/search/vacancy')
+    s2 = client.session_for('https://hh.ru/vacancy/1')
+    s3 = client.session_for('https://api.superjob.ru/2.0/vacancies')
+    assert s1 is s2
+    assert s1 is not s3
+    client.close()
+    print('test_session_per_host: OK')
+
+def test_retry_policy():
+    client = HttpClient(pool_size=7, max_retries=4, backoff_factor=1)
+    adapter = client.session_for('https://hh.ru').get_adapter('https://hh.ru')
+    assert adapter._pool_maxsize == 7
+    assert adapter.max_retries.total == 4
+    assert 429 in adapter.max_retries.status_forcelist
+    assert 503 in adapter.max_retries.status_forcelist
+    print('test_retry_policy: OK')
+
+def test_shared_client():
+    assert get_http_client() is get_http_client()
+    print('test_shared_client: OK')
+
+if __name__ == "__main__":
+    test_session_per_host()
+    test_retry_policy()
+    test_shared_client()
@@ -0,0 +1,49 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from parsers.rate_limiter import TokenBucket, RateLimiter
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+    def __call__(self):
+        return self.now
+    def sleep(self, seconds):
+        self.now += seconds
+
+def test_token_bucket_burst_and_rate():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, capacity=2, clock=clock, sleep=clock.sleep)
+    # Запас расходуется без ожидания
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == 0
+    # Дальше — не чаще 2 запросов в секунду
+    assert bucket.acquire() == 0.5
+    assert bucket.acquire() == 0.5
+    assert clock.now == 1.0
+    print('test_token_bucket_burst_and_rate: OK')
+
+def test_token_bucket_refill():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=1, capacity=3, clock=clock, sleep=clock.sleep)
+    for _ in range(3):
+        bucket.acquire()
+    clock.now += 10
+    # Запас не превышает capacity
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 1.0
+    print('test_token_bucket_refill: OK')
+
+def test_rate_limiter_per_host():
+    limiter = RateLimiter(default_rate=1, default_burst=1, limits={'hh.ru': (5, 10)})
+    assert limiter.bucket_for('HH.ru') is limiter.bucket_for('hh.ru')
+    assert limiter.bucket_for('hh.ru').rate == 5
+    assert limiter.bucket_for('api.superjob.ru').rate == 1
+    print('test_rate_limiter_per_host: OK')
+
+if __name__ == "__main__":
+    test_token_bucket_burst_and_rate()
+    test_token_bucket_refill()
+    test_rate_limiter_per_host()
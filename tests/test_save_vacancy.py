@@ -1,101 +1,127 @@
 import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-import json
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
 import tempfile
-import types
+from database.models import Base, Vacancy
+from database.ingest import ingest_vacancies
 from parsers.base_parser import BaseParser
 
 class DummyParser(BaseParser):
     def search(self, query: str, limit: int = 20, city: str = ''):
         return []
 
-class DummySession:
-    def __init__(self, existing=False, fail_commit=False):
-        self._existing = existing
-        self._fail_commit = fail_commit
-        self.added = None
-        self.committed = False
-        self.rolled_back = False
-        self.closed = False
-    def query(self, *args, **kwargs):
-        class DummyQuery:
-            def __init__(self, existing):
-                self._existing = existing
-            def filter_by(self, **kwargs):
-                class DummyFirst:
-                    def __init__(self, existing):
-                        self._existing = existing
-                    def first(self):
-                        if self._existing:
-                            return object()  # vacancy exists
-                        return None
-                return DummyFirst(self._existing)
-        return DummyQuery(self._existing)
-    def add(self, obj):
-        self.added = obj
-    def commit(self):
-        if self._fail_commit:
-            raise Exception('DB commit error')
-        self.committed = True
-    def rollback(self):
-        self.rolled_back = True
-    def close(self):
-        self.closed = True
+def make_session_factory():
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine)
 
-class DummyVacancy:
-    def __init__(self, *args, **kwargs):
-        pass
+def make_file_session_factory():
+    # Писатель работает в отдельном потоке, поэтому нужна файловая БД
+    path = os.path.join(tempfile.mkdtemp(), 'test.db')
+    engine = create_engine(f'sqlite:///{path}')
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine)
 
-def test_save_vacancy_new():
-    parser = DummyParser('test_source')
-    vacancy_data = {
-        'title': 'Test Vacancy',
-        'link': 'http://example.com/vacancy/1',
+def make_vacancy(n):
+    return {
+        'title': f'Test Vacancy {n}',
+        'link': f'http://example.com/vacancy/{n}',
         'company': 'Test Company',
         'salary': '100000',
     }
-    sys.modules['database.models'] = types.SimpleNamespace(
-        Vacancy=DummyVacancy,
-        Session=lambda: DummySession()
-    )
-    result = parser.save_vacancy(vacancy_data)
-    assert result is True, f"save_vacancy должен вернуть True, а вернул: {result}"
 
-def test_save_vacancy_exists():
-    parser = DummyParser('test_source')
-    vacancy_data = {
-        'title': 'Test Vacancy',
-        'link': 'http://example.com/vacancy/1',
-        'company': 'Test Company',
-        'salary': '100000',
-    }
-    sys.modules['database.models'] = types.SimpleNamespace(
-        Vacancy=DummyVacancy,
-        Session=lambda: DummySession(existing=True)
-    )
-    result = parser.save_vacancy(vacancy_data)
-    assert result is False, f"save_vacancy должен вернуть False, если вакансия уже есть, а вернул: {result}"
+def test_ingest_vacancies_new_and_duplicates():
+    Session = make_session_factory()
+    session = Session()
+    result = ingest_vacancies(session, [make_vacancy(1), make_vacancy(2)], 'hh')
+    session.commit()
+    assert result['new'] == 2 and result['duplicates'] == 0
 
-def test_save_vacancy_commit_error():
-    parser = DummyParser('test_source')
-    vacancy_data = {
-        'title': 'Test Vacancy',
-        'link': 'http://example.com/vacancy/1',
-        'company': 'Test Company',
-        'salary': '100000',
-    }
-    sys.modules['database.models'] = types.SimpleNamespace(
-        Vacancy=DummyVacancy,
-        Session=lambda: DummySession(fail_commit=True)
-    )
-    result = parser.save_vacancy(vacancy_data)
-    assert result is False, f"save_vacancy должен вернуть False при ошибке commit, а вернул: {result}"
+    # Повтор + дубликат внутри пакета + новая вакансия
+    result = ingest_vacancies(session, [make_vacancy(1), make_vacancy(3), make_vacancy(3)], 'hh')
+    session.commit()
+    assert result['new'] == 1 and result['duplicates'] == 2
+    assert [v['link'] for v in result['new_vacancies']] == ['http://example.com/vacancy/3']
+    assert session.query(Vacancy).count() == 3
+    assert session.query(Vacancy).filter_by(link='http://example.com/vacancy/3').one().source == 'hh'
+    session.close()
+
+def test_ingest_vacancies_large_batch():
+    Session = make_session_factory()
+    session = Session()
+    result = ingest_vacancies(session, [make_vacancy(n) for n in range(250)], 'superjob')
+    session.commit()
+    assert result['new'] == 250
+    assert session.query(Vacancy).count() == 250
+    session.close()
+
+def test_queue_vacancies_counts_new_and_duplicates():
+    import database.writer as dw
+    orig_writer = dw._writer
+    writer = dw.VacancyWriter(session_factory=make_file_session_factory(), flush_interval=0.05)
+    dw._writer = writer
+    try:
+        parser = DummyParser('test_source')
+        parser.queue_vacancies([make_vacancy(1), make_vacancy(2)])
+        parser.queue_vacancies([make_vacancy(2)])
+        stats = parser.collect_ingest_stats()
+        assert stats == {'new': 2, 'duplicates': 1, 'errors': 0}
+    finally:
+        writer.shutdown()
+        dw._writer = orig_writer
+
+def test_queue_vacancies_write_error():
+    class FailingWriter:
+        def submit(self, vacancies, source):
+            raise Exception('queue full')
+    import database.writer as dw
+    orig_writer = dw._writer
+    dw._writer = FailingWriter()
+    try:
+        parser = DummyParser('test_source')
+        parser.queue_vacancies([make_vacancy(1)])
+        stats = parser.collect_ingest_stats()
+        assert stats['new'] == 0 and stats['errors'] == 1
+    finally:
+        dw._writer = orig_writer
+
+def test_writer_survives_session_errors():
+    import database.writer as dw
+    calls = {'n': 0}
+    factory = make_file_session_factory()
+
+    def flaky_factory():
+        # Первые две сессии не открываются: и пакетная запись, и запись страницы
+        calls['n'] += 1
+        if calls['n'] <= 2:
+            raise Exception('database is locked')
+        return factory()
+
+    writer = dw.VacancyWriter(session_factory=flaky_factory, flush_interval=0.05)
+    try:
+        failed = writer.submit([make_vacancy(1)], 'test_source')
+        try:
+            failed.result(timeout=5)
+            assert False, 'ожидалась ошибка записи'
+        except Exception as e:
+            assert 'database is locked' in str(e)
+
+        # Поток писателя жив и записывает следующие страницы
+        result = writer.submit([make_vacancy(2)], 'test_source').result(timeout=5)
+        assert result['new'] == 1 and result['duplicates'] == 0
+    finally:
+        writer.shutdown()
 
 if __name__ == "__main__":
-    test_save_vacancy_new()
-    print("test_save_vacancy_new: OK")
-    test_save_vacancy_exists()
-    print("test_save_vacancy_exists: OK")
-    test_save_vacancy_commit_error()
-    print("test_save_vacancy_commit_error: OK") 
\ No newline at end of file
+    test_ingest_vacancies_new_and_duplicates()
+    print("test_ingest_vacancies_new_and_duplicates: OK")
+    test_ingest_vacancies_large_batch()
+    print("test_ingest_vacancies_large_batch: OK")
+    test_queue_vacancies_counts_new_and_duplicates()
+    print("test_queue_vacancies_counts_new_and_duplicates: OK")
+    test_queue_vacancies_write_error()
+    print("test_queue_vacancies_write_error: OK")
+    test_writer_survives_session_errors()
+    print("test_writer_survives_session_errors: OK")
@@ -1,89 +1,269 @@
 import sys
 import os
-import types
 import tempfile
 import json
+import threading
+import time
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-# Мокаем open, os.path.exists и os.remove для тестов
-class DummyFile:
-    def __init__(self):
-        self.content = ''
-        self._read_pointer = 0
-    def write(self, data):
-        self.content += data
-    def read(self):
-        return self.content
-    def readline(self):
-        if self._read_pointer == 0:
-            self._read_pointer = 1
-            return self.content
-        return ''
-    def __iter__(self):
-        return iter([self.content])
-    def __enter__(self):
-        return self
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        pass
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
 
-def test_add_and_remove_job():
+
+def make_store(tmp, owner=None):
+    """Хранилище планировщика на отдельной SQLite-базе"""
+    from database.scheduler_store import SchedulerStore
+    engine = create_engine('sqlite:///' + os.path.join(tmp, 'scheduler.db'))
+    return SchedulerStore(sessionmaker(bind=engine), owner=owner)
+
+
+def make_service(tmp, owner=None):
     from services.scheduler_service import SchedulerService
-    # Мокаем методы работы с файлами
-    orig_open = open
-    orig_exists = os.path.exists
-    orig_remove = os.remove
-    dummy_file = DummyFile()
-    def fake_open(file, mode='r', encoding=None):
-        return dummy_file
-    os.path.exists = lambda path: False
-    os.remove = lambda path: None
-    globals()['open'] = fake_open
-    try:
-        service = SchedulerService()
+    return SchedulerService(
+        store=make_store(tmp, owner),
+        scheduler_file=os.path.join(tmp, 'scheduler_data.json')
+    )
+
+
+def test_add_and_remove_job():
+    with tempfile.TemporaryDirectory() as tmp:
+        service = make_service(tmp)
         job_id = service.add_search_job('python', 10, city='Moscow', limit=5)
         assert job_id in service.jobs
         result = service.remove_job(job_id)
         assert result['status'] == 'removed'
+        assert service.store.load_job(job_id) is None
         print('test_add_and_remove_job: OK')
-    finally:
-        globals()['open'] = orig_open
-        os.path.exists = orig_exists
-        os.remove = orig_remove
+
 
 def test_save_and_load_data():
-    from services.scheduler_service import SchedulerService
-    # Мокаем open и os.path.exists
-    orig_open = open
-    orig_exists = os.path.exists
-    file_storage = {'content': ''}
-    class FileWriter(DummyFile):
-        def write(self, data):
-            file_storage['content'] = data
-    class FileReader(DummyFile):
-        def __init__(self):
-            super().__init__()
-            self.content = file_storage['content']
-    def fake_open(file, mode='r', encoding=None):
-        if 'w' in mode:
-            return FileWriter()
-        if 'r' in mode:
-            return FileReader()
-    os.path.exists = lambda path: True
-    globals()['open'] = fake_open
-    try:
-        service = SchedulerService()
-        service.is_running = True
-        service.jobs = {'job1': {'id': 'job1'}}
-        service.save_data()
-        # Новый экземпляр для проверки загрузки
-        service2 = SchedulerService()
+    with tempfile.TemporaryDirectory() as tmp:
+        service = make_service(tmp)
+        service.store.set_running(True)
+        job_id = service.add_search_job('python', 10)
+        # Другой воркер видит то же состояние
+        service2 = make_service(tmp)
         assert service2.is_running is True
-        assert 'job1' in service2.jobs
+        assert job_id in service2.jobs
         print('test_save_and_load_data: OK')
-    finally:
-        globals()['open'] = orig_open
-        os.path.exists = orig_exists
+
+
+def test_import_json_once():
+    with tempfile.TemporaryDirectory() as tmp:
+        with open(os.path.join(tmp, 'scheduler_data.json'), 'w', encoding='utf-8') as f:
+            json.dump({'running': True, 'jobs': {'job1': {'id': 'job1', 'status': 'active'}}}, f)
+
+        service = make_service(tmp)
+        assert 'job1' in service.jobs
+        assert service.is_running is True
+
+        # Повторный импорт не восстанавливает удаленную задачу
+        service.remove_job('job1')
+        service2 = make_service(tmp)
+        assert 'job1' not in service2.jobs
+        print('test_import_json_once: OK')
+
+
+def test_lease_is_exclusive_and_expires():
+    with tempfile.TemporaryDirectory() as tmp:
+        first = make_store(tmp, owner='worker-1')
+        second = make_store(tmp, owner='worker-2')
+        first.save_job({'id': 'job1', 'status': 'active', 'next_run': '2000-01-01T00:00:00'})
+
+        assert first.claim('job1', 'run-1', 60, due_only=True) is True
+        assert second.claim('job1', 'run-2', 60, due_only=True) is False
+        assert second.active_run_id('job1') == 'run-1'
+
+        # Аренда упавшего воркера истекает и перехватывается
+        first.release('job1', 'run-1')
+        assert first.claim('job1', 'run-3', -1) is True
+        assert second.claim('job1', 'run-4', 60) is True
+
+        # Задача, уже перенесенная в будущее, по сроку не захватывается
+        second.release('job1', 'run-4')
+        first.save_job({'id': 'job1', 'status': 'active', 'next_run': '2999-01-01T00:00:00'})
+        assert first.claim('job1', 'run-5', 60, due_only=True) is False
+        assert first.active_run_id('job1') is None
+        print('test_lease_is_exclusive_and_expires: OK')
+
+
+def test_queued_run_renews_lease():
+    with tempfile.TemporaryDirectory() as tmp:
+        service = make_service(tmp)
+        other = make_store(tmp, owner='worker-2')
+        executed = []
+
+        def fake_job(job, deadline=None):
+            executed.append(job['id'])
+            return {'found': 0, 'new': 0, 'timed_out': False}
+        service._execute_search_job = fake_job
+        job_id = service.add_search_job('python', 10)
+
+        # Аренда истекла, пока запуск ждал в очереди, но никем не перехвачена — продлеваем
+        assert service.store.claim(job_id, 'run-1', -1) is True
+        service.store.create_run('run-1', job_id)
+        service._run_job(job_id, 'run-1')
+        assert executed == [job_id]
+        assert service.get_run('run-1')['status'] == 'success'
+
+        # Истекшую аренду перехватил другой воркер — повторно задачу не выполняем
+        assert service.store.claim(job_id, 'run-2', -1) is True
+        assert other.claim(job_id, 'run-3', 60) is True
+        service.store.create_run('run-2', job_id)
+        service._run_job(job_id, 'run-2')
+        assert executed == [job_id]
+        assert service.get_run('run-2')['status'] == 'error'
+        assert other.active_run_id(job_id) == 'run-3'
+        print('test_queued_run_renews_lease: OK')
+
+
+def test_run_job_now_dispatches_to_pool():
+    release = threading.Event()
+    with tempfile.TemporaryDirectory() as tmp:
+        service = make_service(tmp)
+        other_worker = make_service(tmp, owner='worker-2')
+        try:
+            def slow_job(job, deadline=None):
+                release.wait(5)
+                return {'found': 7, 'timed_out': False}
+            service._execute_search_job = slow_job
+
+            job_id = service.add_search_job('python', 10)
+            started = service.run_job_now(job_id)
+            assert started['status'] == 'started'
+            run_id = started['run_id']
+
+            # Пока задача выполняется, повторный запуск не создает новый — ни здесь, ни в другом воркере
+            again = service.run_job_now(job_id)
+            assert again['status'] == 'already_running'
+            assert again['run_id'] == run_id
+            assert other_worker.run_job_now(job_id)['status'] == 'already_running'
+            assert service.get_all_jobs()[job_id]['running'] is True
+
+            release.set()
+            deadline = time.monotonic() + 5
+            while service.get_run(run_id)['status'] in ('queued', 'running') or service.is_job_running(job_id):
+                assert time.monotonic() < deadline
+                time.sleep(0.01)
+
+            run = service.get_run(run_id)
+            assert run['status'] == 'success'
+            assert run['found'] == 7
+            assert service.store.load_job(job_id)['run_count'] == 1
+            assert 'running' not in service.store.load_job(job_id)
+            print('test_run_job_now_dispatches_to_pool: OK')
+        finally:
+            release.set()
+
+
+def test_overlapping_jobs_share_one_fetch(monkeypatch):
+    import services.scheduler_service as scheduler_module
+    from services.search_coalescer import SearchCoalescer
+    calls = []
+
+    class FakeSearchService:
+        def search_all_sources(self, query, city='', limit=50, timeout=None, incremental=False):
+            calls.append((query, city))
+            return {'total': 4}
+
+    monkeypatch.setattr(scheduler_module, 'SearchService', FakeSearchService)
+    monkeypatch.setattr(scheduler_module, '_coalescer', SearchCoalescer(window=60))
+    with tempfile.TemporaryDirectory() as tmp:
+        service = make_service(tmp)
+        first = service.jobs[service.add_search_job('Python\nGo', 10, city='Москва', limit=10)]
+        second = service.jobs[service.add_search_job('python', 10, city='москва', limit=5)]
+
+        service._execute_search_job(first)
+        service._execute_search_job(second)
+
+        assert calls == [('Python', 'Москва'), ('Go', 'Москва')]
+        assert second['stats']['last_execution']['keywords_shared'] == 1
+        assert second['stats']['last_execution']['found'] == 4
+        assert service._search_pairs(first) & service._search_pairs(second)
+        print('test_overlapping_jobs_share_one_fetch: OK')
+
+
+def test_adaptive_interval_follows_yield(monkeypatch):
+    import services.scheduler_service as scheduler_module
+    from services.scheduler_service import SchedulerService
+    monkeypatch.setattr(scheduler_module, 'ADAPTIVE_JITTER', 0)
+    job = {'interval_minutes': 60, 'limit': 20, 'adaptive': True,
+           'min_interval_minutes': 15, 'max_interval_minutes': 240}
+
+    # Много новых — чаще, но не чаще нижней границы
+    assert SchedulerService._next_interval(job, {'new': 10}) == 30
+    assert SchedulerService._next_interval(job, {'new': 10}) == 15
+    assert SchedulerService._next_interval(job, {'new': 10}) == 15
+    # Немного новых — интервал не меняется
+    assert SchedulerService._next_interval(job, {'new': 1}) == 15
+    # Ничего нового — реже, но не реже верхней границы
+    for _ in range(10):
+        SchedulerService._next_interval(job, {'new': 0})
+    assert job['current_interval_minutes'] == 240
+
+    # Обычная задача работает с фиксированным интервалом
+    assert SchedulerService._next_interval({'interval_minutes': 60}, {'new': 10}) == 60
+    print('test_adaptive_interval_follows_yield: OK')
+
+
+def test_run_history_metrics_and_retention(monkeypatch):
+    import services.scheduler_service as scheduler_module
+    monkeypatch.setattr(scheduler_module, 'RUN_HISTORY_LIMIT', 3)
+    with tempfile.TemporaryDirectory() as tmp:
+        service = make_service(tmp)
+        job_id = service.add_search_job('python', 10)
+        service._execute_search_job = lambda job, deadline=None: {
+            'found': 5, 'new': 2, 'duplicates': 3, 'pages': 1, 'http_requests': 2,
+            'errors': 0, 'source_latency': {'hh': 120}, 'timed_out': False
+        }
+
+        for _ in range(4):
+            run_id = f"run_{_}"
+            service.store.create_run(run_id, job_id)
+            service._run_job(job_id, run_id)
+
+        history = service.get_job_runs(job_id)
+        # Хранится не больше RUN_HISTORY_LIMIT запусков
+        assert len(history['runs']) == 3
+        run = history['runs'][0]
+        assert run['status'] == 'success'
+        assert (run['new'], run['duplicates'], run['http_requests']) == (2, 3, 2)
+        assert run['duration_ms'] is not None
+
+        summary = history['summary']
+        assert summary['success_rate'] == 1.0
+        assert summary['source_latency_ms']['hh']['p90'] == 120
+        assert summary['new']['p50'] == 2
+        print('test_run_history_metrics_and_retention: OK')
+
+
+def test_collect_metrics_skips_shared_upstream_cost():
+    from services.scheduler_service import SchedulerService
+    metrics = {'pages': 0, 'http_requests': 0, 'new': 0, 'duplicates': 0, 'errors': 0, 'source_latency': {}}
+    results = {'new': 1, 'duplicates': 2, 'sources': {
+        'hh': {'status': 'success', 'pages': 2, 'http_requests': 2, 'latency': 0.5, 'errors': 0},
+        'superjob': {'status': 'timeout', 'latency': 1.0}
+    }}
+    SchedulerService._collect_metrics(metrics, results, shared=False)
+    SchedulerService._collect_metrics(metrics, results, shared=True)
+    assert metrics['pages'] == 2 and metrics['http_requests'] == 2
+    assert metrics['new'] == 2 and metrics['errors'] == 2
+    assert metrics['source_latency'] == {'hh': 500, 'superjob': 1000}
+    print('test_collect_metrics_skips_shared_upstream_cost: OK')
+
 
 if __name__ == "__main__":
     test_add_and_remove_job()
-    test_save_and_load_data() 
\ No newline at end of file
+    test_save_and_load_data()
+    test_import_json_once()
+    test_lease_is_exclusive_and_expires()
+    test_queued_run_renews_lease()
+    test_run_job_now_dispatches_to_pool()
+    with pytest.MonkeyPatch.context() as mp:
+        test_overlapping_jobs_share_one_fetch(mp)
+    with pytest.MonkeyPatch.context() as mp:
+        test_adaptive_interval_follows_yield(mp)
+    with pytest.MonkeyPatch.context() as mp:
+        test_run_history_metrics_and_retention(mp)
+    test_collect_metrics_skips_shared_upstream_cost()
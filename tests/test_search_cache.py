@@ -0,0 +1,113 @@
+import sys
+import os
+from concurrent.futures import Future
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.search_cache import SearchCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def done(value):
+    future = Future()
+    future.set_result(value)
+    return future
+
+
+def test_inflight_requests_share_one_future():
+    cache = SearchCache(ttl=60)
+    pending = Future()
+    submitted = []
+
+    def submit():
+        submitted.append(1)
+        return pending
+
+    key = SearchCache.key('Python  Dev', 'Москва', 10, 'hh')
+    first, cached_first = cache.get_or_submit(key, submit)
+    second, cached_second = cache.get_or_submit(SearchCache.key('python dev', 'москва', 10, 'hh'), submit)
+
+    assert first is second
+    assert (cached_first, cached_second) == (False, True)
+    assert len(submitted) == 1
+    assert cache.get_stats()['inflight_hits'] == 1
+    print('test_inflight_requests_share_one_future: OK')
+
+
+def test_ttl_and_failures():
+    clock = FakeClock()
+    cache = SearchCache(ttl=60, clock=clock)
+    key = SearchCache.key('python', '', 10, 'hh')
+
+    cache.get_or_submit(key, lambda: done(['v1']))
+    clock.now = 59
+    future, cached = cache.get_or_submit(key, lambda: done(['v2']))
+    assert cached and future.result() == ['v1']
+
+    # По истечении TTL источник опрашивается заново
+    clock.now = 130
+    future, cached = cache.get_or_submit(key, lambda: done(['v3']))
+    assert not cached and future.result() == ['v3']
+
+    # Ошибка не кешируется
+    failed = Future()
+    failed.set_exception(RuntimeError('boom'))
+    other = SearchCache.key('go', '', 10, 'hh')
+    cache.get_or_submit(other, lambda: failed)
+    _, cached = cache.get_or_submit(other, lambda: done(['ok']))
+    assert not cached
+    print('test_ttl_and_failures: OK')
+
+
+def test_lru_eviction():
+    cache = SearchCache(ttl=60, max_entries=2)
+    keys = [SearchCache.key(q, '', 10, 'hh') for q in ('a', 'b', 'c')]
+    cache.get_or_submit(keys[0], lambda: done(1))
+    cache.get_or_submit(keys[1], lambda: done(2))
+    # Обращение к 'a' делает вытесняемым 'b'
+    cache.get_or_submit(keys[0], lambda: done(0))
+    cache.get_or_submit(keys[2], lambda: done(3))
+
+    assert cache.get_or_submit(keys[0], lambda: done(0))[1] is True
+    assert cache.get_or_submit(keys[1], lambda: done(0))[1] is False
+    stats = cache.get_stats()
+    assert stats['evictions'] == 2 and stats['size'] == 2
+    print('test_lru_eviction: OK')
+
+
+def test_release_cancels_only_without_waiters():
+    cache = SearchCache(ttl=60)
+    key = SearchCache.key('python', '', 10, 'hh')
+    pending = Future()
+
+    owner, _ = cache.get_or_submit(key, lambda: pending)
+    joiner, cached = cache.get_or_submit(key, lambda: Future())
+    assert joiner is owner and cached is True
+
+    # Запустивший опрос ушел по своему таймауту, но его ждет присоединившийся
+    assert cache.release(owner) is False
+    assert not pending.cancelled()
+    pending.set_result({'vacancies': [1], 'complete': True})
+    assert joiner.result()['vacancies'] == [1]
+    assert cache.get_or_submit(key, lambda: Future())[1] is True
+
+    # Единственный ожидающий снимает еще не начатый опрос, запись удаляется
+    other = SearchCache.key('java', '', 10, 'hh')
+    lonely, _ = cache.get_or_submit(other, Future)
+    assert cache.release(lonely) is True
+    assert lonely.cancelled()
+    assert cache.get_or_submit(other, Future)[1] is False
+    print('test_release_cancels_only_without_waiters: OK')
+
+
+if __name__ == "__main__":
+    test_inflight_requests_share_one_future()
+    test_ttl_and_failures()
+    test_lru_eviction()
+    test_release_cancels_only_without_waiters()
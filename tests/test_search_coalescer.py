@@ -0,0 +1,91 @@
+import sys
+import os
+import threading
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.search_coalescer import SearchCoalescer
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_same_pair_fetched_once_within_window():
+    clock = FakeClock()
+    coalescer = SearchCoalescer(window=60, clock=clock)
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return {'total': 3}
+
+    result, shared = coalescer.fetch('Python Developer', 'Москва', 10, fetch)
+    assert result == {'total': 3} and shared is False
+    # Регистр и пробелы не важны
+    result, shared = coalescer.fetch('python  developer', 'москва', 10, fetch)
+    assert shared is True
+    assert len(calls) == 1
+
+    # После окна запрос выполняется заново
+    clock.now = 61
+    coalescer.fetch('python developer', 'москва', 10, fetch)
+    assert len(calls) == 2
+    # Больший лимит не покрывается прошлым результатом
+    coalescer.fetch('python developer', 'москва', 50, fetch)
+    assert len(calls) == 3
+    assert coalescer.stats == {'fetches': 3, 'shared': 1}
+    print('test_same_pair_fetched_once_within_window: OK')
+
+
+def test_waiters_share_inflight_fetch():
+    coalescer = SearchCoalescer(window=60)
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return {'total': 1}
+
+    results = []
+    owner = threading.Thread(target=lambda: results.append(coalescer.fetch('java', '', 5, fetch)))
+    owner.start()
+    started.wait(5)
+    waiter = threading.Thread(target=lambda: results.append(coalescer.fetch('java', '', 5, fetch)))
+    waiter.start()
+    release.set()
+    owner.join(5)
+    waiter.join(5)
+
+    assert len(calls) == 1
+    assert sorted(shared for _, shared in results) == [False, True]
+    print('test_waiters_share_inflight_fetch: OK')
+
+
+def test_failed_fetch_is_not_cached():
+    coalescer = SearchCoalescer(window=60)
+
+    def broken():
+        raise RuntimeError('boom')
+
+    try:
+        coalescer.fetch('go', '', 5, broken)
+        assert False, 'ожидалось исключение'
+    except RuntimeError:
+        pass
+
+    result, shared = coalescer.fetch('go', '', 5, lambda: {'total': 2})
+    assert result == {'total': 2} and shared is False
+    print('test_failed_fetch_is_not_cached: OK')
+
+
+if __name__ == "__main__":
+    test_same_pair_fetched_once_within_window()
+    test_waiters_share_inflight_fetch()
+    test_failed_fetch_is_not_cached()
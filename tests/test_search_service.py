@@ -1,14 +1,23 @@
 import sys
 import os
+import time
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from services.search_service import SearchService
+from services.search_cache import SearchCache
 
 class DummyParser:
-    def search(self, query, limit=20, city=''):
+    def search(self, query, limit=20, city='', deadline=None):
         return [{'title': 'Test', 'link': 'l', 'company': 'C', 'salary': 'S'}]
 
+class SlowParser:
+    def __init__(self, delay):
+        self.delay = delay
+    def search(self, query, limit=20, city='', deadline=None):
+        time.sleep(self.delay)
+        return [{'title': 'Slow', 'link': 'l', 'company': 'C', 'salary': 'S'}]
+
 def test_search_all_sources():
-    service = SearchService()
+    service = SearchService(cache=SearchCache())
     service.hh_parser = DummyParser()
     service.sj_parser = DummyParser()
     result = service.search_all_sources('python')
@@ -17,5 +26,172 @@ def test_search_all_sources():
     assert result['sources']['superjob']['count'] == 1
     print('test_search_all_sources: OK')
 
+def test_search_all_sources_parallel():
+    service = SearchService(cache=SearchCache())
+    service.hh_parser = SlowParser(0.3)
+    service.sj_parser = SlowParser(0.3)
+    started = time.monotonic()
+    result = service.search_all_sources('python')
+    assert time.monotonic() - started < 0.55
+    assert result['total'] == 2
+    print('test_search_all_sources_parallel: OK')
+
+def test_search_all_sources_timeout():
+    service = SearchService(cache=SearchCache())
+    service.hh_parser = DummyParser()
+    service.sj_parser = SlowParser(0.5)
+    service.source_timeouts['superjob'] = 0.1
+    result = service.search_all_sources('python')
+    assert result['sources']['hh']['status'] == 'success'
+    assert result['sources']['superjob']['status'] == 'timeout'
+    assert result['total'] == 1
+    print('test_search_all_sources_timeout: OK')
+
+def test_search_all_sources_passes_deadline():
+    class DeadlineParser:
+        def search(self, query, limit=20, city='', deadline=None):
+            self.deadline = deadline
+            # Парсер сам прекращает опрос по дедлайну и освобождает поток пула
+            while time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.stopped = time.monotonic()
+            return []
+
+    service = SearchService(cache=SearchCache())
+    service.hh_parser = DeadlineParser()
+    service.sj_parser = DeadlineParser()
+    started = time.monotonic()
+    result = service.search_all_sources('python', timeout=0.1)
+    assert result['sources']['hh']['status'] == 'timeout'
+    assert abs(service.hh_parser.deadline - (started + 0.1)) < 0.05
+    time.sleep(0.1)
+    assert service.sj_parser.stopped - started < 0.2
+    print('test_search_all_sources_passes_deadline: OK')
+
+def test_search_all_sources_ingest_counts():
+    class IngestingParser(DummyParser):
+        def __init__(self, new, duplicates):
+            self.ingest_stats = {'new': new, 'duplicates': duplicates, 'errors': 0}
+
+    service = SearchService(cache=SearchCache())
+    service.hh_parser = IngestingParser(1, 0)
+    service.sj_parser = DummyParser()
+    result = service.search_all_sources('python')
+    assert result['sources']['hh']['new'] == 1
+    assert result['sources']['superjob']['new'] == 0
+    assert result['new'] == 1 and result['duplicates'] == 0
+    print('test_search_all_sources_ingest_counts: OK')
+
+def test_search_all_sources_uses_cache():
+    class CountingParser(SlowParser):
+        def __init__(self):
+            super().__init__(0.2)
+            self.calls = 0
+        def search(self, query, limit=20, city='', deadline=None):
+            self.calls += 1
+            return super().search(query, limit, city)
+
+    service = SearchService(cache=SearchCache(ttl=60))
+    service.hh_parser = CountingParser()
+    service.sj_parser = CountingParser()
+
+    # Одновременные одинаковые запросы ждут один опрос источника
+    import threading
+    threads = [threading.Thread(target=service.search_all_sources, args=('Python ', 'Москва', 10)) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert service.hh_parser.calls == 1 and service.sj_parser.calls == 1
+
+    result = service.search_all_sources('python', 'москва', 10)
+    assert result['total'] == 2
+    assert result['sources']['hh']['cached'] is True
+    assert result['new'] == 0
+    assert service.hh_parser.calls == 1
+
+    # Другой limit и обход кеша — новый опрос
+    service.search_all_sources('python', 'москва', 20)
+    service.search_all_sources('python', 'москва', 10, use_cache=False)
+    assert service.hh_parser.calls == 3
+    print('test_search_all_sources_uses_cache: OK')
+
+def test_failed_and_partial_results_are_not_cached():
+    class FlakyParser:
+        def __init__(self, outcome):
+            self.outcome = outcome
+            self.calls = 0
+        def search(self, query, limit=20, city='', deadline=None):
+            self.calls += 1
+            self.complete = self.outcome != 'partial'
+            if self.outcome == 'error':
+                raise ConnectionError('connection refused')
+            return [{'title': 'Test', 'link': 'l'}]
+
+    service = SearchService(cache=SearchCache(ttl=60))
+    service.hh_parser = FlakyParser('error')
+    service.sj_parser = FlakyParser('partial')
+
+    result = service.search_all_sources('python')
+    assert result['sources']['hh']['status'] == 'error'
+    assert result['sources']['superjob']['status'] == 'success'
+    assert result['sources']['superjob']['complete'] is False
+
+    # Следующий такой же поиск снова опрашивает оба источника
+    service.hh_parser.outcome = 'ok'
+    result = service.search_all_sources('python')
+    assert service.hh_parser.calls == 2 and service.sj_parser.calls == 2
+    assert result['sources']['hh']['cached'] is False
+
+    # Полный результат попадает в кеш
+    result = service.search_all_sources('python')
+    assert service.hh_parser.calls == 2 and result['sources']['hh']['cached'] is True
+    print('test_failed_and_partial_results_are_not_cached: OK')
+
+def test_stream_yields_pages_as_they_arrive():
+    class PagedParser:
+        def __init__(self, pages, delay=0.0):
+            self.pages = pages
+            self.delay = delay
+            self.fetch_stats = {'pages': 0, 'http_requests': 0}
+        def iter_pages(self, query, limit=20, city='', deadline=None):
+            for page in self.pages:
+                time.sleep(self.delay)
+                self.fetch_stats['pages'] += 1
+                yield page
+        def search(self, query, limit=20, city='', deadline=None):
+            return [v for page in self.iter_pages(query, limit, city) for v in page]
+
+    service = SearchService(cache=SearchCache(ttl=60))
+    service.hh_parser = PagedParser([[{'title': 'a'}], [{'title': 'b'}]])
+    service.sj_parser = PagedParser([[{'title': 'slow'}]], delay=0.5)
+    service.source_timeouts['superjob'] = 0.2
+
+    started = time.monotonic()
+    stream = service.stream('python')
+    first = next(stream)
+    # Первая страница приходит до завершения остальных источников
+    assert first == {'type': 'vacancies', 'source': 'hh', 'vacancies': [{'title': 'a'}]}
+    assert time.monotonic() - started < 0.2
+
+    records = [first] + list(stream)
+    sources = {r['source']: r for r in records if r['type'] == 'source'}
+    assert sources['hh']['status'] == 'success' and sources['hh']['pages'] == 2
+    assert sources['superjob']['status'] == 'timeout'
+    assert records[-1]['type'] == 'done' and records[-1]['total'] == 2
+
+    # Успешный источник попадает в кеш и для обычного поиска
+    result = service.search_all_sources('python')
+    assert result['sources']['hh']['cached'] is True
+    assert [v['title'] for v in result['vacancies'] if v['title'] != 'slow'] == ['a', 'b']
+    print('test_stream_yields_pages_as_they_arrive: OK')
+
 if __name__ == "__main__":
-    test_search_all_sources() 
\ No newline at end of file
+    test_search_all_sources()
+    test_search_all_sources_parallel()
+    test_search_all_sources_timeout()
+    test_search_all_sources_passes_deadline()
+    test_search_all_sources_ingest_counts()
+    test_search_all_sources_uses_cache()
+    test_failed_and_partial_results_are_not_cached()
+    test_stream_yields_pages_as_they_arrive()
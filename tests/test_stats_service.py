@@ -1,46 +1,61 @@
 import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-import types
-
-class DummySession:
-    def __init__(self):
-        self.calls = []
-    def query(self, model):
-        class DummyQuery:
-            def __init__(self, model, calls):
-                self.model = model
-                self.calls = calls
-            def count(self):
-                if self.model == 'Vacancy':
-                    self.calls.append('count')
-                    return 10
-                return 0
-            def filter_by(self, **kwargs):
-                class DummyFilter:
-                    def count(self):
-                        if kwargs.get('source') == 'hh':
-                            return 4
-                        if kwargs.get('source') == 'superjob':
-                            return 6
-                        return 0
-                return DummyFilter()
-        return DummyQuery(model, self.calls)
-    def close(self):
-        pass
-
-def test_get_db_statistics():
-    sys.modules['database.models'] = types.SimpleNamespace(
-        Vacancy='Vacancy',
-        Session=lambda: DummySession()
-    )
-    from services.stats_service import StatsService
-    service = StatsService()
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from database.models import Base
+from database.ingest import ingest_vacancies
+from database.stats import rebuild_stats, read_stats
+import services.stats_service as ss
+
+def make_session_factory():
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine)
+
+def make_vacancies(prefix, count, company='C1', location='Moscow'):
+    return [{'title': f'{prefix} {i}', 'link': f'http://{prefix}/{i}',
+             'company': company, 'location': location} for i in range(count)]
+
+def test_get_db_statistics(monkeypatch):
+    Session = make_session_factory()
+    session = Session()
+    ingest_vacancies(session, make_vacancies('hh', 4), 'hh')
+    ingest_vacancies(session, make_vacancies('sj', 6, company='C2'), 'superjob')
+    # Дубликаты не увеличивают счетчики
+    ingest_vacancies(session, make_vacancies('hh', 4), 'hh')
+    session.commit()
+    session.close()
+
+    monkeypatch.setattr(ss, 'Session', Session)
+    service = ss.StatsService()
     stats = service.get_db_statistics()
     assert stats['total_vacancies'] == 10
     assert stats['hh_vacancies'] == 4
     assert stats['superjob_vacancies'] == 6
+
+    full = service.get_full_statistics()
+    assert full['top_companies'][0] == {'name': 'C2', 'count': 6}
+    assert full['top_locations'] == [{'name': 'Moscow', 'count': 10}]
     print('test_get_db_statistics: OK')
 
+def test_rebuild_stats_matches_incremental():
+    Session = make_session_factory()
+    session = Session()
+    ingest_vacancies(session, make_vacancies('a', 3), 'hh')
+    ingest_vacancies(session, make_vacancies('b', 2, company='', location=None), 'superjob')
+    session.commit()
+    incremental = read_stats(session)
+
+    assert rebuild_stats(session) == 5
+    session.commit()
+    assert read_stats(session) == incremental
+    assert incremental['top_companies'] == [{'name': 'C1', 'count': 3}]
+    session.close()
+    print('test_rebuild_stats_matches_incremental: OK')
+
 if __name__ == "__main__":
-    test_get_db_statistics() 
\ No newline at end of file
+    with pytest.MonkeyPatch.context() as mp:
+        test_get_db_statistics(mp)
+    test_rebuild_stats_matches_incremental()
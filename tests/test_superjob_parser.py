@@ -5,7 +5,7 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 import parsers.superjob_parser as sj
 
 def test_superjobparser_search():
-    # Мокаем requests.get
+    # Мокаем общий HTTP-клиент
     class DummyResponse:
         def raise_for_status(self):
             pass
@@ -25,22 +25,87 @@ def test_superjobparser_search():
             }
     def fake_get(url, headers=None, params=None, timeout=None):
         return DummyResponse()
-    sj.requests.get = fake_get
 
-    # Мокаем save_vacancy чтобы не писать в БД
+    # Мокаем queue_vacancies чтобы не писать в БД
     class DummyBase(sj.BaseParser):
         def search(self, *a, **k):
             return []
-        def save_vacancy(self, vacancy_data):
-            return True
+        def queue_vacancies(self, vacancies):
+            self.ingest_stats['new'] += len(vacancies)
     sj.SuperJobParser.__bases__ = (DummyBase,)
 
     parser = sj.SuperJobParser()
+    parser.http = types.SimpleNamespace(get=fake_get)
     result = parser.search('python', limit=1)
     assert len(result) == 1
     assert result[0]['title'] == 'Test Vacancy'
     assert result[0]['salary'] == 'от 1000 до 2000 RUB'
     print('test_superjobparser_search: OK')
 
+def test_superjobparser_prefetches_pages():
+    import threading
+    import time
+    requested = []
+    active = {'now': 0, 'max': 0}
+    lock = threading.Lock()
+
+    class PageResponse:
+        def __init__(self, page, count):
+            self.page = page
+            self.count = count
+        def raise_for_status(self):
+            pass
+        def json(self):
+            objects = [{'profession': f'V{self.page}-{i}', 'link': f'http://sj/{self.page}-{i}'}
+                       for i in range(self.count)]
+            return {'objects': objects, 'total': 230, 'more': self.page < 2}
+
+    failing = set()
+
+    def fake_get(url, headers=None, params=None, timeout=None):
+        if params['page'] in failing:
+            raise ConnectionError('connection reset')
+        with lock:
+            requested.append(params['page'])
+            active['now'] += 1
+            active['max'] = max(active['max'], active['now'])
+        time.sleep(0.05)
+        with lock:
+            active['now'] -= 1
+        count = min(params['count'], 230 - params['page'] * params['count'])
+        return PageResponse(params['page'], count)
+
+    parser = sj.SuperJobParser()
+    parser.http = types.SimpleNamespace(get=fake_get)
+    pages = []
+    parser.queue_vacancies = lambda vacancies: pages.append(len(vacancies))
+
+    result = parser.search('python', limit=500)
+    # План страниц по total из первого ответа: 230 вакансий по 100 на страницу
+    assert sorted(requested) == [0, 1, 2]
+    assert pages == [100, 100, 30]
+    assert len(result) == 230
+    assert result[100]['title'] == 'V1-0'
+    # Следующие страницы грузятся заранее, но не больше лимита на ключ
+    assert active['max'] == min(2, sj.KEY_CONCURRENCY)
+
+    # Ошибка одной страницы не обрывает остальные
+    failing.add(1)
+    pages.clear()
+    result = parser.search('python', limit=500)
+    assert pages == [100, 30]
+    assert [v['title'] for v in result][99:101] == ['V0-99', 'V2-0']
+    assert parser.complete is False
+
+    # Сбой первой страницы пробрасывается: пустая выдача не выдается за успех
+    failing.add(0)
+    try:
+        parser.search('python', limit=500)
+        assert False, 'ожидалась ошибка первой страницы'
+    except ConnectionError:
+        pass
+    print('test_superjobparser_prefetches_pages: OK')
+
 if __name__ == "__main__":
-    test_superjobparser_search() 
\ No newline at end of file
+    test_superjobparser_search()
+    test_superjobparser_prefetches_pages() 
\ No newline at end of file
@@ -0,0 +1,78 @@
+import sys
+import os
+import threading
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scheduler.timer_queue import TimerQueue
+from scheduler.simple_scheduler import SimpleScheduler
+
+def test_timers_fire_in_due_order():
+    timers = TimerQueue()
+    now = time.time()
+    timers.schedule('late', now - 1)
+    timers.schedule('early', now - 3)
+    timers.schedule('future', now + 60)
+    assert timers.wait_next(timeout=0.1) == 'early'
+    assert timers.wait_next(timeout=0.1) == 'late'
+    assert timers.wait_next(timeout=0.1) is None
+    assert len(timers) == 1
+    print('test_timers_fire_in_due_order: OK')
+
+def test_cancel_and_reschedule():
+    timers = TimerQueue()
+    now = time.time()
+    timers.schedule('a', now - 1)
+    timers.schedule('b', now - 1)
+    timers.cancel('a')
+    # Перепланирование заменяет старую запись
+    timers.schedule('b', now + 60)
+    assert timers.wait_next(timeout=0.1) is None
+    assert timers.next_due('b') == now + 60
+    print('test_cancel_and_reschedule: OK')
+
+def test_schedule_wakes_waiting_thread():
+    timers = TimerQueue()
+    timers.schedule('far', time.time() + 3600)
+    fired = []
+    thread = threading.Thread(target=lambda: fired.append(timers.wait_next(timeout=5)))
+    thread.start()
+    time.sleep(0.1)
+    started = time.monotonic()
+    timers.schedule('now', time.time())
+    thread.join(2)
+    assert fired == ['now']
+    assert time.monotonic() - started < 0.5
+    print('test_schedule_wakes_waiting_thread: OK')
+
+def test_wake_interrupts_wait():
+    timers = TimerQueue()
+    result = []
+    thread = threading.Thread(target=lambda: result.append(timers.wait_next()))
+    thread.start()
+    time.sleep(0.1)
+    timers.wake()
+    thread.join(2)
+    assert result == [None]
+    print('test_wake_interrupts_wait: OK')
+
+def test_simple_scheduler_runs_job_without_polling():
+    scheduler = SimpleScheduler()
+    done = threading.Event()
+    scheduler.start()
+    try:
+        scheduler.add_job(done.set, 'job', interval_minutes=60, run_immediately=True)
+        assert done.wait(2)
+        deadline = time.monotonic() + 2
+        while scheduler.jobs['job']['run_count'] == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert scheduler.jobs['job']['run_count'] == 1
+    finally:
+        scheduler.stop()
+    print('test_simple_scheduler_runs_job_without_polling: OK')
+
+if __name__ == "__main__":
+    test_timers_fire_in_due_order()
+    test_cancel_and_reschedule()
+    test_schedule_wakes_waiting_thread()
+    test_wake_interrupts_wait()
+    test_simple_scheduler_runs_job_without_polling()
@@ -0,0 +1,68 @@
+import sys
+import os
+from datetime import datetime, timedelta
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from database.models import Base, Vacancy
+import services.vacancy_service as vs
+
+def make_service(monkeypatch, count):
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    session = Session()
+    base = datetime(2024, 1, 1)
+    for i in range(count):
+        # Пары с одинаковым created_at проверяют порядок по id
+        session.add(Vacancy(title=f'V{i}', link=f'http://v/{i}', company='C',
+                            source='hh' if i % 2 else 'superjob',
+                            created_at=base + timedelta(minutes=i // 2)))
+    session.commit()
+    session.close()
+    monkeypatch.setattr(vs, 'Session', Session)
+    monkeypatch.setattr(vs, '_count_cache', {})
+    return vs.VacancyService()
+
+def test_cursor_walks_forward_and_back(monkeypatch):
+    service = make_service(monkeypatch, 25)
+    seen = []
+    pages = []
+    result = service.get_vacancies_by_cursor(per_page=10, include_total=True)
+    assert result['pagination']['total'] == 25
+    assert result['pagination']['prev_cursor'] is None
+    while True:
+        pages.append(result)
+        seen.extend(v['title'] for v in result['vacancies'])
+        cursor = result['pagination']['next_cursor']
+        if not cursor:
+            break
+        result = service.get_vacancies_by_cursor(cursor=cursor, per_page=10)
+    assert seen == [f'V{i}' for i in range(24, -1, -1)]
+    assert len(pages) == 3
+
+    back = service.get_vacancies_by_cursor(cursor=pages[2]['pagination']['prev_cursor'],
+                                           per_page=10, direction='prev')
+    assert [v['title'] for v in back['vacancies']] == [v['title'] for v in pages[1]['vacancies']]
+    assert back['pagination']['next_cursor'] and back['pagination']['prev_cursor']
+    print('test_cursor_walks_forward_and_back: OK')
+
+def test_cursor_with_filter_and_invalid_cursor(monkeypatch):
+    service = make_service(monkeypatch, 10)
+    result = service.get_vacancies_by_cursor(per_page=3, source='hh', include_total=True)
+    assert result['pagination']['total'] == 5
+    assert all(v['source'] == 'hh' for v in result['vacancies'])
+    raised = False
+    try:
+        service.get_vacancies_by_cursor(cursor='not-a-cursor')
+    except ValueError:
+        raised = True
+    assert raised
+    print('test_cursor_with_filter_and_invalid_cursor: OK')
+
+if __name__ == "__main__":
+    with pytest.MonkeyPatch.context() as mp:
+        test_cursor_walks_forward_and_back(mp)
+    with pytest.MonkeyPatch.context() as mp:
+        test_cursor_with_filter_and_invalid_cursor(mp)
@@ -0,0 +1,66 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from database.models import Base, Vacancy, ensure_fulltext_index
+from database.ingest import ingest_vacancies
+import services.vacancy_service as vs
+
+VACANCIES = [
+    {'title': 'Python разработчик', 'link': 'http://v/1', 'company': 'Яндекс',
+     'description': 'Backend на Django'},
+    {'title': 'Тестировщик', 'link': 'http://v/2', 'company': 'Сбер',
+     'description': 'Автотесты на Python'},
+    {'title': 'Java developer', 'link': 'http://v/3', 'company': 'Тинькофф'},
+]
+
+def make_service(monkeypatch, with_fts=True):
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    if with_fts:
+        assert ensure_fulltext_index(engine)
+    Session = sessionmaker(bind=engine)
+    session = Session()
+    ingest_vacancies(session, VACANCIES, 'hh')
+    session.commit()
+    session.close()
+    monkeypatch.setattr(vs, 'Session', Session)
+    return vs.VacancyService(), Session
+
+def test_fulltext_search_ranked(monkeypatch):
+    service, _ = make_service(monkeypatch)
+    result = service.search_vacancies('python')
+    titles = [v['title'] for v in result['vacancies']]
+    # Совпадение в заголовке ранжируется выше совпадения в описании
+    assert titles == ['Python разработчик', 'Тестировщик']
+    assert result['pagination']['total'] == 2
+    # Префиксный поиск и регистр кириллицы
+    assert service.search_vacancies('РАЗРАБ')['pagination']['total'] == 1
+    assert service.search_vacancies('тинькофф java')['vacancies'][0]['link'] == 'http://v/3'
+    assert service.search_vacancies('"; DROP')['pagination']['total'] == 0
+    print('test_fulltext_search_ranked: OK')
+
+def test_fulltext_index_follows_deletes(monkeypatch):
+    service, Session = make_service(monkeypatch)
+    session = Session()
+    session.query(Vacancy).filter_by(link='http://v/1').delete()
+    session.commit()
+    session.close()
+    assert [v['link'] for v in service.search_vacancies('python')['vacancies']] == ['http://v/2']
+    print('test_fulltext_index_follows_deletes: OK')
+
+def test_search_falls_back_to_like(monkeypatch):
+    service, _ = make_service(monkeypatch, with_fts=False)
+    result = service.search_vacancies('Java')
+    assert result['pagination']['total'] == 1
+    print('test_search_falls_back_to_like: OK')
+
+if __name__ == "__main__":
+    with pytest.MonkeyPatch.context() as mp:
+        test_fulltext_search_ranked(mp)
+    with pytest.MonkeyPatch.context() as mp:
+        test_fulltext_index_follows_deletes(mp)
+    with pytest.MonkeyPatch.context() as mp:
+        test_search_falls_back_to_like(mp)
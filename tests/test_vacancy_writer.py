@@ -0,0 +1,94 @@
+import sys
+import os
+import queue
+import tempfile
+import threading
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from database.models import Base, Vacancy
+from database.writer import VacancyWriter
+
+def make_session_factory():
+    path = os.path.join(tempfile.mkdtemp(), 'writer.db')
+    engine = create_engine(f'sqlite:///{path}')
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine)
+
+class CountingSessionFactory:
+    """Считает транзакции, открытые писателем"""
+    def __init__(self, factory):
+        self.factory = factory
+        self.sessions = 0
+    def __call__(self):
+        self.sessions += 1
+        return self.factory()
+
+def page(prefix, n):
+    return [{'title': f'{prefix} {i}', 'link': f'http://{prefix}/{i}'} for i in range(n)]
+
+def test_writer_coalesces_pages_into_one_transaction():
+    factory = CountingSessionFactory(make_session_factory())
+    writer = VacancyWriter(session_factory=factory, batch_size=1000, flush_interval=0.3)
+    try:
+        futures = [writer.submit(page(f'p{n}', 5), 'hh') for n in range(4)]
+        assert writer.flush(timeout=5) is True
+        assert [f.result(timeout=1)['new'] for f in futures] == [5, 5, 5, 5]
+        assert factory.sessions == 1
+        session = factory.factory()
+        assert session.query(Vacancy).count() == 20
+        session.close()
+    finally:
+        writer.shutdown()
+    print('test_writer_coalesces_pages_into_one_transaction: OK')
+
+def test_writer_isolates_failing_page():
+    writer = VacancyWriter(session_factory=make_session_factory(), flush_interval=0.2)
+    try:
+        good = writer.submit(page('good', 3), 'hh')
+        bad = writer.submit([{'title': None, 'link': 'http://bad/1'}], 'hh')
+        writer.flush(timeout=5)
+        assert good.result(timeout=1)['new'] == 3
+        assert bad.exception(timeout=1) is not None
+    finally:
+        writer.shutdown()
+    print('test_writer_isolates_failing_page: OK')
+
+def test_writer_backpressure():
+    blocker = threading.Event()
+    class BlockingFactory:
+        def __init__(self, factory):
+            self.factory = factory
+        def __call__(self):
+            blocker.wait(5)
+            return self.factory()
+    writer = VacancyWriter(session_factory=BlockingFactory(make_session_factory()),
+                           flush_interval=0, max_pending=1, put_timeout=0.1)
+    try:
+        writer.submit(page('a', 1), 'hh')
+        raised = False
+        try:
+            # Поток записи занят, очередь на 1 элемент быстро заполняется
+            for n in range(3):
+                writer.submit(page(f'b{n}', 1), 'hh')
+        except queue.Full:
+            raised = True
+        assert raised
+    finally:
+        blocker.set()
+        writer.shutdown()
+    print('test_writer_backpressure: OK')
+
+def test_writer_flushes_on_shutdown():
+    factory = make_session_factory()
+    writer = VacancyWriter(session_factory=factory, flush_interval=10)
+    future = writer.submit(page('s', 2), 'superjob')
+    writer.shutdown()
+    assert future.result(timeout=1)['new'] == 2
+    print('test_writer_flushes_on_shutdown: OK')
+
+if __name__ == "__main__":
+    test_writer_coalesces_pages_into_one_transaction()
+    test_writer_isolates_failing_page()
+    test_writer_backpressure()
+    test_writer_flushes_on_shutdown()
@@ -1,27 +1,32 @@
 import csv
 import io
-from typing import List
+from typing import Iterable, Iterator, List
 from database.models import Vacancy
 
 
 class ExportUtils:
     """Утилиты для экспорта данных"""
 
+    # Сколько строк накапливать перед отправкой очередного фрагмента
+    CHUNK_ROWS = 500
+
+    CSV_HEADER = [
+        'ID', 'Название', 'Компания', 'Зарплата',
+        'Источник', 'Ссылка', 'Дата добавления'
+    ]
+
     @staticmethod
-    def to_csv(vacancies: List[Vacancy]) -> str:
-        """Экспорт вакансий в CSV формат"""
+    def iter_csv(vacancies: Iterable[Vacancy], chunk_rows: int = CHUNK_ROWS) -> Iterator[str]:
+        """Потоковый экспорт вакансий в CSV: фрагменты по chunk_rows строк"""
         output = io.StringIO()
 
         # BOM для корректного отображения в Excel
         output.write('\ufeff')
 
         writer = csv.writer(output, delimiter=';')
-        writer.writerow([
-            'ID', 'Название', 'Компания', 'Зарплата',
-            'Источник', 'Ссылка', 'Дата добавления'
-        ])
+        writer.writerow(ExportUtils.CSV_HEADER)
 
-        for vacancy in vacancies:
+        for i, vacancy in enumerate(vacancies, 1):
             writer.writerow([
                 vacancy.id,
                 vacancy.title,
@@ -32,19 +37,25 @@ class ExportUtils:
                 vacancy.created_at.strftime('%Y-%m-%d %H:%M') if vacancy.created_at else ''
             ])
 
-        return output.getvalue()
+            if i % chunk_rows == 0:
+                yield output.getvalue()
+                output.seek(0)
+                output.truncate()
+
+        yield output.getvalue()
 
     @staticmethod
-    def to_text(vacancies: List[Vacancy]) -> str:
-        """Экспорт вакансий в текстовый формат"""
+    def iter_text(vacancies: Iterable[Vacancy], chunk_rows: int = CHUNK_ROWS) -> Iterator[str]:
+        """Потоковый экспорт вакансий в текстовый формат"""
         lines = []
         lines.append("=" * 80)
         lines.append("                    СПИСОК ВАКАНСИЙ")
         lines.append("=" * 80)
         lines.append("")
 
-        for i, vacancy in enumerate(vacancies, 1):
-            lines.append(f"{i}. {vacancy.title}")
+        count = 0
+        for count, vacancy in enumerate(vacancies, 1):
+            lines.append(f"{count}. {vacancy.title}")
             lines.append(f"   Компания: {vacancy.company}")
             lines.append(f"   Зарплата: {vacancy.salary}")
             lines.append(f"   Источник: {vacancy.source.upper()}")
@@ -54,7 +65,21 @@ class ExportUtils:
             lines.append("-" * 60)
             lines.append("")
 
-        lines.append(f"Всего вакансий: {len(vacancies)}")
+            if count % chunk_rows == 0:
+                yield "\n".join(lines) + "\n"
+                lines = []
+
+        lines.append(f"Всего вакансий: {count}")
         lines.append("=" * 80)
 
-        return "\n".join(lines)
\ No newline at end of file
+        yield "\n".join(lines)
+
+    @staticmethod
+    def to_csv(vacancies: List[Vacancy]) -> str:
+        """Экспорт вакансий в CSV формат"""
+        return ''.join(ExportUtils.iter_csv(vacancies))
+
+    @staticmethod
+    def to_text(vacancies: List[Vacancy]) -> str:
+        """Экспорт вакансий в текстовый формат"""
+        return ''.join(ExportUtils.iter_text(vacancies))
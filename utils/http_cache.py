@@ -0,0 +1,64 @@
+from functools import wraps
+from email.utils import format_datetime
+from datetime import timezone
+from flask import request, make_response
+from database.versions import VACANCIES, get_data_version
+
+
+def _read_version(name: str):
+    from database.models import Session
+    session = Session()
+    try:
+        return get_data_version(session, name)
+    finally:
+        session.close()
+
+
+def _not_modified(etag: str, last_modified) -> bool:
+    """Проверка условных заголовков запроса (If-None-Match важнее If-Modified-Since)"""
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+
+    if last_modified and request.if_modified_since:
+        since = request.if_modified_since
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return last_modified.replace(microsecond=0) <= since
+
+    return False
+
+
+def conditional_on_data_version(name: str = VACANCIES, check=None):
+    """Условный GET для представлений, зависящих только от версии данных.
+
+    ETag строится из версии данных, Last-Modified — из времени последнего
+    изменения (кеш браузера и так привязан к URL с параметрами). Совпавший If-None-Match дает 304 до
+    вызова представления, т.е. до тяжелых запросов к БД. check — функция
+    проверки доступа: без доступа представление вызывается как обычно
+    (и само отвечает 401 / редиректом), а 304 не выдается.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method != 'GET' or (check is not None and not check()):
+                return view(*args, **kwargs)
+
+            version, updated_at = _read_version(name)
+            etag = f'{name}-{version}'
+            last_modified = updated_at.replace(tzinfo=timezone.utc) if updated_at else None
+
+            if _not_modified(etag, last_modified):
+                response = make_response('', 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            if last_modified:
+                response.headers['Last-Modified'] = format_datetime(last_modified, usegmt=True)
+            # Браузер хранит ответ, но каждый раз перепроверяет его по ETag
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return wrapper
+    return decorator